@@ -0,0 +1,64 @@
+# extras/batch_rollback_check.py
+#
+# Checks what a filesystem batch leaves behind when its block raises. A batch
+# opened with rollback restores the tree and saves nothing; one opened without
+# it keeps its writes and must still save them exactly once, as a commit would.
+# Run from the repository root:
+#
+#     python extras/batch_rollback_check.py
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'resources', 'core'))
+
+from filesystem import FileSystemManager
+
+ROOT = {"name": "root", "group": "root"}
+
+
+class Boom(Exception):
+    pass
+
+
+def fresh_fs():
+    fs = FileSystemManager()
+    saves = []
+    fs.set_save_function(saves.append)
+    fs.set_persistence_mode('immediate')
+    return fs, saves
+
+
+def unwind(fs, rollback, nested=False):
+    try:
+        with fs.batch(rollback=rollback):
+            fs.write_file("/tmp/kept.txt", "data", ROOT)
+            if nested:
+                with fs.batch(rollback=rollback):
+                    fs.create_directory("/tmp/inner", ROOT)
+            raise Boom()
+    except Boom:
+        pass
+
+
+def check(rollback, nested):
+    fs, saves = fresh_fs()
+    unwind(fs, rollback, nested)
+    exists = fs.get_node("/tmp/kept.txt") is not None
+    saved = bool(saves) and "kept.txt" in saves[-1]
+    if rollback:
+        ok = not exists and not saves and not fs.has_pending_changes()
+    else:
+        ok = exists and len(saves) == 1 and saved and not fs.has_pending_changes()
+    return {"rollback": rollback, "nested": nested, "exists": exists, "saves": len(saves), "ok": ok}
+
+
+def main():
+    results = [check(rollback, nested) for rollback in (True, False) for nested in (False, True)]
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
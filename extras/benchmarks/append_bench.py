@@ -0,0 +1,61 @@
+# extras/benchmarks/append_bench.py
+#
+# Times a run of audit-log style appends done the old way (read the file,
+# concatenate, write_file) against fs_manager.append_file, with the journal
+# on as the browser has it, and counts the journal bytes each produces.
+# Run from the repository root with plain CPython:
+#
+#     python extras/benchmarks/append_bench.py [appends]
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+
+ROOT = {"name": "root", "group": "root"}
+LOG_PATH = "/var/log/bench.log"
+
+
+def rewrite(entry):
+    content = fs_manager.get_node(LOG_PATH).get('content', '')
+    fs_manager.write_file(LOG_PATH, content + entry, ROOT)
+
+
+def append(entry):
+    fs_manager.append_file(LOG_PATH, entry, ROOT)
+
+
+def run_once(appends, add_entry):
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_persistence_mode('write_behind', 3600)
+    journal = []
+    fs_manager.set_save_function(lambda data: None)
+    fs_manager.set_journal_function(journal.append)
+    fs_manager.set_journal_mode(True, max_records=10 ** 9, max_bytes=10 ** 12)
+    fs_manager.write_file(LOG_PATH, "", ROOT)
+    fs_manager.flush()
+    journal.clear()
+
+    start = time.perf_counter()
+    for i in range(appends):
+        add_entry(f"2025-01-01T00:00:00.000000Z | USER: root | ACTION: bench | DETAILS: entry {i}\n")
+        if i % 100 == 99:
+            fs_manager.flush() # What the write-behind timer would do.
+    fs_manager.flush()
+    elapsed = time.perf_counter() - start
+    assert len(fs_manager.get_node(LOG_PATH)['content']) > appends * 70
+    return {"seconds": round(elapsed, 4), "journal_bytes": sum(map(len, journal))}
+
+
+def main():
+    appends = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    results = {"before": run_once(appends, rewrite), "after": run_once(appends, append)}
+    print(json.dumps({"benchmark": "append", "appends": appends, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
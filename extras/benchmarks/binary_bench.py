@@ -0,0 +1,79 @@
+# extras/benchmarks/binary_bench.py
+#
+# Compares binary files stored the old way (base64 or latin-1 text) with
+# binary file nodes: memory held by the content, the size of a saved image
+# holding it (base64 either way), a zip/unzip round trip, and xor over a
+# large file. Run from the repository root with plain CPython:
+#
+#     python extras/benchmarks/binary_bench.py [megabytes]
+
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import unzip, xor, zip as zip_command
+
+ROOT = {"name": "root", "group": "root"}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def reset():
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_save_function(lambda data: None)
+    fs_manager.set_context("/")
+
+
+def stored_bytes(payload, as_binary):
+    reset()
+    content = payload if as_binary else base64.b64encode(payload).decode('ascii')
+    fs_manager.write_file("/data/blob", content, ROOT)
+    memory = sys.getsizeof(fs_manager.get_node("/data/blob")['content'])
+    return {"memory": memory, "image": len(fs_manager.save_state_to_json())}
+
+
+def zip_round_trip(payload):
+    reset()
+    fs_manager.write_file("/data/blob", payload, ROOT)
+    zipped, _ = timed(lambda: zip_command.run(["/data.zip", "/data"], {}, ROOT))
+    unzipped, _ = timed(lambda: unzip.run(["/data.zip", "/out"], {}, ROOT))
+    assert fs_manager.read_bytes("/out/data/blob") == payload
+    return zipped, unzipped
+
+
+def legacy_xor(content, key):
+    # The byte-at-a-time loop xor used before it took bytes.
+    key_bytes = key.encode('utf-8')
+    data = content.encode('utf-8')
+    return bytearray(byte ^ key_bytes[i % len(key_bytes)] for i, byte in enumerate(data))
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    payload = os.urandom(int(megabytes * 1024 * 1024))
+    zipped, unzipped = zip_round_trip(payload)
+
+    reset()
+    fs_manager.write_file("/data/blob", payload, ROOT)
+    new_xor, _ = timed(lambda: xor.run(["k3y", "/data/blob"], {"output": "/data/blob.xor"}, ROOT))
+    old_xor, _ = timed(lambda: legacy_xor(payload.decode('latin-1'), "k3y"))
+
+    print(json.dumps({
+        "benchmark": "binary_content", "payload_bytes": len(payload),
+        "base64_text": stored_bytes(payload, False), "binary_node": stored_bytes(payload, True),
+        "zip_seconds": round(zipped, 4), "unzip_seconds": round(unzipped, 4),
+        "xor_seconds": {"before": round(old_xor, 4), "after": round(new_xor, 4)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# extras/benchmarks/boot_bench.py
+#
+# Measures time to first prompt for saved images of a few sizes, loading them
+# eagerly and lazily. "First prompt" is what boot does before the terminal is
+# usable: load_state_from_json on the saved image, then resolving the user's
+# home directory. The time to read one file afterwards is reported too, since
+# with lazy loading that is where its content gets decoded. Run from the
+# repository root:
+#
+#     python extras/benchmarks/boot_bench.py [megabytes ...]
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import FileSystemManager
+
+SHARD_MOUNTS = ["/home/*", "/etc", "/var"]
+USERS = ["Guest", "alice", "bob", "carol"]
+NOTE_BYTES = 16 * 1024
+NOTES_PER_DIR = 50
+WORDS = ["samwise", "notes", "garden", "kernel", "pipeline", "journal", "ward", "story", "lorem", "ipsum"]
+
+
+def make_note(rng):
+    lines, size = [], 0
+    while size < NOTE_BYTES:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(4, 14)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def build_image(megabytes, seed=11):
+    """A sharded save, like the one boot reads from storage, holding about the given megabytes of notes."""
+    rng = random.Random(seed)
+    fs = FileSystemManager()
+    fs.set_content_store(True)
+    fs.set_shard_mounts(SHARD_MOUNTS)
+    root = {"name": "root", "group": "root"}
+    notes = (megabytes * 1024 * 1024) // NOTE_BYTES
+    with fs.batch(rollback=False):
+        for i in range(notes):
+            user = USERS[i % len(USERS)]
+            directory = f"/home/{user}/notes/d{i // (NOTES_PER_DIR * len(USERS))}"
+            if not fs.get_node(directory):
+                fs.create_directory(directory, root, parents=True)
+            fs.write_file(f"{directory}/note{i}.md", make_note(rng), root)
+    return json.dumps(fs._build_shard_save()), notes
+
+
+def boot(image_json, lazy):
+    fs = FileSystemManager()
+    fs.set_content_store(True)
+    fs.set_shard_mounts(SHARD_MOUNTS)
+    fs.set_lazy_load(lazy)
+    gc.collect()
+    start = time.perf_counter()
+    fs.load_state_from_json(image_json)
+    fs.set_context("/home/Guest")
+    fs.get_node("/home/Guest")
+    first_prompt = time.perf_counter() - start
+    start = time.perf_counter()
+    content = fs.get_node("/home/Guest/notes/d0/note0.md")['content']
+    first_read = time.perf_counter() - start
+    assert len(content) > 0
+    return {"first_prompt_seconds": round(first_prompt, 3), "first_read_seconds": round(first_read, 5)}
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200]
+    results = []
+    for megabytes in sizes:
+        image_json, notes = build_image(megabytes)
+        results.append({
+            "image_mb": round(len(image_json) / (1024 * 1024), 1), "files": notes,
+            "eager": boot(image_json, lazy=False),
+            "lazy": boot(image_json, lazy=True)
+        })
+        del image_json
+    print(json.dumps({"benchmark": "boot", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# extras/benchmarks/find_bench.py
+#
+# Times a full traversal of a seeded synthetic tree the way find, grep -r,
+# du and friends used to do it (recursion, with every child resolved again
+# from the root through get_node) against fs_manager.walk, and times
+# `find / -name` end to end on the walk. Run from the repository root:
+#
+#     python extras/benchmarks/find_bench.py [nodes]
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import find
+
+ROOT = {"name": "root", "group": "root"}
+FANOUT = 12
+FILES_PER_DIR = 20
+
+
+def build_tree(nodes, seed=7):
+    """Random directories under /data, each holding a few files, until about `nodes` nodes exist."""
+    rng = random.Random(seed)
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_persistence_mode('write_behind', flush_interval=3600)
+    fs_manager.set_save_function(lambda data: None)
+    fs_manager.set_context("/")
+    directories, count = ["/data"], 1
+    with fs_manager.batch(rollback=False):
+        fs_manager.create_directory("/data", ROOT, parents=True)
+        while count < nodes:
+            parent = rng.choice(directories[-FANOUT * 4:])
+            directory = f"{parent}/d{count}"
+            fs_manager.create_directory(directory, ROOT)
+            directories.append(directory)
+            count += 1
+            for i in range(min(rng.randrange(FILES_PER_DIR), nodes - count)):
+                fs_manager.write_file(f"{directory}/f{i}.{rng.choice(['txt', 'md', 'py'])}", "x", ROOT)
+                count += 1
+    return count
+
+
+def recursive_traversal(start_path):
+    """The traversal find used before walk."""
+    visited = []
+
+    def traverse(current_path):
+        node = fs_manager.get_node(current_path)
+        if not node:
+            return
+        visited.append(current_path)
+        if node.get('type') == 'directory':
+            for child_name in sorted(node.get('children', {}).keys()):
+                traverse(fs_manager.get_absolute_path(os.path.join(current_path, child_name)))
+
+    traverse(start_path)
+    return visited
+
+
+def walk_traversal(start_path):
+    return [path for path, _, _, _ in fs_manager.walk(start_path, follow_symlinks=True)]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    nodes = build_tree(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    before, old_paths = timed(recursive_traversal, "/data")
+    after, new_paths = timed(walk_traversal, "/data")
+    assert old_paths == new_paths
+    find_seconds, output = timed(find.run, ["/", "-name", "f1.md"], {}, ROOT)
+    print(json.dumps({
+        "benchmark": "tree traversal", "nodes": nodes,
+        "before_seconds": round(before, 4), "after_seconds": round(after, 4),
+        "find_name_seconds": round(find_seconds, 4), "find_name_matches": output.count("f1.md")
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# extras/benchmarks/fsck_bench.py
+#
+# Times `fsck --sizes` on the seeded tree from find_bench.py with a symlink in
+# every few directories: the old check (every node collected into a list,
+# every symlink resolved from the root through get_node, sizes verified in a
+# second pass) against the single streaming pass, and an incremental check
+# after a handful of changes against a full one. Run from the repository root:
+#
+#     python extras/benchmarks/fsck_bench.py [nodes]
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from find_bench import ROOT, build_tree
+
+USERS = {"root": {}, "Guest": {}}
+GROUPS = {"root": {}, "Guest": {}}
+LINK_EVERY = 5 # directories per symlink
+CHANGES = 50
+
+
+def add_links(seed=3):
+    rng = random.Random(seed)
+    directories = [path for path, _, node, _ in fs_manager.walk('/data') if node.get('type') == 'directory']
+    files = [path for path, _, node, _ in fs_manager.walk('/data') if node.get('type') == 'file']
+    with fs_manager.batch(rollback=False):
+        for i, directory in enumerate(directories[::LINK_EVERY]):
+            target = rng.choice(files) if i % 10 else f"/data/missing{i}"
+            fs_manager.ln(target, f"{directory}/link{i}", ROOT)
+    return directories
+
+
+def legacy_fsck(users, groups):
+    """The check fsck did before the streaming pass, without repairs."""
+    report = []
+    fs_manager._ensure_aggregates()
+    true_totals = {}
+    stack = [('/', fs_manager.fs_data.get('/'), False)]
+    while stack:
+        path, node, children_done = stack.pop()
+        if node.get('type') != 'directory':
+            continue
+        children = node.get('children', {})
+        if not children_done:
+            stack.append((path, node, True))
+            stack.extend((os.path.join(path, name), child, False) for name, child in children.items())
+            continue
+        total_size, file_count = 0, 0
+        for child in children.values():
+            child_size, child_files = true_totals[id(child)] if child.get('type') == 'directory' else fs_manager._node_totals(child)
+            total_size += child_size
+            file_count += child_files
+        true_totals[id(node)] = (total_size, file_count)
+        if node.get('total_size') != total_size or node.get('file_count') != file_count:
+            report.append(f"Size aggregate mismatch at {path}")
+    all_nodes = []
+
+    def traverse(node, path):
+        all_nodes.append((path, node))
+        if node.get('type') == 'directory':
+            for name, child in node.get('children', {}).items():
+                traverse(child, os.path.join(path, name))
+
+    traverse(fs_manager.fs_data['/'], '/')
+    for path, node in all_nodes:
+        if node.get('owner') not in users:
+            report.append(f"Orphaned node found at {path}")
+        if node.get('group') not in groups:
+            report.append(f"Orphaned node found at {path}")
+        if node.get('type') == 'symlink':
+            target_path = fs_manager.get_absolute_path(os.path.join(os.path.dirname(path), node.get('target')))
+            if fs_manager.get_node(target_path) is None:
+                report.append(f"Dangling symlink found at {path}")
+    return report
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    nodes = build_tree(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    directories = add_links()
+    legacy_seconds, legacy_report = timed(legacy_fsck, USERS, GROUPS)
+    full_seconds, (report, _) = timed(fs_manager.fsck, USERS, GROUPS, verify_sizes=True)
+    assert sum(line.startswith("Dangling") for line in report) == sum(line.startswith("Dangling") for line in legacy_report)
+
+    fs_manager.set_persistence_mode('immediate')
+    saves = []
+    fs_manager.set_save_function(saves.append)
+    repair_seconds, _ = timed(fs_manager.fsck, USERS, GROUPS, repair=True, verify_sizes=True)
+    repair_saves = len(saves)
+    fs_manager.flush()
+
+    rng = random.Random(5)
+    for i in range(CHANGES):
+        fs_manager.write_file(f"{rng.choice(directories)}/new{i}.txt", "x", ROOT)
+    incremental_seconds, (incremental_report, _) = timed(fs_manager.fsck, USERS, GROUPS, verify_sizes=True, incremental=True)
+    clean_seconds, (clean_report, _) = timed(fs_manager.fsck, USERS, GROUPS, verify_sizes=True)
+    assert incremental_report == clean_report == []
+    print(json.dumps({
+        "benchmark": "fsck --sizes", "nodes": nodes, "symlinks": len(directories[::LINK_EVERY]),
+        "issues": len(report),
+        "legacy_check_seconds": round(legacy_seconds, 3),
+        "streaming_check_seconds": round(full_seconds, 3),
+        "repair_seconds": round(repair_seconds, 3), "repair_saves": repair_saves,
+        "incremental_after_changes": CHANGES,
+        "incremental_check_seconds": round(incremental_seconds, 4),
+        "full_check_seconds": round(clean_seconds, 3)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
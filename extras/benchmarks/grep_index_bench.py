@@ -0,0 +1,87 @@
+# extras/benchmarks/grep_index_bench.py
+#
+# Times `grep -r` over a seeded tree of notes with the content index off and
+# on, for a rare word, a phrase of common words, a case-insensitive search and
+# a pattern the index can't help with. The one-off cost of indexing every file
+# and the index's estimated size are reported too. Run from the repository
+# root:
+#
+#     python extras/benchmarks/grep_index_bench.py [megabytes]
+
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import grep
+
+ROOT = {"name": "root", "group": "root"}
+NOTE_BYTES = 8 * 1024
+NOTES_PER_DIR = 40
+VOCABULARY = 20000
+QUERIES = {
+    "rare_word": ("ticket-4711", {}),
+    "common_phrase": ("w12 w7", {}),
+    "ignore_case": ("W1234 w99", {"ignore-case": True}),
+    "no_literal": ("[0-9]{5}", {}),
+}
+
+
+def build_tree(megabytes, seed=5):
+    rng = random.Random(seed)
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_persistence_mode('write_behind', flush_interval=3600)
+    fs_manager.set_save_function(lambda data: None)
+    # A Zipf-ish vocabulary: a few words everywhere, most of them rare.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    words = [f"w{rank}" for rank in range(VOCABULARY)]
+    notes = megabytes * 1024 * 1024 // NOTE_BYTES
+    with fs_manager.batch(rollback=False):
+        for i in range(notes):
+            directory = f"/notes/d{i // NOTES_PER_DIR}"
+            if i % NOTES_PER_DIR == 0:
+                fs_manager.create_directory(directory, ROOT, parents=True)
+            lines, size = [], 0
+            while size < NOTE_BYTES:
+                line = " ".join(rng.choices(words, cum_weights=cum_weights, k=12))
+                lines.append(line)
+                size += len(line) + 1
+            if i % 500 == 7:
+                lines.append(f"see ticket-{4700 + i % 20}")
+            fs_manager.write_file(f"{directory}/note{i}.md", "\n".join(lines), ROOT)
+    return notes
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    notes = build_tree(megabytes)
+    results, expected = {}, {}
+    fs_manager.set_content_index(False)
+    for name, (pattern, flags) in QUERIES.items():
+        seconds, expected[name] = timed(lambda: grep.run([pattern, "/notes"], dict(flags, recursive=True), ROOT))
+        results[name] = {"scan_seconds": round(seconds, 4)}
+    fs_manager.set_content_index(True, max_bytes=256 * 1024 * 1024)
+    build_seconds, stats = timed(fs_manager.rebuild_content_index)
+    for name, (pattern, flags) in QUERIES.items():
+        seconds, output = timed(lambda: grep.run([pattern, "/notes"], dict(flags, recursive=True), ROOT))
+        assert output == expected[name], name
+        results[name]["index_seconds"] = round(seconds, 4)
+    print(json.dumps({
+        "benchmark": "grep -r", "megabytes": megabytes, "files": notes,
+        "index_build_seconds": round(build_seconds, 3), "index": stats, "queries": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
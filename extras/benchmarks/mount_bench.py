@@ -0,0 +1,82 @@
+# extras/benchmarks/mount_bench.py
+#
+# Compares two ways of getting a host folder of many files into the VFS:
+# importing it (every file read and written into the tree, as an upload
+# does) and mounting it. For each it reports the seconds until the folder
+# can be used, the memory the VFS holds afterwards, the size of the next
+# saved image, and the time to read one file back. Run from the repository
+# root:
+#
+#     python extras/benchmarks/mount_bench.py [files] [bytes_per_file]
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+
+ROOT = {"name": "root", "group": "root"}
+
+
+def make_host_folder(files, size):
+    host = tempfile.mkdtemp(prefix="mount_bench_")
+    line = "the quick brown fox jumps over the lazy dog\n"
+    body = (line * (size // len(line) + 1))[:size]
+    for i in range(files):
+        directory = os.path.join(host, f"d{i % 50}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{i}.txt"), "w") as f:
+            f.write(body)
+    return host
+
+
+def import_folder(host, target):
+    with fs_manager.batch(rollback=False):
+        for directory, _, names in os.walk(host):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path) as f:
+                    fs_manager.write_file(target + path[len(host):], f.read(), ROOT)
+
+
+def measure(label, attach, host, files):
+    fs_manager.reset()
+    fs_manager.create_directory("/mnt", ROOT)
+    tracemalloc.start()
+    start = time.perf_counter()
+    attach(host, "/mnt/data")
+    ready = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    image_bytes = len(fs_manager.save_state_to_json())
+    start = time.perf_counter()
+    fs_manager.get_node(f"/mnt/data/d{(files - 1) % 50}/f{files - 1}.txt")['content']
+    read = time.perf_counter() - start
+    if "/mnt/data" in fs_manager.host_mounts:
+        fs_manager.unmount_host("/mnt/data")
+    return {"method": label, "ready_seconds": round(ready, 4), "memory_bytes": held,
+            "image_bytes": image_bytes, "read_one_us": round(read * 1e6, 1)}
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    fs_manager.set_save_function(lambda data: None)
+    host = make_host_folder(files, size)
+    try:
+        results = [measure("import", import_folder, host, files),
+                   measure("mount", lambda source, target: fs_manager.mount_host(target, source), host, files)]
+    finally:
+        shutil.rmtree(host)
+    print(json.dumps({"benchmark": "host folder: import vs mount", "files": files,
+                      "bytes_per_file": size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# extras/benchmarks/mtime_index_bench.py
+#
+# Times "what changed recently" on the seeded tree from find_bench.py, aged a
+# day and then with a few hundred files rewritten, with the mtime index off (a
+# walk over every node) and on: `find / -mmin -5`, `find / -newer FILE` and the
+# changed_since() syscall. The one-off cost of building the index is reported
+# separately. Run from the repository root:
+#
+#     python extras/benchmarks/mtime_index_bench.py [nodes]
+
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import find
+from find_bench import ROOT, build_tree
+
+CHANGED_FILES = 300
+
+
+def age_tree():
+    """Backdates every node by a day, as if the tree had been built yesterday."""
+    yesterday = (datetime.utcnow() - timedelta(days=1)).isoformat() + "Z"
+    for _, _, node, _ in fs_manager.walk('/'):
+        node['mtime'] = yesterday
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    nodes = build_tree(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    age_tree()
+    checkpoint = time.time()
+    files = [path for path, _, node, _ in fs_manager.walk('/data') if node.get('type') == 'file']
+    with fs_manager.batch(rollback=False):
+        fs_manager.write_file("/data/reference", "x", ROOT)
+        for path in random.Random(11).sample(files, CHANGED_FILES):
+            fs_manager.write_file(path, "changed", ROOT)
+    queries = {
+        "find_mmin": lambda: find.run(["/", "-mmin", "-5"], {}, ROOT),
+        "find_newer": lambda: find.run(["/data", "-newer", "/data/reference"], {}, ROOT),
+        "changed_since": lambda: fs_manager.changed_since(checkpoint),
+    }
+    results, expected = {}, {}
+    fs_manager.set_mtime_index(False)
+    for name, query in queries.items():
+        seconds, expected[name] = timed(query)
+        results[name] = {"walk_seconds": round(seconds, 4)}
+    fs_manager.set_mtime_index(True)
+    build_seconds, _ = timed(fs_manager._mtime_index_ready)
+    for name, query in queries.items():
+        seconds, output = timed(query)
+        assert output == expected[name], name
+        results[name]["index_seconds"] = round(seconds, 4)
+    print(json.dumps({
+        "benchmark": "mtime index", "nodes": nodes, "changed_files": CHANGED_FILES,
+        "index_build_seconds": round(build_seconds, 4), "index": fs_manager.get_mtime_index_stats(),
+        "queries": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# extras/benchmarks/name_index_bench.py
+#
+# Times name lookups on the seeded tree from find_bench.py with the filename
+# index off (a walk over every node) and on: `find / -name '*.md'`, an exact
+# name, an infix locate pattern, and glob expansion in one big directory.
+# The one-off cost of building the index is reported separately. Run from the
+# repository root:
+#
+#     python extras/benchmarks/name_index_bench.py [nodes]
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import find, locate
+from find_bench import ROOT, build_tree
+
+BIG_DIR_FILES = 5000
+QUERIES = {
+    "find_ext": lambda: find.run(["/", "-name", "*.md"], {}, ROOT),
+    "find_exact": lambda: find.run(["/", "-name", "f7.py"], {}, ROOT),
+    "locate_infix": lambda: locate.run(["ig4"], {}, ROOT),
+    "glob_big_dir": lambda: fs_manager.glob_children("/big", fs_manager.get_node("/big"), "item12*.log"),
+}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    nodes = build_tree(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
+    with fs_manager.batch(rollback=False):
+        fs_manager.create_directory("/big", ROOT)
+        for i in range(BIG_DIR_FILES):
+            fs_manager.write_file(f"/big/item{i}.log", "x", ROOT)
+    results, expected = {}, {}
+    fs_manager.set_name_index(False)
+    for name, query in QUERIES.items():
+        seconds, expected[name] = timed(query)
+        results[name] = {"walk_seconds": round(seconds, 4)}
+    fs_manager.set_name_index(True)
+    build_seconds, _ = timed(fs_manager._name_index_ready)
+    for name, query in QUERIES.items():
+        seconds, output = timed(query) # locate_infix includes building the trigram index
+        assert output == expected[name], name
+        results[name]["index_seconds"] = round(seconds, 4)
+    print(json.dumps({
+        "benchmark": "name index", "nodes": nodes + BIG_DIR_FILES + 1,
+        "index_build_seconds": round(build_seconds, 4), "index": fs_manager.get_name_index_stats(),
+        "queries": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# extras/benchmarks/node_memory_bench.py
+#
+# Measures the memory held by a loaded VFS with plain dict nodes and with the
+# compact slotted nodes, using tracemalloc. The tree is a saved image loaded
+# through load_state_from_json, as at boot. Run from the repository root:
+#
+#     python extras/benchmarks/node_memory_bench.py [nodes] [content_bytes]
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import FileSystemManager
+
+FILES_PER_DIR = 20
+OWNERS = ["root", "Guest", "alice", "bob"]
+
+
+def build_image(nodes, content_bytes, seed=7):
+    rng = random.Random(seed)
+    mtime = "2025-06-01T12:00:00.000000Z"
+    root = {"type": "directory", "children": {}, "owner": "root", "group": "root", "mode": 0o755, "mtime": mtime}
+    dirs = [root]
+    created = 1
+    while created < nodes:
+        parent = rng.choice(dirs)
+        owner = rng.choice(OWNERS)
+        if created % (FILES_PER_DIR + 1) == 0:
+            node = {"type": "directory", "children": {}, "owner": owner, "group": owner, "mode": 0o755, "mtime": mtime}
+            dirs.append(node)
+        else:
+            content = "".join(rng.choice("abcdefgh \n") for _ in range(content_bytes))
+            node = {"type": "file", "content": content, "owner": owner, "group": owner, "mode": 0o644, "mtime": mtime}
+        parent["children"][f"n{created}"] = node
+        created += 1
+    return json.dumps({"/": root})
+
+
+def measure(image_json, compact):
+    fs = FileSystemManager()
+    fs.set_compact_nodes(compact)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fs.load_state_from_json(image_json)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"resident_bytes": current, "peak_bytes": peak, "load_seconds": round(elapsed, 3)}
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    content_bytes = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    image_json = build_image(nodes, content_bytes)
+    before = measure(image_json, compact=False)
+    after = measure(image_json, compact=True)
+    print(json.dumps({
+        "benchmark": "node memory", "nodes": nodes, "content_bytes": content_bytes,
+        "before": before, "after": after,
+        "resident_ratio": round(after["resident_bytes"] / before["resident_bytes"], 3)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
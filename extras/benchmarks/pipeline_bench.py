@@ -0,0 +1,110 @@
+# extras/benchmarks/pipeline_bench.py
+#
+# Times pipelines over a generated log file three ways: "json", where each
+# segment runs to completion through run_command_by_name and its result goes
+# through JSON on the way to the next; "objects", the same with the result
+# dicts handed over as they are; and "streamed", execute_result serialized
+# once the way kernel.execute_command does it, which chains the run_stream
+# commands lazily. Checks all three give the same output. The executor
+# imports the user manager, so this needs the kernel's cryptography
+# dependency installed. Run from the repository root:
+#
+#     python extras/benchmarks/pipeline_bench.py [megabytes]
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from executor import command_executor
+
+ROOT = {"name": "root", "group": "root"}
+CONTEXT = json.dumps({
+    "user_context": ROOT, "current_path": "/", "users": {"root": {}}, "user_groups": {"root": ["root"]},
+    "groups": {"root": {"members": ["root"]}}, "config": {}, "jobs": {},
+})
+LOG_PATH = "/var/log/bench.log"
+PIPELINES = [
+    "cat /var/log/bench.log | grep kettle | head -n 5",
+    "cat /var/log/bench.log | grep kettle | wc -l",
+    "cat /var/log/bench.log | sort | uniq -c | head -n 3",
+    "cat /var/log/bench.log | tr a-z A-Z | grep -c KETTLE",
+    "grep -n kettle /var/log/bench.log | nl | awk '{print $2}' | sed s/0/o/g | wc -l",
+    "cat /var/log/bench.log | grep potato | sed s/potato/tater/ | cut -c 1-20 | nl",
+]
+
+
+def build_log(megabytes):
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_save_function(lambda data: None)
+    lines, size, i = [], 0, 0
+    while size < megabytes * 1024 * 1024:
+        line = f"{i:07d} {'kettle' if i % 7 == 0 else 'potato'} second breakfast {i % 13}"
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    fs_manager.write_file(LOG_PATH, "\n".join(lines) + "\n", ROOT)
+
+
+def segments(command):
+    _, pipelines = command_executor._parse_command_string(command)
+    return command_executor._bind_pipeline(pipelines[0])['segments']
+
+
+async def run_through_json(command):
+    """The pipeline the way execute ran it before streams: one whole string per segment, through JSON."""
+    output = None
+    for segment in segments(command):
+        result = json.loads(await command_executor.run_command_by_name(
+            segment['command'], segment['args'], segment['flags'], ROOT, output, {}, js_context_json=CONTEXT))
+        output = result.get("output")
+    return output
+
+
+async def run_as_objects(command):
+    """One whole string per segment, handed on in the result dict without going through JSON."""
+    output = None
+    for segment in segments(command):
+        result = await command_executor._run_command(
+            segment['command'], segment['args'], segment['flags'], ROOT, output, {})
+        output = result.get("output")
+    return output
+
+
+async def run_streamed(command):
+    result = await command_executor.execute_result(command, CONTEXT)
+    return json.loads(command_executor.result_json(result)).get("output")
+
+
+def timed(func, command, repeat=3):
+    best, output = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = asyncio.run(func(command))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    build_log(megabytes)
+    results = []
+    for command in PIPELINES:
+        entry = {"pipeline": command}
+        expected = None
+        for name, func in (("json", run_through_json), ("objects", run_as_objects), ("streamed", run_streamed)):
+            best, output = timed(func, command)
+            assert expected is None or output == expected, (name, command)
+            expected = output
+            entry[name] = round(best, 4)
+        results.append(entry)
+    print(json.dumps({"benchmark": "pipeline", "megabytes": megabytes, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
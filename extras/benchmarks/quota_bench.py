@@ -0,0 +1,70 @@
+# extras/benchmarks/quota_bench.py
+#
+# Times writes by an ordinary user (new files, then rewrites of them) on the
+# seeded tree from find_bench.py at two sizes, with no limits set and with a
+# VFS size cap, per-user byte and inode quotas and a VFS inode limit all in
+# force. The per-write overhead of enforcement should not grow with the tree;
+# the one-off cost of building the quota ledger does, and is reported
+# separately. Run from the repository root:
+#
+#     python extras/benchmarks/quota_bench.py [nodes]
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from find_bench import ROOT, build_tree
+
+GUEST = {"name": "Guest", "group": "Guest"}
+WRITES = 5000
+
+
+def write_round(tag):
+    """WRITES new files in Guest's home, then rewrites each; returns seconds per write."""
+    start = time.perf_counter()
+    with fs_manager.batch(rollback=False):
+        for i in range(WRITES):
+            fs_manager.write_file(f"/home/Guest/{tag}{i}.txt", "x" * 64, GUEST)
+        for i in range(WRITES):
+            fs_manager.write_file(f"/home/Guest/{tag}{i}.txt", "y" * 80, GUEST)
+    return (time.perf_counter() - start) / (2 * WRITES)
+
+
+def measure(nodes):
+    count = build_tree(nodes)
+    fs_manager.create_directory("/home/Guest", ROOT, parents=True)
+    fs_manager.chown("/home/Guest", "Guest")
+    fs_manager.set_max_vfs_size(0)
+    fs_manager.get_usage()
+    unlimited = write_round("off")
+
+    fs_manager.set_max_vfs_size(640 * 1024 * 1024)
+    fs_manager.set_quota("Guest", 64 * 1024 * 1024, 128 * 1024 * 1024, 100000, 200000)
+    fs_manager.set_quota(None, 0, 0, 0, 2 * (count + 2 * WRITES)) # Checked on every write, never reached.
+    start = time.perf_counter()
+    fs_manager._quota_ledger_ready()
+    ledger_seconds = time.perf_counter() - start
+    limited = write_round("on")
+    return {
+        "nodes": count,
+        "ledger_build_seconds": round(ledger_seconds, 4),
+        "unlimited_write_us": round(unlimited * 1e6, 2),
+        "quota_write_us": round(limited * 1e6, 2),
+        "overhead_us": round((limited - unlimited) * 1e6, 2)
+    }
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(json.dumps({
+        "benchmark": "quota enforcement", "writes_per_round": 2 * WRITES,
+        "trees": [measure(nodes // 10), measure(nodes)]
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
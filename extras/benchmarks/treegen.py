@@ -0,0 +1,194 @@
+# extras/benchmarks/treegen.py
+#
+# Seeded generator of synthetic VFS trees for the benchmarks. The same shape,
+# node count and seed always give the same tree, down to file contents, so
+# timings from different commits are comparable. Used by vfs_suite.py; also
+# runnable on its own to print what a tree holds:
+#
+#     python extras/benchmarks/treegen.py <shape> <nodes> [seed]
+
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+
+ROOT = {"name": "root", "group": "root"}
+WORDS = ["samwise", "notes", "garden", "kernel", "pipeline", "journal", "ward", "story", "lorem", "ipsum",
+         "error", "warning", "request", "shire", "lembas", "rope", "kettle", "potato", "second", "breakfast"]
+CORPUS_BYTES = 64 * 1024
+WIDE_ENTRIES_PER_DIR = 500
+DEEP_CHAIN_DEPTH = 64
+DEEP_FILES_PER_LEVEL = 2
+TREE_FILES_PER_DIR = 20
+HUGE_FILES = 8
+HUGE_TOTAL_BYTES = 32 * 1024 * 1024
+SYMLINK_SHARE = 0.35 # of the entries, once there are files to point at
+DANGLING_SHARE = 0.1 # of the symlinks
+
+
+def _corpus(rng):
+    """About CORPUS_BYTES of word-filled lines that file contents are cut from."""
+    lines, size = [], 0
+    while size < CORPUS_BYTES:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 12)))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+class _Builder:
+    """Makes the nodes for a shape and keeps count of what it made."""
+
+    def __init__(self, fs, rng, root):
+        self.fs = fs
+        self.rng = rng
+        self.corpus = _corpus(rng)
+        self.directories = [root]
+        self.files = []
+        self.symlinks = []
+        self.bytes = 0
+        fs.create_directory(root, ROOT, parents=True)
+
+    @property
+    def count(self):
+        return len(self.directories) + len(self.files) + len(self.symlinks)
+
+    def text(self, size):
+        if size > len(self.corpus):
+            return (self.corpus * (size // len(self.corpus) + 1))[:size]
+        start = self.rng.randrange(len(self.corpus) - size + 1)
+        return self.corpus[start:start + size]
+
+    def directory(self, parent, name):
+        path = f"{parent}/{name}"
+        self.fs.create_directory(path, ROOT)
+        self.directories.append(path)
+        return path
+
+    def file(self, parent, name, size):
+        path = f"{parent}/{name}"
+        self.fs.write_file(path, self.text(size), ROOT)
+        self.files.append(path)
+        self.bytes += size
+        return path
+
+    def symlink(self, parent, name, target):
+        path = f"{parent}/{name}"
+        self.fs.ln(target, path, ROOT)
+        self.symlinks.append(path)
+        return path
+
+    def extension(self):
+        return self.rng.choice(["txt", "md", "log", "py"])
+
+
+def _wide(b, nodes):
+    """A few directories, each holding hundreds of small files."""
+    root = b.directories[0]
+    while b.count < nodes:
+        directory = b.directory(root, f"d{len(b.directories)}")
+        for i in range(min(WIDE_ENTRIES_PER_DIR, nodes - b.count)):
+            b.file(directory, f"f{i}.{b.extension()}", b.rng.randrange(64, 2048))
+
+
+def _deep(b, nodes):
+    """Chains of nested directories DEEP_CHAIN_DEPTH long, with a couple of files at every level."""
+    root = b.directories[0]
+    while b.count < nodes:
+        directory = root
+        for depth in range(DEEP_CHAIN_DEPTH):
+            if b.count >= nodes:
+                break
+            directory = b.directory(directory, f"d{len(b.directories)}")
+            for i in range(min(DEEP_FILES_PER_LEVEL, nodes - b.count)):
+                b.file(directory, f"f{i}.{b.extension()}", b.rng.randrange(64, 2048))
+
+
+def _random_tree(b, nodes, make_entry):
+    """
+    Random directories, each with up to TREE_FILES_PER_DIR entries made by
+    make_entry(directory, index). Parents are picked from every directory so
+    far, which keeps the tree about logarithmically deep.
+    """
+    while b.count < nodes:
+        parent = b.rng.choice(b.directories)
+        directory = b.directory(parent, f"d{len(b.directories)}")
+        for i in range(min(b.rng.randrange(TREE_FILES_PER_DIR), nodes - b.count)):
+            make_entry(directory, i)
+
+
+def _small_files(b, nodes):
+    """A random tree of many small files."""
+    _random_tree(b, nodes, lambda directory, i: b.file(directory, f"f{i}.{b.extension()}", b.rng.randrange(16, 512)))
+
+
+def _huge_files(b, nodes):
+    """A few huge files (HUGE_TOTAL_BYTES between them) in a tree of otherwise empty directories."""
+    files = min(HUGE_FILES, max(1, nodes - 1))
+    _random_tree(b, nodes - files, lambda directory, i: None)
+    for i in range(files):
+        b.file(b.rng.choice(b.directories), f"huge{i}.log", HUGE_TOTAL_BYTES // files)
+
+
+def _symlinks(b, nodes):
+    """A random tree where about a third of the entries are symlinks to files made earlier, some dangling."""
+    def make_entry(directory, i):
+        if b.files and b.rng.random() < SYMLINK_SHARE:
+            dangling = b.rng.random() < DANGLING_SHARE
+            target = f"{directory}/missing{i}" if dangling else b.rng.choice(b.files)
+            b.symlink(directory, f"l{i}", target)
+        else:
+            b.file(directory, f"f{i}.{b.extension()}", b.rng.randrange(16, 512))
+    _random_tree(b, nodes, make_entry)
+
+
+SHAPES = {
+    "wide": _wide,
+    "deep": _deep,
+    "small_files": _small_files,
+    "huge_files": _huge_files,
+    "symlinks": _symlinks,
+}
+
+
+def generate(shape, nodes, seed=0, root="/bench", fs=None):
+    """
+    Builds a tree of the given shape (see SHAPES) with about `nodes` nodes
+    under root, replacing whatever the filesystem held. Returns what was
+    made: counts, total file bytes and the paths of every directory, file
+    and symlink, in creation order.
+    """
+    fs = fs or fs_manager
+    fs._initialize_default_filesystem()
+    fs.set_persistence_mode('write_behind', flush_interval=3600)
+    fs.set_save_function(lambda data: None)
+    fs.set_context("/")
+    rng = random.Random(f"{shape}:{nodes}:{seed}")
+    with fs.batch(rollback=False):
+        builder = _Builder(fs, rng, root)
+        SHAPES[shape](builder, nodes)
+    return {
+        "shape": shape, "nodes": builder.count, "seed": seed, "root": root,
+        "directories": builder.directories, "files": builder.files, "symlinks": builder.symlinks,
+        "bytes": builder.bytes,
+    }
+
+
+def summary(tree):
+    """tree from generate() without the path lists."""
+    return {key: len(value) if isinstance(value, list) else value for key, value in tree.items()}
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in SHAPES:
+        sys.exit(f"usage: treegen.py <{'|'.join(SHAPES)}> <nodes> [seed]")
+    tree = generate(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    print(json.dumps(summary(tree), indent=2))
+
+
+if __name__ == "__main__":
+    main()
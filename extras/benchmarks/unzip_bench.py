@@ -0,0 +1,66 @@
+# extras/benchmarks/unzip_bench.py
+#
+# Times `unzip` of a synthetic archive with and without filesystem batching.
+# Run from the repository root with plain CPython:
+#
+#     python extras/benchmarks/unzip_bench.py [entries]
+
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from commands import unzip
+
+ROOT = {"name": "root", "group": "root"}
+
+
+def build_archive(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for i in range(entries):
+            zipf.writestr(f"project/dir{i % 40}/file{i}.txt", f"line {i}\n" * 8)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def run_once(archive_b64, batched):
+    fs_manager._initialize_default_filesystem()
+    fs_manager.set_persistence_mode('immediate')
+    saves = []
+    # Mirrors the JS bridge, which parses every snapshot it is handed.
+    fs_manager.set_save_function(lambda data: saves.append(len(json.loads(data))))
+    fs_manager.write_file("/archive.zip", archive_b64, ROOT)
+    fs_manager.set_context("/")
+    saves.clear()
+
+    original_batch = fs_manager.batch
+    if not batched:
+        fs_manager.batch = lambda rollback=True: contextlib.nullcontext(fs_manager)
+    try:
+        start = time.perf_counter()
+        unzip.run(["/archive.zip", "/out"], {}, ROOT)
+        elapsed = time.perf_counter() - start
+    finally:
+        fs_manager.batch = original_batch
+    return elapsed, len(saves)
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    archive_b64 = build_archive(entries)
+    results = {}
+    for label, batched in (("before", False), ("after", True)):
+        elapsed, saves = run_once(archive_b64, batched)
+        results[label] = {"seconds": round(elapsed, 4), "saves": saves}
+    print(json.dumps({"benchmark": "unzip", "entries": entries, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
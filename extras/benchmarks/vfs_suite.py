@@ -0,0 +1,237 @@
+# extras/benchmarks/vfs_suite.py
+#
+# Times the filesystem and the commands built on it over seeded synthetic
+# trees (see treegen.py) of each shape at 1k, 10k and 100k nodes, and prints
+# the results as JSON for comparing commits. Every operation starts from the
+# same freshly loaded image, configured the way config.js sets up the
+# browser, and runs --repeat times: "cold" is the first run, which pays for
+# whatever is built lazily (aggregates, indexes, decoded contents), and
+# "best" the fastest. Operations that change the tree get a fresh copy for
+# every run. Commands are called directly rather than through the executor,
+# so nothing outside the standard library is needed. The full matrix takes
+# several minutes. Run from the repository root with plain CPython:
+#
+#     python extras/benchmarks/vfs_suite.py [--sizes 1000,10000] [--shapes wide,deep]
+#         [--ops get_node,fsck] [--repeat 3] [--seed 0] [--output results.json]
+#     python extras/benchmarks/vfs_suite.py --compare before.json after.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'core'))
+
+from filesystem import fs_manager
+from story_manager import story_manager
+from commands import cp, du, find, grep, ls, story, unzip, zip as zip_command
+import treegen
+
+ROOT = {"name": "root", "group": "root"}
+USERS = {"root": {}}
+GROUPS = {"root": {"members": ["root"]}}
+SIZES = (1000, 10000, 100000)
+LOOKUPS = 1000
+WRITES = 1000
+# The FILESYSTEM settings from config.js that change how the kernel performs.
+CONFIG = {
+    "content_store": True,
+    "lazy_load": True,
+    "name_index": True,
+    "content_index": True,
+    "content_index_max_bytes": 16 * 1024 * 1024,
+    "mtime_index": True,
+    "compact_nodes": False,
+}
+
+
+def configure():
+    fs_manager.set_content_store(CONFIG["content_store"])
+    fs_manager.set_compact_nodes(CONFIG["compact_nodes"])
+    fs_manager.set_lazy_load(CONFIG["lazy_load"])
+    fs_manager.set_name_index(CONFIG["name_index"])
+    fs_manager.set_content_index(CONFIG["content_index"], CONFIG["content_index_max_bytes"])
+    fs_manager.set_mtime_index(CONFIG["mtime_index"])
+
+
+def check(result):
+    """Raises if a command reported failure, so a broken operation isn't timed as a fast one."""
+    if isinstance(result, dict) and result.get("success") is False:
+        error = result.get("error")
+        raise RuntimeError(error.get("message") if isinstance(error, dict) else error)
+    return result
+
+
+class Bench:
+    """One generated tree, saved once and reloaded for every operation."""
+
+    def __init__(self, shape, nodes, seed):
+        self.tree = treegen.generate(shape, nodes, seed)
+        self.root = self.tree["root"]
+        self.image = fs_manager.save_state_to_json()
+        self.rng = random.Random(f"{shape}:{nodes}:{seed}:ops")
+        paths = self.tree["directories"] + self.tree["files"] + self.tree["symlinks"]
+        self.lookups = [self.rng.choice(paths) for _ in range(LOOKUPS)]
+        self.write_targets = [f"{self.rng.choice(self.tree['directories'])}/new{i}.txt" for i in range(WRITES)]
+
+    def restore(self):
+        fs_manager.load_state_from_json(self.image)
+        fs_manager.set_persistence_mode('write_behind', flush_interval=3600)
+        fs_manager.set_save_function(lambda data: None)
+        fs_manager.set_context("/")
+
+
+# Each operation is (setup, timed): setup(bench) runs untimed before every run,
+# timed(bench) is what gets measured.
+
+def _get_node(bench):
+    for path in bench.lookups:
+        fs_manager.get_node(path)
+
+
+def _write_file(bench):
+    for path in bench.write_targets:
+        fs_manager.write_file(path, "benchmark line\n", ROOT)
+
+
+def _save_setup(bench):
+    fs_manager.set_persistence_mode('immediate')
+
+
+def _save_state(bench):
+    fs_manager._save_state()
+
+
+def _zip_setup(bench):
+    check(zip_command.run(["/bench.zip", bench.root], {}, ROOT))
+
+
+def _story_setup(bench):
+    result = story_manager.init(bench.root, ROOT)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    fs_manager.set_context(bench.root)
+
+
+OPERATIONS = {
+    "get_node": (None, _get_node),
+    "write_file": (None, _write_file),
+    "_save_state": (_save_setup, _save_state),
+    "calculate_node_size": (None, lambda bench: fs_manager.calculate_node_size(bench.root)),
+    "fsck": (None, lambda bench: fs_manager.fsck(USERS, GROUPS, verify_sizes=True)),
+    "ls -lR": (None, lambda bench: check(ls.run([bench.root], {"long": True, "recursive": True}, ROOT))),
+    "find": (None, lambda bench: check(find.run([bench.root, "-name", "*.md"], {}, ROOT))),
+    "grep -r": (lambda bench: fs_manager.rebuild_content_index(),
+                lambda bench: check(grep.run(["kettle", bench.root], {"recursive": True}, ROOT))),
+    "du": (None, lambda bench: check(du.run([bench.root], {}, ROOT))),
+    "cp -r": (None, lambda bench: check(cp.run([bench.root, "/bench_copy"], {"recursive": True}, ROOT))),
+    "zip": (None, lambda bench: check(zip_command.run(["/bench.zip", bench.root], {}, ROOT))),
+    "unzip": (_zip_setup, lambda bench: check(unzip.run(["/bench.zip", "/unzipped"], {}, ROOT))),
+    "story save": (_story_setup, lambda bench: check(story.run(["save", "benchmark"], {}, ROOT))),
+}
+
+
+def measure(bench, operation, repeat):
+    setup, timed = OPERATIONS[operation]
+    runs = []
+    for _ in range(repeat):
+        bench.restore()
+        if setup is not None:
+            setup(bench)
+        start = time.perf_counter()
+        timed(bench)
+        runs.append(time.perf_counter() - start)
+    return {"cold": round(runs[0], 6), "best": round(min(runs), 6), "runs": [round(run, 6) for run in runs]}
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, shapes, operations, repeat, seed, progress=None):
+    configure()
+    results = []
+    for nodes in sizes:
+        for shape in shapes:
+            start = time.perf_counter()
+            bench = Bench(shape, nodes, seed)
+            tree = treegen.summary(bench.tree)
+            if progress:
+                progress(f"{shape} x {nodes}: generated in {time.perf_counter() - start:.1f}s")
+            for operation in operations:
+                entry = {"shape": shape, "nodes": nodes, "op": operation, "tree": tree}
+                try:
+                    entry.update(measure(bench, operation, repeat))
+                except Exception as e:
+                    entry["error"] = repr(e)
+                results.append(entry)
+                if progress:
+                    progress(f"  {operation}: {entry.get('best', entry.get('error'))}")
+    return {
+        "suite": "vfs", "commit": commit(), "date": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(), "platform": platform.platform(),
+        "seed": seed, "repeat": repeat, "config": CONFIG, "results": results,
+    }
+
+
+def compare(before_path, after_path):
+    """Pairs up the results of two runs: after/before best times per (shape, nodes, op)."""
+    with open(before_path) as f:
+        before = {(r["shape"], r["nodes"], r["op"]): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = json.load(f)["results"]
+    rows = []
+    for result in after:
+        old = before.get((result["shape"], result["nodes"], result["op"]))
+        if old is None or "best" not in old or "best" not in result:
+            continue
+        ratio = result["best"] / old["best"] if old["best"] else None
+        rows.append({"shape": result["shape"], "nodes": result["nodes"], "op": result["op"],
+                     "before": old["best"], "after": result["best"],
+                     "ratio": round(ratio, 3) if ratio is not None else None})
+    return {"suite": "vfs-compare", "before": before_path, "after": after_path, "results": rows}
+
+
+def csv_list(text):
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the VFS and the commands built on it.")
+    parser.add_argument("--sizes", type=csv_list, default=[str(size) for size in SIZES])
+    parser.add_argument("--shapes", type=csv_list, default=list(treegen.SHAPES))
+    parser.add_argument("--ops", type=csv_list, default=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON here instead of to stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(json.dumps(compare(*args.compare), indent=2))
+        return
+    unknown = [name for name in args.shapes if name not in treegen.SHAPES] + [name for name in args.ops if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown shape or operation: {', '.join(unknown)}")
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000)) # zip walks the tree recursively.
+    report = run_suite([int(size) for size in args.sizes], args.shapes, args.ops, max(1, args.repeat), args.seed,
+                       progress=lambda line: print(line, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,7 @@ const OopisOS_Kernel = {
     
     getKernelFileManifest() {
         const coreFiles = [
-            "kernel", "filesystem", "executor", "session", "groups", "users",
+            "kernel", "filesystem", "compact_nodes", "lazy_image", "binary_content", "chunked_content", "text_stream", "name_index", "content_index", "mtime_index", "quota", "fs_events", "mounts", "executor", "session", "groups", "users",
             "sudo", "audit", "ai_manager", "time_utils", "story_manager"
         ];
 
@@ -46,14 +46,14 @@ const OopisOS_Kernel = {
             "committee", "cp", "csplit", "cut", "date", "delay", "df", "diff",
             "du", "echo", "edit", "export", "expr", "fg", "find", "forge", "fsck",
             "gemini", "grep", "groupadd", "groupdel", "groups", "head", "help",
-            "history", "jobs", "kill", "less", "listusers", "ln", "log", "login",
-            "logout", "ls", "man", "mkdir", "more", "mv", "nc", "netstat", "nl",
+            "history", "index", "jobs", "kill", "less", "listusers", "ln", "locate", "log", "login",
+            "logout", "ls", "man", "mkdir", "more", "mount", "mv", "nc", "netstat", "nl",
             "ocrypt", "paint", "passwd", "patch", "planner", "play",
-            "post_message", "printf", "printscreen", "ps", "pwd", "read_messages",
+            "post_message", "printf", "printscreen", "ps", "pwd", "quota", "read_messages",
             "reboot", "remix", "removeuser", "rename", "reset", "restore",
             "ritual", "rm", "rmdir", "roll", "run", "score", "sed", "set", "shuf",
             "sort", "story", "storyboard", "su", "sudo", "sync", "tail", "theme", "top",
-            "touch", "tr", "tree", "unalias", "uniq", "unset", "unzip", "upload",
+            "touch", "tr", "tree", "umount", "unalias", "uniq", "unset", "unzip", "upload",
             "uptime", "useradd", "usermod", "visudo", "wc", "who", "whoami",
             "xargs", "xor", "zip"
         ];
@@ -125,7 +125,7 @@ const OopisOS_Kernel = {
             }
 
             this.kernel = this.pyodide.pyimport("kernel");
-            this.kernel.initialize_kernel(this.saveFileSystemToDB.bind(this));
+            this.kernel.initialize_kernel(this.saveFileSystemToDB.bind(this), this.appendJournalToDB.bind(this));
 
             const pythonCommands = this.kernel.MODULE_DISPATCHER["executor"].commands.toJs();
             Config.COMMANDS_MANIFEST.push(...pythonCommands);
@@ -138,6 +138,80 @@ const OopisOS_Kernel = {
             } catch (e) {
                 console.warn("Failed to set JS native commands during init:", e);
             }
+            try {
+                const request = { module: "filesystem", "function": "set_persistence_mode", args: [Config.FILESYSTEM.PERSISTENCE_MODE, Config.FILESYSTEM.FLUSH_INTERVAL_MS / 1000], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem persistence mode during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_content_store", args: [Config.FILESYSTEM.CONTENT_DEDUP], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to configure filesystem content store during init:", e);
+            }
+            try {
+                const { StorageHAL } = this.dependencies;
+                const journalEnabled = Config.FILESYSTEM.JOURNAL_ENABLED && StorageHAL.supportsJournal();
+                const request = { module: "filesystem", "function": "set_journal_mode", args: [journalEnabled, Config.FILESYSTEM.JOURNAL_COMPACT_RECORDS, Config.FILESYSTEM.JOURNAL_COMPACT_BYTES], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem journal mode during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_shard_mounts", args: [Config.FILESYSTEM.SHARD_MOUNTS], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem shard mounts during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_compact_nodes", args: [Config.FILESYSTEM.COMPACT_NODES], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem node representation during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_lazy_load", args: [Config.FILESYSTEM.LAZY_LOAD], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem lazy loading during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_name_index", args: [Config.FILESYSTEM.NAME_INDEX], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem name index during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_content_index", args: [Config.FILESYSTEM.CONTENT_INDEX, Config.FILESYSTEM.CONTENT_INDEX_MAX_BYTES], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem content index during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_mtime_index", args: [Config.FILESYSTEM.MTIME_INDEX], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem mtime index during init:", e);
+            }
+            try {
+                const request = { module: "filesystem", "function": "set_max_vfs_size", args: [Config.FILESYSTEM.MAX_VFS_SIZE], kwargs: {} };
+                await this.kernel.syscall_handler(JSON.stringify(request));
+            } catch (e) {
+                console.warn("Failed to set filesystem size limit during init:", e);
+            }
+            for (const mount of Config.FILESYSTEM.HOST_MOUNTS) {
+                try {
+                    const request = {
+                        module: "filesystem", "function": "mount_host", args: [mount.path, mount.host],
+                        kwargs: { owner: mount.owner || "root", group: mount.group || mount.owner || "root", read_only: !!mount.readOnly, mkdir: true }
+                    };
+                    const result = JSON.parse(await this.kernel.syscall_handler(JSON.stringify(request)));
+                    if (!result.success) console.warn(`Failed to mount '${mount.host}' on '${mount.path}':`, result.error);
+                } catch (e) {
+                    console.warn(`Failed to mount '${mount.host}' on '${mount.path}' during init:`, e);
+                }
+            }
 
             this.isReady = true;
             await OutputManager.appendToOutput("OopisOS Python Kernel is online.", { typeClass: Config.CSS_CLASSES.SUCCESS_MSG });
@@ -171,5 +245,14 @@ const OopisOS_Kernel = {
         } catch (e) {
             console.error("JS Bridge: Failed to save filesystem state via kernel callback.", e);
         }
+    },
+
+    async appendJournalToDB(journalText) {
+        const { StorageHAL } = OopisOS_Kernel.dependencies;
+        try {
+            await StorageHAL.appendJournal(journalText);
+        } catch (e) {
+            console.error("JS Bridge: Failed to append filesystem journal via kernel callback.", e);
+        }
     }
 };
\ No newline at end of file
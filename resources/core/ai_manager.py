@@ -110,10 +110,8 @@ ls, cat, grep, find, tree, pwd, head, tail, wc, man, help, echo, bc, expr, whoam
         return final_provider, final_model, warning_message
 
     async def _get_terminal_context(self):
-        pwd_result_json = await self.command_executor.execute("pwd", json.dumps({"user_context": self.command_executor.user_context}))
-        ls_result_json = await self.command_executor.execute("ls -la", json.dumps({"user_context": self.command_executor.user_context}))
-        pwd_result = json.loads(pwd_result_json)
-        ls_result = json.loads(ls_result_json)
+        pwd_result = await self.command_executor.execute_result("pwd", json.dumps({"user_context": self.command_executor.user_context}))
+        ls_result = await self.command_executor.execute_result("ls -la", json.dumps({"user_context": self.command_executor.user_context}))
 
 
         pwd_output = pwd_result.get("output", "(unknown)")
@@ -176,8 +174,7 @@ ls, cat, grep, find, tree, pwd, head, tail, wc, man, help, echo, bc, expr, whoam
             )
 
             js_context = {"user_context": self.command_executor.user_context, "current_path": self.command_executor.fs_manager.current_path}
-            exec_result_json = await self.command_executor.execute(command_str, json.dumps(js_context))
-            exec_result = json.loads(exec_result_json)
+            exec_result = await self.command_executor.execute_result(command_str, json.dumps(js_context))
 
             output = exec_result.get("output", "") if exec_result.get("success") else f"Error: {exec_result.get('error')}"
             executed_commands_output += f"--- Output of '{command_str}' ---\\n{output}\\n\\n"
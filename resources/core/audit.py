@@ -39,20 +39,17 @@ class AuditManager:
         """
         The primary method for logging an event. It directly appends to the log file.
         """
-        if not self._ensure_log_file_exists(user_context):
-            return {"success": False, "error": "Failed to ensure log file exists."}
+        timestamp = datetime.utcnow().isoformat() + "Z"
+        log_entry = f"{timestamp} | USER: {actor} | ACTION: {action} | DETAILS: {details}\\n"
 
         try:
-            timestamp = datetime.utcnow().isoformat() + "Z"
-            log_entry = f"{timestamp} | USER: {actor} | ACTION: {action} | DETAILS: {details}\\n"
-
-            # Append to the log file
-            log_node = fs_manager.get_node(LOG_PATH)
-            current_content = log_node.get('content', '')
-            new_content = current_content + log_entry
-
-            # Write back as root to maintain ownership
-            fs_manager.write_file(LOG_PATH, new_content, {"name": "root", "group": "root"})
+            # Append as root to maintain ownership; only a missing log costs more than the entry itself.
+            try:
+                fs_manager.append_file(LOG_PATH, log_entry, {"name": "root", "group": "root"}, create=False)
+            except FileNotFoundError:
+                if not self._ensure_log_file_exists(user_context):
+                    return {"success": False, "error": "Failed to ensure log file exists."}
+                fs_manager.append_file(LOG_PATH, log_entry, {"name": "root", "group": "root"})
             return {"success": True}
         except Exception as e:
             return {"success": False, "error": f"Failed to write to audit log: {repr(e)}"}
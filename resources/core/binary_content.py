@@ -0,0 +1,76 @@
+# gem/core/binary_content.py
+
+import base64
+import binascii
+from lazy_image import LazyContent
+
+BINARY_ENCODING = 'binary' # a file node's 'encoding' when its content is raw bytes
+BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+def is_binary(node):
+    return node.get('encoding') == BINARY_ENCODING
+
+
+def bytes_to_content(data):
+    """
+    The in-memory form of a binary file's bytes: a str holding one character
+    per byte (latin-1). Python keeps such a string at one byte per character,
+    so it costs what the bytes do, and everything that reads file contents
+    as text keeps working on it.
+    """
+    return str(data, 'latin-1')
+
+
+def content_bytes(node, text_encoding='utf-8'):
+    """A file node's content as bytes: a binary file's own bytes, or its text encoded."""
+    content = node.get('content', '')
+    if isinstance(content, LazyContent):
+        content = content.value()
+    if is_binary(node):
+        return content.encode('latin-1')
+    return content.encode(text_encoding, 'surrogateescape')
+
+
+def as_content(data):
+    """What to write for data that may or may not be text: a str if it is UTF-8, else the bytes themselves."""
+    try:
+        return str(data, 'utf-8')
+    except UnicodeDecodeError:
+        return data
+
+
+def saved_content(content):
+    """A binary file's content as saved in an image or journal: base64 text."""
+    if isinstance(content, LazyBinary):
+        return content.saved()
+    if isinstance(content, LazyContent):
+        content = content.value()
+    return base64.b64encode(content.encode('latin-1')).decode('ascii')
+
+
+def load_content(saved):
+    """The inverse of saved_content, keeping a lazily loaded content undecoded until it is used."""
+    if isinstance(saved, LazyContent):
+        return LazyBinary(saved._source, saved._start, saved._end)
+    try:
+        return bytes_to_content(base64.b64decode(saved))
+    except (binascii.Error, TypeError):
+        return str(saved) # Not base64 after all; keep what was there rather than lose it.
+
+
+class LazyBinary(LazyContent):
+    """A binary file's base64 content still in the image text it was loaded from; see LazyContent."""
+    __slots__ = ()
+
+    def saved(self):
+        return self._source[self._start:self._end] # base64 needs no JSON escapes, so the raw span is the text.
+
+    def value(self):
+        return bytes_to_content(base64.b64decode(self.saved()))
+
+    def __len__(self):
+        if self._length is None:
+            padding = self._source.count('=', max(self._start, self._end - 2), self._end)
+            self._length = (self._end - self._start) // 4 * 3 - padding
+        return self._length
@@ -0,0 +1,44 @@
+# gem/core/chunked_content.py
+
+from lazy_image import LazyContent
+
+
+class ChunkedContent(LazyContent):
+    """
+    The content of a file that is being appended to: the pieces in the order
+    they were written, joined only when something reads the whole. Appending
+    is O(size of the piece) however big the file already is. Like LazyContent
+    it stands in for a str, and the filesystem swaps it for the joined string
+    the first time the node is fetched. Unlike LazyContent it is mutable, so
+    it is never shared between nodes and copies get their own piece list.
+    """
+    __slots__ = ('_chunks',)
+
+    def __init__(self, chunks=()):
+        self._chunks = [chunk.value() if isinstance(chunk, LazyContent) else chunk for chunk in chunks if chunk]
+        self._length = sum(map(len, self._chunks))
+
+    def append(self, text):
+        if text:
+            self._chunks.append(text)
+            self._length += len(text)
+
+    def value(self):
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __copy__(self):
+        return ChunkedContent(self._chunks)
+
+    def __deepcopy__(self, memo):
+        return ChunkedContent(self._chunks)
+
+    def __repr__(self):
+        return f"ChunkedContent({len(self._chunks)} chunks, {self._length} characters)"
@@ -18,12 +18,13 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
         return {"success": False, "error": "_upload_handler: files data not provided. This command is for internal use."}
 
     output_messages = []
-    for file_info in files_to_upload:
-        try:
-            fs_manager.write_file(file_info['path'], file_info['content'], user_context)
-            output_messages.append(f"Uploaded '{file_info['name']}' to {file_info['path']}")
-        except Exception as e:
-            return {"success": False, "error": f"Error uploading '{file_info['name']}': {repr(e)}"}
+    with fs_manager.batch(rollback=False):
+        for file_info in files_to_upload:
+            try:
+                fs_manager.write_file(file_info['path'], file_info['content'], user_context)
+                output_messages.append(f"Uploaded '{file_info['name']}' to {file_info['path']}")
+            except Exception as e:
+                return {"success": False, "error": f"Error uploading '{file_info['name']}': {repr(e)}"}
 
     # Return a standard success object with the output messages.
     return {
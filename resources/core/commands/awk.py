@@ -3,6 +3,7 @@
 import re
 import shlex
 from filesystem import fs_manager
+from text_stream import StreamError, blocks_of, join_lines, lines_in, text_of
 
 def define_flags():
     """Declares the flags that the awk command accepts."""
@@ -14,6 +15,13 @@ def define_flags():
     }
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: BEGIN's output, then each line's as it is
+    read, then END's.
+    """
     if not args:
         return {
             "success": False,
@@ -35,11 +43,8 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
         program = program_arg
 
     delimiter = flags.get('field-separator')
-    lines = []
 
-    if stdin_data is not None:
-        lines = str(stdin_data or "").splitlines()
-    elif file_path:
+    if lines is None and file_path:
         node = fs_manager.get_node(file_path)
         if not node:
             return {
@@ -57,9 +62,8 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                     "suggestion": "Awk operates on files, not directories."
                 }
             }
-        lines = node.get('content', '').splitlines()
+        lines = blocks_of(node.get('content', ''))
 
-    output_lines = []
     begin_match = re.search(r'BEGIN\s*{(.*?)}', program, re.DOTALL)
     end_match = re.search(r'END\s*{(.*?)}', program, re.DOTALL)
     main_program = program
@@ -68,8 +72,9 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
     main_program = main_program.strip()
 
     def execute_action_block(action_block, line_num=0, line=""):
+        """The line an action prints, or None if it prints nothing."""
         print_match = re.search(r'print(?:\s+(.*))?', action_block)
-        if not print_match: return
+        if not print_match: return None
 
         to_print_str = print_match.group(1) if print_match.group(1) else '$0'
 
@@ -99,12 +104,10 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 output_line_parts.append(special_vars[part])
             else:
                 output_line_parts.append(part)
-        output_lines.append(" ".join(output_line_parts))
-
+        return " ".join(output_line_parts)
 
-    if begin_match:
-        execute_action_block(begin_match.group(1).strip())
 
+    action_part = None
     if main_program:
         action_match_simple = re.match(r'^\s*{(.*)}\s*$', main_program, re.DOTALL)
         if action_match_simple:
@@ -129,26 +132,32 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                         }
                     }
 
-        for line_num, line in enumerate(lines, 1):
-            if pattern_part:
-                try:
-                    if not re.search(pattern_part, line):
-                        continue
-                except re.error as e:
-                    return {
-                        "success": False,
-                        "error": {
-                            "message": f"awk: invalid regex in pattern: {e}",
-                            "suggestion": "Check the regular expression for syntax errors."
-                        }
-                    }
-
-            execute_action_block(action_part, line_num, line)
-
-    if end_match:
-        execute_action_block(end_match.group(1).strip())
-
-    return "\n".join(output_lines)
+    def output_lines():
+        if begin_match:
+            yield execute_action_block(begin_match.group(1).strip())
+
+        if action_part is not None:
+            # A bad pattern only shows once there is a line to match it against.
+            for line_num, line in enumerate(lines_in(lines or ()), 1):
+                if pattern_part:
+                    try:
+                        if not re.search(pattern_part, line):
+                            continue
+                    except re.error as e:
+                        raise StreamError({
+                            "success": False,
+                            "error": {
+                                "message": f"awk: invalid regex in pattern: {e}",
+                                "suggestion": "Check the regular expression for syntax errors."
+                            }
+                        })
+
+                yield execute_action_block(action_part, line_num, line)
+
+        if end_match:
+            yield execute_action_block(end_match.group(1).strip())
+
+    return join_lines(line for line in output_lines() if line is not None)
 
 def man(args, flags, user_context, **kwargs):
     return """
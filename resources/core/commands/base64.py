@@ -4,21 +4,23 @@ import base64
 import re
 import binascii
 from filesystem import fs_manager
+from binary_content import as_content, content_bytes
 
 def define_flags():
     """Declares the flags that the base64 command accepts."""
     return {
         'flags': [
             {'name': 'decode', 'short': 'd', 'long': 'decode', 'takes_value': False},
+            {'name': 'output', 'short': 'o', 'long': 'output', 'takes_value': True},
         ],
         'metadata': {}
     }
 
 def run(args, flags, user_context, stdin_data=None):
-    input_data = ""
+    input_data = b""
 
     if stdin_data is not None:
-        input_data = stdin_data
+        input_data = str(stdin_data or "").encode('utf-8')
     elif args:
         path = args[0]
         node = fs_manager.get_node(path)
@@ -38,25 +40,32 @@ def run(args, flags, user_context, stdin_data=None):
                     "suggestion": "Base64 can only operate on files."
                 }
             }
-        input_data = node.get('content', '')
+        input_data = content_bytes(node)
     else:
         return ""
 
     is_decode = flags.get('decode', False)
 
     try:
-        string_input = str(input_data or "")
-
         if is_decode:
-            cleaned_input = re.sub(r'\s+', '', string_input)
-            input_bytes = cleaned_input.encode('utf-8')
-            decoded_bytes = base64.b64decode(input_bytes)
+            cleaned_input = re.sub(rb'\s+', b'', input_data)
+            decoded_bytes = base64.b64decode(cleaned_input)
+            if flags.get('output'):
+                fs_manager.write_file(flags['output'], as_content(decoded_bytes), user_context)
+                return ""
             return decoded_bytes.decode('utf-8')
         else:
-            input_bytes = string_input.encode('utf-8')
-            encoded_bytes = base64.b64encode(input_bytes)
+            encoded_bytes = base64.b64encode(input_data)
             return encoded_bytes.decode('utf-8')
-    except (binascii.Error, UnicodeDecodeError) as e:
+    except UnicodeDecodeError:
+        return {
+            "success": False,
+            "error": {
+                "message": "base64: decoded data is not text",
+                "suggestion": "Use -o FILE to write it to a binary file instead."
+            }
+        }
+    except binascii.Error as e:
         return {
             "success": False,
             "error": {
@@ -88,12 +97,18 @@ OPTIONS
     -d, --decode
           decode data
 
+    -o, --output=FILE
+          with -d, write the decoded bytes to FILE instead of printing them;
+          data that is not UTF-8 text makes FILE a binary file
+
 EXAMPLES
     echo "hello world" | base64
         Encodes the string "hello world" to "aGVsbG8gd29ybGQ=".
     echo "aGVsbG8gd29ybGQ=" | base64 -d
         Decodes the base64 string back to "hello world".
+    base64 -d -o logo.png logo.b64
+        Decodes logo.b64 into the binary file logo.png.
 """
 
 def help(args, flags, user_context, **kwargs):
-    return "Usage: base64 [-d] [FILE]"
\ No newline at end of file
+    return "Usage: base64 [-d] [-o FILE] [FILE]"
\ No newline at end of file
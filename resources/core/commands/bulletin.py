@@ -74,9 +74,7 @@ def run(args, flags, user_context, **kwargs):
 {message}
 """
         try:
-            current_content = fs_manager.get_node(BULLETIN_PATH).get('content', '')
-            new_content = current_content + new_entry
-            fs_manager.write_file(BULLETIN_PATH, new_content, user_context)
+            fs_manager.append_file(BULLETIN_PATH, new_entry, user_context)
             return "Message posted to bulletin."
         except Exception as e:
             return {"success": False, "error": {"message": f"bulletin: could not post message: {repr(e)}", "suggestion": "Check file permissions for /var/log/bulletin.md."}}
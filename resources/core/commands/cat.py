@@ -1,6 +1,7 @@
 # gem/core/commands/cat.py
 from filesystem import fs_manager
-import json
+from text_stream import blocks_of, join_lines, lines_in, text_of, whole_lines
+from itertools import chain
 
 def define_flags():
     """Declares the flags that the cat command accepts."""
@@ -15,19 +16,25 @@ def run(args, flags, user_context, stdin_data=None):
     """
     Concatenates files and prints them to the standard output, with permission checks.
     """
-    output_content = []
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: the files and standard input go out a block
+    at a time rather than being joined up front.
+    """
     error_messages = []
+    sources = []
 
     # If no args and there is stdin, treat it as if '-' was passed.
-    files_to_process = args if args else ['-'] if stdin_data is not None else []
+    files_to_process = args if args else ['-'] if lines is not None else []
 
     if not files_to_process:
         return "" # True cat behavior: no input, no output
 
     for file_path in files_to_process:
-        content_to_add = None
         if file_path == '-':
-            content_to_add = str(stdin_data or "")
+            sources.append(lines if lines is not None else iter(()))
         else:
             node = fs_manager.get_node(file_path)
             if not node:
@@ -40,19 +47,16 @@ def run(args, flags, user_context, stdin_data=None):
                 error_messages.append(f"cat: {file_path}: Is a directory")
                 continue
 
-            content_to_add = node.get('content', '')
-
-        if content_to_add is not None:
-            output_content.append(content_to_add)
+            sources.append(blocks_of(node.get('content', '')))
 
-    final_output = "".join(output_content)
+    output = sources[0] if len(sources) == 1 else whole_lines(chain.from_iterable(sources))
 
     # Standard cat behavior is to print successful content to stdout and errors to stderr.
     # We can simulate this by returning a structured error that also contains the partial output.
     if error_messages:
         return {
             "success": False,
-            "output": final_output, # Still return partial output
+            "output": "".join(output), # Still return partial output
             "error": {
                 "message": "\n".join(error_messages),
                 "suggestion": "Verify the file paths and ensure you have read permissions."
@@ -61,12 +65,10 @@ def run(args, flags, user_context, stdin_data=None):
 
     if flags.get('number'):
         # Only split into lines when numbering is needed
-        lines = final_output.splitlines()
-        numbered_lines = [f"     {i+1}  {line}" for i, line in enumerate(lines)]
-        return "\n".join(numbered_lines)
+        return join_lines(f"     {i+1}  {line}" for i, line in enumerate(lines_in(output)))
     else:
-        # Return the raw, unaltered content
-        return final_output
+        # Pass the raw, unaltered content along
+        return output
 
 
 def man(args, flags, user_context, **kwargs):
@@ -37,8 +37,7 @@ async def run(args, flags, user_context, **kwargs):
         **serializable_kwargs
     })
 
-    test_result_json = await command_executor.execute(command_to_test, js_context_json)
-    test_result = json.loads(test_result_json)
+    test_result = await command_executor.execute_result(command_to_test, js_context_json)
 
     if check_empty_output:
         output_is_empty = not test_result.get("output") or not test_result.get("output").strip()
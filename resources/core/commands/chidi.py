@@ -1,6 +1,7 @@
 # gem/core/commands/chidi.py
 
 import os
+import re
 from filesystem import fs_manager
 from story_manager import story_manager
 
@@ -12,11 +13,13 @@ def define_flags():
         {'name': 'new', 'short': 'n', 'long': 'new', 'takes_value': False},
         {'name': 'provider', 'short': 'p', 'long': 'provider', 'takes_value': True},
         {'name': 'model', 'short': 'm', 'long': 'model', 'takes_value': True},
+        {'name': 'match', 'long': 'match', 'takes_value': True},
     ]
 
-def _get_files_for_analysis(start_path, user_context):
+def _get_files_for_analysis(start_path, user_context, match=None):
     """
-    Recursively finds all supported files for analysis from a starting path.
+    Finds all supported files for analysis at or under a starting path. With
+    match, files the content index knows can't contain it are skipped.
     """
     # Check if the start_path is a .story directory
     if os.path.basename(start_path) == '.story':
@@ -32,38 +35,21 @@ def _get_files_for_analysis(start_path, user_context):
             return [] # Return empty if summary fails
 
     files = []
-    visited = set()
-    start_node = fs_manager.get_node(start_path)
-
-    def recurse(current_path, node):
-        if current_path in visited:
-            return
-        visited.add(current_path)
-
-        if not fs_manager.has_permission(current_path, user_context, "read"):
-            return
-
-        if node.get('type') == 'file':
-            _, ext = os.path.splitext(current_path)
-            if ext.lower() in SUPPORTED_EXTENSIONS:
-                files.append({
-                    "name": os.path.basename(current_path),
-                    "path": current_path,
-                    "content": node.get('content', '')
-                })
-        elif node.get('type') == 'directory':
-            # Skip .story directories during normal traversal
-            if os.path.basename(current_path) == '.story':
-                return
-            if not fs_manager.has_permission(current_path, user_context, "execute"):
-                return
-            for child_name in sorted(node.get('children', {}).keys()):
-                child_path = fs_manager.get_absolute_path(os.path.join(current_path, child_name))
-                child_node = node['children'][child_name]
-                recurse(child_path, child_node)
-
-    if start_node:
-        recurse(start_path, start_node)
+    may_match = fs_manager.content_filter(re.escape(match)) if match else None
+    # Skip .story directories during normal traversal
+    skip_story = lambda path, name, node, depth: name == '.story'
+    for current_path, _, node, _ in fs_manager.walk(start_path, check_perms=user_context, prune=skip_story):
+        if node.get('type') != 'file' or not fs_manager.has_permission(current_path, user_context, "read", node=node):
+            continue
+        if may_match is not None and not may_match(current_path):
+            continue
+        _, ext = os.path.splitext(current_path)
+        if ext.lower() in SUPPORTED_EXTENSIONS:
+            files.append({
+                "name": os.path.basename(current_path),
+                "path": current_path,
+                "content": node.get('content', '')
+            })
     return files
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
@@ -102,7 +88,11 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 }
             }
 
-        files = _get_files_for_analysis(start_path, user_context)
+        files = _get_files_for_analysis(start_path, user_context, match=flags.get('match'))
+
+    if flags.get('match'):
+        matcher = re.compile(re.escape(flags['match']), re.IGNORECASE)
+        files = [f for f in files if matcher.search(str(f['content']))]
 
     if not files:
         return "No supported files (.md, .txt, .html, .js, .sh, .css, .json) found to open."
@@ -129,7 +119,7 @@ NAME
 chidi - Opens the Chidi AI-powered document and code analyst.
 
 SYNOPSIS
-chidi [-n] [-p provider] [-m model] [path]
+chidi [-n] [-p provider] [-m model] [--match text] [path]
 <command> | chidi
 
 DESCRIPTION
@@ -139,7 +129,9 @@ It can summarize documents, suggest insightful questions, and answer
 your questions based on the content of the files you provide.
 When pointed at a .story directory, Chidi will provide a narrative summary
 of the project's history.
+With --match, only files containing the given text (ignoring case) are
+opened; the full-text index narrows the search when it is enabled.
 """
 
 def help(args, flags, user_context, **kwargs):
-    return "Usage: chidi [-n] [-p provider] [-m model] [path]"
\ No newline at end of file
+    return "Usage: chidi [-n] [-p provider] [-m model] [--match text] [path]"
\ No newline at end of file
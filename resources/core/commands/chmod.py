@@ -1,9 +1,7 @@
 # gem/core/commands/chmod.py
 
 from filesystem import fs_manager
-import os
 import re
-from datetime import datetime
 
 
 def define_flags():
@@ -14,41 +12,19 @@ def define_flags():
         ],
         'metadata': {}
     }
-def _chmod_recursive(path, mode_octal, user_context):
+def _chmod_recursive(path, mode_str, user_context):
     """Recursively applies a mode to a directory and its contents."""
-    node = fs_manager.get_node(path)
-    if not node:
-        return
-
-    # Security Check: Only the owner or root can change permissions.
-    if user_context.get('name') != 'root' and node.get('owner') != user_context.get('name'):
+    def not_permitted(abs_path, name, node, depth):
+        # Security Check: Only the owner or root can change permissions.
         # Silently skip if no permission, as chmod often does in recursive runs.
-        return
-
-    now_iso = datetime.utcnow().isoformat() + "Z"
-    node['mode'] = mode_octal
-    node['mtime'] = now_iso
-
-    if node.get('type') == 'directory':
-        for child_name in node.get('children', {}).keys():
-            child_path = os.path.join(path, child_name)
-            child_node = node['children'][child_name]
-            # Pass the child node to the recursive call
-            _chmod_recursive_helper(child_path, child_node, mode_octal, user_context)
-
-def _chmod_recursive_helper(path, node, mode_octal, user_context):
-    """Helper to avoid re-fetching nodes in recursion."""
-    if user_context.get('name') != 'root' and node.get('owner') != user_context.get('name'):
-        return
-
-    now_iso = datetime.utcnow().isoformat() + "Z"
-    node['mode'] = mode_octal
-    node['mtime'] = now_iso
+        return user_context.get('name') != 'root' and node.get('owner') != user_context.get('name')
 
-    if node.get('type') == 'directory':
-        for child_name, child_node in node.get('children', {}).items():
-            child_path = os.path.join(path, child_name)
-            _chmod_recursive_helper(child_path, child_node, mode_octal, user_context)
+    # Each node goes through fs_manager.chmod so it is journaled and indexed; the batch saves once.
+    with fs_manager.batch(rollback=False):
+        for abs_path, name, node, depth in fs_manager.walk(path, prune=not_permitted):
+            if node.get('type') == 'symlink' or not_permitted(abs_path, name, node, depth):
+                continue # Links have no mode of their own to change.
+            fs_manager.chmod(abs_path, mode_str)
 
 
 def run(args, flags, user_context, **kwargs):
@@ -73,7 +49,6 @@ def run(args, flags, user_context, **kwargs):
                 "suggestion": "Mode should be an octal number like '755' or '644'."
             }
         }
-    mode_octal = int(mode_str, 8)
 
     for path in paths:
         try:
@@ -98,7 +73,7 @@ def run(args, flags, user_context, **kwargs):
                 }
 
             if is_recursive and node.get('type') == 'directory':
-                _chmod_recursive(path, mode_octal, user_context)
+                _chmod_recursive(path, mode_str, user_context)
             else:
                 fs_manager.chmod(path, mode_str)
 
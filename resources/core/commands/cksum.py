@@ -2,23 +2,26 @@
 
 import zlib
 from filesystem import fs_manager
+from binary_content import content_bytes
+
+# Checksums of stored files, keyed by content hash so identical blobs are summed once.
+_checksum_cache = {}
+_CHECKSUM_CACHE_LIMIT = 256
 
 def run(args, flags, user_context, stdin_data=None):
     output_lines = []
     error_messages = []
 
-    def process_content(content, name=""):
-        string_content = str(content or "")
-        content_bytes = string_content.encode('utf-8')
-        checksum = zlib.crc32(content_bytes)
-        byte_count = len(content_bytes)
+    def process_content(data, name=""):
+        checksum = zlib.crc32(data)
+        byte_count = len(data)
         line = f"{checksum} {byte_count}"
         if name:
             line += f" {name}"
         return line
 
     if stdin_data is not None:
-        output_lines.append(process_content(stdin_data))
+        output_lines.append(process_content(str(stdin_data or "").encode('utf-8')))
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -29,11 +32,18 @@ def run(args, flags, user_context, stdin_data=None):
                 error_messages.append(f"cksum: {path}: Is a directory")
                 continue
 
-            content = node.get('content', '')
-            output_lines.append(process_content(content, path))
+            content_hash = node.get('content_hash')
+            if content_hash is None:
+                output_lines.append(process_content(content_bytes(node), path))
+                continue
+            if content_hash not in _checksum_cache:
+                if len(_checksum_cache) >= _CHECKSUM_CACHE_LIMIT:
+                    _checksum_cache.clear()
+                _checksum_cache[content_hash] = process_content(content_bytes(node))
+            output_lines.append(f"{_checksum_cache[content_hash]} {path}")
     else:
         # Handles 'cksum' with no args and no stdin.
-        output_lines.append(process_content(""))
+        output_lines.append(process_content(b""))
 
     # If any errors occurred, we return a structured error object.
     if error_messages:
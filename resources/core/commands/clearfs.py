@@ -1,7 +1,6 @@
 # gem/core/commands/clearfs.py
 import os
 from filesystem import fs_manager
-from datetime import datetime
 
 def define_flags():
     """Declares the flags that the clearfs command accepts."""
@@ -59,9 +58,9 @@ def _perform_clear(user_context):
     home_node = fs_manager.get_node(home_path)
 
     if home_node and home_node.get('type') == 'directory':
-        home_node['children'] = {}
-        home_node['mtime'] = datetime.utcnow().isoformat() + "Z"
-        fs_manager._save_state()
+        with fs_manager.batch(rollback=False):
+            for child_name in list(home_node.get('children', {})):
+                fs_manager.remove(os.path.join(home_path, child_name), recursive=True)
         return "Home directory cleared."
     return {"success": False, "error": {"message": "clearfs: something went wrong after confirmation", "suggestion": "Please try the command again."}}
 
@@ -55,36 +55,36 @@ def run(args, flags, user_context, **kwargs):
         for member in members:
             group_manager.add_user_to_group(member, committee_name)
 
-        # Create project directory and set permissions
-        fs_manager.create_directory(project_path, {"name": "root", "group": "root"})
-        fs_manager.chown(project_path, "root")
-        fs_manager.chgrp(project_path, committee_name)
-        fs_manager.chmod(project_path, "770") # rwxrwx---
-
-        # Create and pre-populate the planner file
-        initial_plan = {
-            "projectName": committee_name,
-            "tasks": [
-                {
-                    "id": 1,
-                    "description": "Define project goals and first steps.",
-                    "status": "open",
-                    "assignee": "none"
-                }
-            ]
-        }
-        planner_content = json.dumps(initial_plan, indent=2)
-        fs_manager.write_file(planner_path, planner_content, user_context)
-        # Ensure the new planner file also has the correct group permissions
-        fs_manager.chgrp(planner_path, committee_name)
-        fs_manager.chmod(planner_path, "660") # rw-rw----
+        # Filesystem changes are rolled back by the batch if anything fails
+        with fs_manager.batch():
+            # Create project directory and set permissions
+            fs_manager.create_directory(project_path, {"name": "root", "group": "root"})
+            fs_manager.chown(project_path, "root")
+            fs_manager.chgrp(project_path, committee_name)
+            fs_manager.chmod(project_path, "770") # rwxrwx---
+
+            # Create and pre-populate the planner file
+            initial_plan = {
+                "projectName": committee_name,
+                "tasks": [
+                    {
+                        "id": 1,
+                        "description": "Define project goals and first steps.",
+                        "status": "open",
+                        "assignee": "none"
+                    }
+                ]
+            }
+            planner_content = json.dumps(initial_plan, indent=2)
+            fs_manager.write_file(planner_path, planner_content, user_context)
+            # Ensure the new planner file also has the correct group permissions
+            fs_manager.chgrp(planner_path, committee_name)
+            fs_manager.chmod(planner_path, "660") # rw-rw----
 
 
     except Exception as e:
         # Rollback on failure
         group_manager.delete_group(committee_name)
-        if fs_manager.get_node(project_path):
-            fs_manager.remove(project_path, recursive=True)
         return {"success": False, "error": {"message": f"committee: an unexpected error occurred: {repr(e)}", "suggestion": "The operation was rolled back. Please check system permissions and try again."}}
 
     output = [
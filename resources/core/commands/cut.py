@@ -1,6 +1,8 @@
 # gem/core/commands/cut.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, text_of
+from itertools import chain
 
 def define_flags():
     """Declares the flags that the cut command accepts."""
@@ -33,6 +35,10 @@ def _parse_range(list_str):
     return sorted(list(indices))
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """The streaming form of run: cuts each line as it is read."""
     field_list_str = flags.get('fields')
     char_list_str = flags.get('characters')
 
@@ -53,9 +59,9 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
             }
         }
 
-    lines = []
-    if stdin_data is not None:
-        lines.extend(str(stdin_data or "").splitlines())
+    sources = []
+    if lines is not None:
+        sources.append(lines)
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -75,9 +81,9 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                         "suggestion": "The cut command can only process files."
                     }
                 }
-            lines.extend(node.get('content', '').splitlines())
+            sources.append(blocks_of(node.get('content', '')))
 
-    output_lines = []
+    input_lines = chain.from_iterable(lines_in(source) for source in sources)
 
     if field_list_str:
         field_list = _parse_range(field_list_str)
@@ -91,10 +97,10 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
             }
         delimiter = flags.get('delimiter', '\t')
 
-        for line in lines:
+        def cut_line(line):
             fields = line.split(delimiter)
             selected_fields = [fields[i] for i in field_list if i < len(fields)]
-            output_lines.append(delimiter.join(selected_fields))
+            return delimiter.join(selected_fields)
 
     elif char_list_str:
         char_list = _parse_range(char_list_str)
@@ -107,11 +113,10 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 }
             }
 
-        for line in lines:
-            new_line = "".join([line[i] for i in char_list if i < len(line)])
-            output_lines.append(new_line)
+        def cut_line(line):
+            return "".join([line[i] for i in char_list if i < len(line)])
 
-    return "\n".join(output_lines)
+    return join_lines(map(cut_line, input_lines))
 
 
 def man(args, flags, user_context, **kwargs):
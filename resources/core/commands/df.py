@@ -42,7 +42,7 @@ def run(args, flags, user_context, config=None, **kwargs):
             }
         }
     total_size = config.get('MAX_VFS_SIZE', 0)
-    used_size = fs_manager.calculate_node_size('/')
+    used_size = fs_manager.get_usage()['total_size']
     available_size = total_size - used_size
     use_percentage = int((used_size / total_size) * 100) if total_size > 0 else 0
 
@@ -24,6 +24,7 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
 
     file1_path, file2_path = args[0], args[1]
     content1, content2 = None, None
+    node1, node2 = None, None
 
     if file1_path == '-':
         if stdin_data is None:
@@ -71,6 +72,9 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
             }
         content2 = node2.get('content', '').splitlines()
 
+    # Files backed by the same blob can't differ, so skip the line diff entirely.
+    if node1 is not None and node2 is not None and fs_manager.contents_equal(node1, node2):
+        return ""
 
     is_unified = flags.get('unified', False)
 
@@ -50,14 +50,11 @@ def run(args, flags, user_context, **kwargs):
             output_lines.append(f"{size_str}\t{path}")
         else:
             sizes = []
-            def recurse_du(current_path, current_node):
-                if current_node.get('type') == 'directory':
-                    for child_name in current_node.get('children', {}):
-                        child_path = os.path.join(current_path, child_name)
-                        recurse_du(child_path, current_node['children'][child_name])
-                size = fs_manager.calculate_node_size(current_path)
-                sizes.append((size, current_path))
-            recurse_du(path, node)
+            start_path = fs_manager.get_absolute_path(path)
+            for abs_path, _, current_node, depth in fs_manager.walk(start_path):
+                # Report paths the way they were given, e.g. ./notes rather than /home/guest/notes.
+                current_path = path if depth == 0 else os.path.join(path, abs_path[len(start_path):].lstrip('/'))
+                sizes.append((fs_manager.get_node_size(current_node), current_path))
             for size, p in sorted(sizes, key=lambda x: x[1]):
                 size_str = _format_bytes(size) if is_human_readable else str(size_in_kb(size))
                 output_lines.append(f"{size_str}\t{p}")
@@ -2,14 +2,41 @@
 import os
 import fnmatch
 import re
-from filesystem import fs_manager
+import time
+from filesystem import fs_manager, walk_order, mtime_key
+
+TIME_UNITS = {'-mmin': 60, '-mtime': 86400} # seconds per unit of each test's argument
+
+def _age_test(token, value, now):
+    """
+    The predicate for -mmin/-mtime N and the earliest mtime (a mtime_key) a
+    match can have, or None for +N. As in GNU find, the age is counted in whole
+    units, rounded down: +N means more than N, -N less than N, N exactly N.
+    """
+    if not re.match(r'^[+-]?\d+$', value): raise ValueError(f"invalid argument `{value}` to `{token}`")
+    unit = TIME_UNITS[token] * 1000000
+    amount = int(value.lstrip('+-'))
+
+    def age(n):
+        return (now - mtime_key(n.get('mtime'))) // unit
+
+    if value.startswith('+'):
+        return (lambda p, n: age(n) > amount), None
+    if value.startswith('-'):
+        return (lambda p, n: age(n) < amount), now - amount * unit
+    return (lambda p, n: age(n) == amount), now - (amount + 1) * unit
 
 def _parse_expression(args):
     """
-    Parses the find expression arguments into a structured list of predicates and actions.
+    Parses the find expression arguments into a structured list of predicates and actions,
+    along with the -name patterns of each predicate group and the earliest mtimes its
+    time tests allow.
     """
     predicate_groups = [[]]
+    name_groups = [[]]
+    since_groups = [[]]
     actions = []
+    now = int(time.time() * 1000000)
     i = 0
 
     while i < len(args):
@@ -19,6 +46,7 @@ def _parse_expression(args):
             if i + 1 >= len(args): raise ValueError(f"missing argument to `-name`")
             pattern = args[i+1]
             predicate_groups[-1].append(lambda p, n: fnmatch.fnmatch(os.path.basename(p), pattern))
+            name_groups[-1].append(pattern)
             i += 2
         elif token == '-type':
             if i + 1 >= len(args): raise ValueError(f"missing argument to `-type`")
@@ -34,8 +62,25 @@ def _parse_expression(args):
             mode_octal = int(mode_str, 8)
             predicate_groups[-1].append(lambda p, n: (n.get('mode', 0) & 0o777) == mode_octal)
             i += 2
+        elif token == '-newer':
+            if i + 1 >= len(args): raise ValueError(f"missing argument to `-newer`")
+            reference = fs_manager.get_node(args[i+1])
+            if not reference: raise ValueError(f"cannot stat '{args[i+1]}': No such file or directory")
+            reference_time = mtime_key(reference.get('mtime'))
+            predicate_groups[-1].append(lambda p, n: mtime_key(n.get('mtime')) > reference_time)
+            since_groups[-1].append(reference_time)
+            i += 2
+        elif token in TIME_UNITS:
+            if i + 1 >= len(args): raise ValueError(f"missing argument to `{token}`")
+            predicate, since = _age_test(token, args[i+1], now)
+            predicate_groups[-1].append(predicate)
+            if since is not None:
+                since_groups[-1].append(since)
+            i += 2
         elif token == '-o':
             predicate_groups.append([])
+            name_groups.append([])
+            since_groups.append([])
             i += 1
         elif token == '-exec':
             command_parts = []
@@ -57,7 +102,36 @@ def _parse_expression(args):
     if not actions:
         actions.append({'type': 'print'})
 
-    return predicate_groups, actions
+    return predicate_groups, actions, name_groups, since_groups
+
+def _indexed_candidates(start_path, predicate_groups, name_groups, since_groups):
+    """
+    When every alternative of the expression requires a -name match or a
+    minimum mtime, the (path, node) pairs under start_path that could match,
+    looked up in the filename or modification index.
+    Returns None when the tree has to be walked instead.
+    """
+    lookups = []
+    for group, names, sinces in zip(predicate_groups, name_groups, since_groups):
+        if not group:
+            continue
+        if names:
+            lookups.append((fs_manager.find_by_name, names[0]))
+        elif sinces:
+            lookups.append((fs_manager.modified_since, max(sinces)))
+        else:
+            return None
+    if not lookups:
+        return None
+    candidates = {}
+    for lookup, argument in lookups:
+        found = lookup(argument, start_path)
+        if found is None:
+            return None
+        if len(lookups) == 1:
+            return found
+        candidates.update(found)
+    return sorted(candidates.items(), key=walk_order)
 
 def run(args, flags, user_context, **kwargs):
     """
@@ -83,7 +157,7 @@ def run(args, flags, user_context, **kwargs):
     if not paths: paths = ['.']
 
     try:
-        predicate_groups, actions = _parse_expression(expression_args)
+        predicate_groups, actions, name_groups, since_groups = _parse_expression(expression_args)
     except ValueError as e:
         return {
             "success": False,
@@ -96,10 +170,7 @@ def run(args, flags, user_context, **kwargs):
     output_lines = []
     commands_to_exec = []
 
-    def traverse(current_path):
-        node = fs_manager.get_node(current_path)
-        if not node: return
-
+    def visit(current_path, node):
         matches = any(
             all(p(current_path, node) for p in group)
             for group in predicate_groups if group
@@ -120,13 +191,23 @@ def run(args, flags, user_context, **kwargs):
                     ])
                     commands_to_exec.append(cmd_str)
 
-        if node.get('type') == 'directory':
-            for child_name in sorted(node.get('children', {}).keys()):
-                child_path = fs_manager.get_absolute_path(os.path.join(current_path, child_name))
-                traverse(child_path)
-
-    for start_path in paths:
-        traverse(fs_manager.get_absolute_path(start_path))
+    # -delete may remove many nodes; persist them as a single batch.
+    with fs_manager.batch(rollback=False):
+        for start_path in paths:
+            candidates = _indexed_candidates(start_path, predicate_groups, name_groups, since_groups)
+            if candidates is None:
+                for current_path, _, node, _ in fs_manager.walk(start_path, follow_symlinks=True):
+                    visit(current_path, node)
+                continue
+            deleting = any(action['type'] == 'delete' for action in actions)
+            removed = []
+            for current_path, node in candidates:
+                # The walk wouldn't reach anything under a directory -delete already took.
+                if removed and any(current_path.startswith(prefix) for prefix in removed):
+                    continue
+                visit(current_path, node)
+                if deleting and node.get('type') == 'directory' and not fs_manager.get_node(current_path, resolve_symlink=False):
+                    removed.append(current_path + '/')
 
     if commands_to_exec:
         return {
@@ -158,6 +239,15 @@ OPTIONS
     -perm <mode>
         File's permission bits are exactly mode (octal).
 
+    -newer <file>
+        File was modified more recently than file.
+
+    -mmin <n>
+        File was modified n minutes ago; +n means more than n, -n less than n.
+
+    -mtime <n>
+        File was modified n days (24-hour periods) ago, with +n and -n as for -mmin.
+
     -o
         OR; the preceding expression is logically OR'd with the following one.
 
@@ -170,6 +260,8 @@ OPTIONS
 EXAMPLES
     find . -name "*.log"
     find /home -type d
+    find . -mmin -30
+    find /var/log -newer /var/log/last_backup
     find . -name "*.tmp" -delete
     find . -name "*.txt" -exec cat {} ;
 """
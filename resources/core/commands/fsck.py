@@ -7,6 +7,9 @@ def define_flags():
     return {
         'flags': [
             {'name': 'repair', 'long': 'repair', 'takes_value': False},
+            {'name': 'sizes', 'long': 'sizes', 'takes_value': False},
+            {'name': 'incremental', 'long': 'incremental', 'takes_value': False},
+            {'name': 'progress', 'short': 'C', 'long': 'progress', 'takes_value': False},
         ],
         'metadata': {
             'root_required': True
@@ -16,12 +19,23 @@ def define_flags():
 
 def run(args, flags, user_context, users=None, groups=None, **kwargs):
     is_repair = flags.get('repair', False)
-    report, changes_made = fs_manager.fsck(users, groups, repair=is_repair)
+    progress_lines = []
+
+    def progress(checked, path):
+        if path is not None:
+            progress_lines.append(f"fsck: {checked} nodes checked (at {path})")
+        else:
+            progress_lines.append(f"fsck: {checked} nodes checked in total")
+
+    report, changes_made = fs_manager.fsck(
+        users, groups, repair=is_repair, verify_sizes=flags.get('sizes', False),
+        incremental=flags.get('incremental', False), progress=progress if flags.get('progress') else None
+    )
 
     if not report:
-        return "Filesystem check complete. No issues found."
+        return "\n".join(progress_lines + ["Filesystem check complete. No issues found."])
 
-    output = ["Filesystem check found the following issues:"]
+    output = progress_lines + ["Filesystem check found the following issues:"]
     output.extend([f" - {item}" for item in report])
 
     if changes_made:
@@ -37,19 +51,30 @@ NAME
     fsck - check and repair a file system
 
 SYNOPSIS
-    fsck [--repair]
+    fsck [--repair] [--sizes] [--incremental] [-C]
 
 DESCRIPTION
-    fsck is used to check and optionally repair the virtual file system. It checks for orphaned nodes (files owned by non-existent users/groups), dangling symbolic links, and ensures every user has a home directory.
+    fsck is used to check and optionally repair the virtual file system. It checks for orphaned nodes (files owned by non-existent users/groups), dangling symbolic links, and ensures every user has a home directory. The tree is checked in a single pass, and all repairs are saved together at the end.
 
 OPTIONS
     --repair
           Attempt to repair any issues found. Orphaned nodes will be reassigned to root, and dangling links will be removed.
 
+    --sizes
+          Also recompute the cached size and file-count totals of every directory and report any that disagree. With --repair, they are corrected.
+
+    --incremental
+          Only check the parts of the file system that changed since the last check that found no issues (or repaired them all). Falls back to a full check when that is not known, e.g. after a reboot or when users or groups have changed.
+
+    -C, --progress
+          Report how many nodes have been checked every 10000 nodes, and in total.
+
 EXAMPLES
     sudo fsck
     sudo fsck --repair
+    sudo fsck --sizes --repair
+    sudo fsck --incremental
 """
 
 def help(args, flags, user_context, **kwargs):
-    return "Usage: fsck [--repair]"
\ No newline at end of file
+    return "Usage: fsck [--repair] [--sizes] [--incremental] [-C]"
\ No newline at end of file
@@ -1,8 +1,8 @@
 # gem/core/commands/grep.py
 
 import re
-import os
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, nonempty, text_of
 
 def define_flags():
     """Declares the flags that the grep command accepts."""
@@ -19,12 +19,14 @@ def define_flags():
     }
 
 def _process_content(content, pattern, flags, file_path_for_display, display_file_name):
-    """Processes a string of content, finds matching lines, and returns formatted output."""
+    """Yields the formatted output for a string of content's matching lines as it finds them."""
     if not content:
-        return []
-    lines = content.splitlines()
+        return
+    yield from _process_lines(lines_in(blocks_of(content)), pattern, flags, file_path_for_display, display_file_name)
+
+def _process_lines(lines, pattern, flags, file_path_for_display, display_file_name):
+    """Finds matching lines and yields formatted output (with -c, just the count, at the end)."""
     file_match_count = 0
-    file_output = []
 
     is_invert = flags.get('invert-match', False)
     is_count = flags.get('count', False)
@@ -43,37 +45,54 @@ def _process_content(content, pattern, flags, file_path_for_display, display_fil
                 if is_line_number:
                     output_line += f"{i + 1}:"
                 output_line += line
-                file_output.append(output_line)
+                yield output_line
 
     if is_count:
         count_output = ""
         if display_file_name:
             count_output += f"{file_path_for_display}:"
         count_output += str(file_match_count)
-        return [count_output]
-
-    return file_output
-
-def _search_directory(directory_path, pattern, flags, user_context, output_lines):
-    """Recursively searches a directory for files to process."""
-    dir_node = fs_manager.get_node(directory_path)
-    if not dir_node or dir_node.get('type') != 'directory':
-        return
-
-    children = sorted(dir_node.get('children', {}).keys())
-    for child_name in children:
-        child_path = fs_manager.get_absolute_path(os.path.join(directory_path, child_name))
-        child_node = dir_node['children'][child_name]
-
-        if child_node.get('type') == 'directory':
-            _search_directory(child_path, pattern, flags, user_context, output_lines)
-        elif child_node.get('type') == 'file':
+        yield count_output
+
+def _search_directory(directory_path, pattern, flags, user_context):
+    """Searches every file under a directory, in path order."""
+    # Files that can't hold a match print nothing, so the content index may skip
+    # them; not so with -v or -c, which report on every file.
+    may_match = None
+    if not flags.get('invert-match') and not flags.get('count'):
+        may_match = fs_manager.content_filter(pattern.pattern)
+    for child_path, _, child_node, _ in fs_manager.walk(directory_path):
+        if child_node.get('type') == 'file' and (may_match is None or may_match(child_path)):
             content = child_node.get('content', '')
-            output_lines.extend(_process_content(content, pattern, flags, child_path, True))
+            yield from _process_content(content, pattern, flags, child_path, True)
+
+def _search_paths(targets, pattern, flags, user_context):
+    """The output for each (path, node) of the command line in turn, errors included."""
+    is_recursive = flags.get('recursive', False)
+    display_file_names = len(targets) > 1 or is_recursive
+
+    for path, node in targets:
+        if not node:
+            yield f"grep: {path}: No such file or directory"
+        elif node.get('type') == 'directory':
+            if is_recursive:
+                yield from _search_directory(path, pattern, flags, user_context)
+            else:
+                yield f"grep: {path}: is a directory"
+        else:
+            content = node.get('content', '')
+            yield from _process_content(content, pattern, flags, path, display_file_names)
 
 
 def run(args, flags, user_context, stdin_data=None):
-    if not args and stdin_data is None:
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: matching lines go out as they are found, so
+    a `head` further down the pipeline can stop the search early.
+    """
+    if not args and lines is None:
         return {
             "success": False,
             "error": {
@@ -97,11 +116,11 @@ def run(args, flags, user_context, stdin_data=None):
             }
         }
 
-    output_lines = []
-    has_errors = False
-
-    if stdin_data is not None:
-        output_lines.extend(_process_content(stdin_data, pattern, flags, "(stdin)", False))
+    if lines is not None:
+        lines = nonempty(lines)
+        if lines is None:
+            return ""
+        return join_lines(_process_lines(lines_in(lines), pattern, flags, "(stdin)", False))
     elif not file_paths:
         # This case is now handled by the initial check, but we keep it for safety.
         return {
@@ -111,28 +130,16 @@ def run(args, flags, user_context, stdin_data=None):
                 "suggestion": "Provide one or more file names to search."
             }
         }
-    else:
-        is_recursive = flags.get('recursive', False)
-        display_file_names = len(file_paths) > 1 or is_recursive
-
-        for path in file_paths:
-            node = fs_manager.get_node(path)
-            if not node:
-                output_lines.append(f"grep: {path}: No such file or directory")
-                has_errors = True
-                continue
-
-            if node.get('type') == 'directory':
-                if is_recursive:
-                    _search_directory(path, pattern, flags, user_context, output_lines)
-                else:
-                    output_lines.append(f"grep: {path}: is a directory")
-                    has_errors = True
-            else:
-                content = node.get('content', '')
-                output_lines.extend(_process_content(content, pattern, flags, path, display_file_names))
 
-    if has_errors and not any(line for line in output_lines if not line.startswith("grep:")):
+    targets = [(path, fs_manager.get_node(path)) for path in file_paths]
+    is_recursive = flags.get('recursive', False)
+    has_errors = any(not node or (node.get('type') == 'directory' and not is_recursive) for _, node in targets)
+    if not has_errors:
+        return join_lines(_search_paths(targets, pattern, flags, user_context))
+
+    # Whether the errors are all there is to say depends on what else turns up.
+    output_lines = list(_search_paths(targets, pattern, flags, user_context))
+    if not any(line for line in output_lines if not line.startswith("grep:")):
         return {
             "success": False,
             "error": {
@@ -141,7 +148,6 @@ def run(args, flags, user_context, stdin_data=None):
             }
         }
 
-
     return "\n".join(output_lines)
 
 def man(args, flags, user_context, **kwargs):
@@ -1,6 +1,8 @@
 # gem/core/commands/head.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, nonempty, text_of
+from itertools import chain, islice
 
 def define_flags():
     """Declares the flags that the head command accepts."""
@@ -13,12 +15,21 @@ def define_flags():
     }
 
 def run(args, flags, user_context, stdin_data=None):
-    lines = []
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run. Stops reading its input once it has the
+    lines it prints, so `cat big | grep x | head -5` gets no further into
+    big than the fifth match.
+    """
+    sources = []
     has_errors = False
     error_output = []
 
-    if stdin_data:
-        lines.extend(stdin_data.splitlines())
+    lines = nonempty(lines)
+    if lines is not None:
+        sources.append(lines)
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -30,11 +41,13 @@ def run(args, flags, user_context, stdin_data=None):
                 error_output.append(f"head: error reading '{path}': Is a directory")
                 has_errors = True
                 continue
-            lines.extend(node.get('content', '').splitlines())
+            content = node.get('content', '')
+            if content:
+                sources.append(blocks_of(content))
     else:
         return ""
 
-    if has_errors and not lines:
+    if has_errors and not sources:
         return {
             "success": False,
             "error": {
@@ -43,7 +56,8 @@ def run(args, flags, user_context, stdin_data=None):
             }
         }
 
-
+    # Each file's lines are split on their own, as if read one after another.
+    input_lines = chain.from_iterable(lines_in(source) for source in sources)
     line_count_str = flags.get('lines')
     byte_count_str = flags.get('bytes')
 
@@ -51,8 +65,13 @@ def run(args, flags, user_context, stdin_data=None):
         try:
             byte_count = int(byte_count_str)
             if byte_count < 0: raise ValueError
-            full_content = "\n".join(lines)
-            return full_content[:byte_count]
+            pieces, length = [], 0
+            for i, line in enumerate(input_lines):
+                if length >= byte_count: break
+                piece = f"\n{line}" if i else line
+                pieces.append(piece)
+                length += len(piece)
+            return "".join(pieces)[:byte_count]
         except (ValueError, TypeError):
             return {
                 "success": False,
@@ -75,7 +94,7 @@ def run(args, flags, user_context, stdin_data=None):
                         "suggestion": "Please provide a non-negative integer for the line count."
                     }
                 }
-        return "\n".join(lines[:line_count])
+        return join_lines(islice(input_lines, line_count))
 
 
 def man(args, flags, user_context, **kwargs):
@@ -0,0 +1,85 @@
+# gem/core/commands/index.py
+
+import time
+from filesystem import fs_manager
+
+def _format_bytes(byte_count):
+    for unit in ('B', 'K', 'M', 'G'):
+        if byte_count < 1024 or unit == 'G':
+            return f"{byte_count:.1f}{unit}".replace(".0", "")
+        byte_count /= 1024
+
+def _status():
+    names = fs_manager.get_name_index_stats()
+    content = fs_manager.get_content_index_stats()
+    mtimes = fs_manager.get_mtime_index_stats()
+    lines = []
+    if names["enabled"]:
+        lines.append(f"Filename index: on, {names['names']} names, {names['entries']} entries, {names['links']} symlinks")
+    else:
+        lines.append("Filename index: off")
+    if content["enabled"]:
+        line = (f"Content index:  on, {content['files']} files indexed, {content['pending']} pending, "
+                f"{content['tokens']} words, {_format_bytes(content['estimated_bytes'])} of {_format_bytes(content['max_bytes'])}")
+        if content["capped"]:
+            line += " (memory cap reached; remaining files are searched without it)"
+        lines.append(line)
+    else:
+        lines.append("Content index:  off")
+    if mtimes["enabled"]:
+        lines.append(f"Mtime index:    on, {mtimes['nodes']} nodes, newest change {mtimes['newest']}")
+    else:
+        lines.append("Mtime index:    off")
+    return "\n".join(lines)
+
+def run(args, flags, user_context, **kwargs):
+    subcommand = args[0] if args else "status"
+
+    if subcommand == "status":
+        return _status()
+
+    if subcommand == "rebuild":
+        start = time.perf_counter()
+        fs_manager.rebuild_name_index()
+        fs_manager.rebuild_content_index()
+        fs_manager.rebuild_mtime_index()
+        elapsed = time.perf_counter() - start
+        return f"Indexes rebuilt in {elapsed:.2f}s.\n{_status()}"
+
+    return {
+        "success": False,
+        "error": {
+            "message": f"index: unknown subcommand '{subcommand}'",
+            "suggestion": "Try 'index status' or 'index rebuild'."
+        }
+    }
+
+def man(args, flags, user_context, **kwargs):
+    return """
+NAME
+    index - show or rebuild the file system search indexes
+
+SYNOPSIS
+    index [status | rebuild]
+
+DESCRIPTION
+    SamwiseOS keeps three indexes over the file system. The filename index
+    answers find -name, locate and wildcard expansion in large directories.
+    The content index records the words in every file so that grep -r can
+    skip files that cannot match; it is filled in the background after boot
+    and after each change, up to a memory cap. The mtime index orders every
+    node by modification time, for find -newer, -mmin and -mtime.
+
+    status
+          Show what each index holds (the default).
+
+    rebuild
+          Throw the indexes away and build them again now.
+
+EXAMPLES
+    index
+    index rebuild
+"""
+
+def help(args, flags, user_context, **kwargs):
+    return "Usage: index [status | rebuild]"
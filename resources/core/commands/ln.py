@@ -7,6 +7,7 @@ def define_flags():
     return {
         'flags': [
             {'name': 'symbolic', 'short': 's', 'long': 'symbolic', 'takes_value': False},
+            {'name': 'force', 'short': 'f', 'long': 'force', 'takes_value': False},
         ],
         'metadata': {}
     }
@@ -33,7 +34,7 @@ def run(args, flags, user_context, **kwargs):
     target, link_name = args[0], args[1]
 
     try:
-        fs_manager.ln(target, link_name, user_context)
+        fs_manager.ln(target, link_name, user_context, force=flags.get('force', False))
         return ""
     except FileExistsError as e:
         return {
@@ -43,6 +44,14 @@ def run(args, flags, user_context, **kwargs):
                 "suggestion": f"A file or directory already exists at that location. Details: {e}"
             }
         }
+    except IsADirectoryError as e:
+        return {
+            "success": False,
+            "error": {
+                "message": f"ln: failed to create symbolic link '{link_name}'",
+                "suggestion": f"A directory cannot be replaced by a link. Details: {e}"
+            }
+        }
     except FileNotFoundError as e:
         return {
             "success": False,
@@ -66,7 +75,7 @@ NAME
     ln - make links between files
 
 SYNOPSIS
-    ln -s TARGET LINK_NAME
+    ln -s [-f] TARGET LINK_NAME
 
 DESCRIPTION
     Create a symbolic link named LINK_NAME which points to TARGET. Hard links are not supported.
@@ -74,10 +83,13 @@ DESCRIPTION
 OPTIONS
     -s, --symbolic
         Make a symbolic link instead of a hard link. This is currently the only supported mode.
+    -f, --force
+        Replace an existing file or link at LINK_NAME, e.g. to retarget a link.
 
 EXAMPLES
     ln -s /home/guest/file.txt /home/guest/link_to_file
+    ln -sf /home/guest/other.txt /home/guest/link_to_file
 """
 
 def help(args, flags, user_context, **kwargs):
-    return "Usage: ln -s <target> <link_name>"
\ No newline at end of file
+    return "Usage: ln -s [-f] <target> <link_name>"
\ No newline at end of file
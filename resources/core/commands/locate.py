@@ -0,0 +1,92 @@
+# gem/core/commands/locate.py
+
+from fnmatch import fnmatchcase
+from filesystem import fs_manager
+
+def define_flags():
+    """Declares the flags that the locate command accepts."""
+    return {
+        'flags': [
+            {'name': 'count', 'short': 'c', 'long': 'count', 'takes_value': False},
+            {'name': 'limit', 'short': 'l', 'long': 'limit', 'takes_value': True},
+        ],
+        'metadata': {}
+    }
+
+def _locate(pattern):
+    """Every path whose name matches pattern, from the filename index when it is on."""
+    found = fs_manager.find_by_name(pattern, '/', follow_symlinks=False)
+    if found is None:
+        return [path for path, name, _, _ in fs_manager.walk('/') if fnmatchcase(name, pattern)]
+    return [path for path, _ in found]
+
+def run(args, flags, user_context, **kwargs):
+    if not args:
+        return {
+            "success": False,
+            "error": {
+                "message": "locate: no pattern to search for specified",
+                "suggestion": "Try 'locate notes.txt' or 'locate \"*.md\"'."
+            }
+        }
+
+    limit = flags.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 0: raise ValueError
+        except ValueError:
+            return {
+                "success": False,
+                "error": {
+                    "message": f"locate: invalid limit '{limit}'",
+                    "suggestion": "The limit must be a non-negative number."
+                }
+            }
+
+    matches = []
+    seen = set()
+    for pattern in args:
+        # Like locate, a pattern without wildcards matches anywhere in the name.
+        if not any(char in pattern for char in '*?['):
+            pattern = f"*{pattern}*"
+        for path in _locate(pattern):
+            if path not in seen:
+                seen.add(path)
+                matches.append(path)
+
+    if limit is not None:
+        matches = matches[:limit]
+    if flags.get('count'):
+        return str(len(matches))
+    return "\n".join(matches)
+
+def man(args, flags, user_context, **kwargs):
+    return """
+NAME
+    locate - find files by name
+
+SYNOPSIS
+    locate [OPTION]... PATTERN...
+
+DESCRIPTION
+    Lists every file, directory and link in the file system whose name
+    matches one of the PATTERNs. A PATTERN without wildcards matches any
+    name containing it. Lookups are answered from the filename index when
+    it is enabled, so they do not have to search the whole tree.
+
+OPTIONS
+    -c, --count
+          Print only the number of matching entries.
+
+    -l, --limit=N
+          Stop after N entries.
+
+EXAMPLES
+    locate notes
+    locate "*.md"
+    locate -c ".txt"
+"""
+
+def help(args, flags, user_context, **kwargs):
+    return "Usage: locate [-c] [-l N] PATTERN..."
@@ -35,7 +35,8 @@ def run(args, flags, user_context, **kwargs):
         full_path = os.path.join(log_dir_path, filename)
 
         try:
-            fs_manager.write_file(full_path, entry_text, user_context)
+            # Appending means two entries in the same millisecond share a file instead of one replacing the other.
+            fs_manager.append_file(full_path, entry_text, user_context)
             return f"Log entry saved to {full_path}"
         except Exception as e:
             return {"success": False, "error": f"log: failed to save entry: {repr(e)}"}
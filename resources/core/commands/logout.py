@@ -1,5 +1,7 @@
 # gem/core/commands/logout.py
 
+from filesystem import fs_manager
+
 def run(args, flags, user_context, **kwargs):
     if args:
         return {
@@ -10,6 +12,8 @@ def run(args, flags, user_context, **kwargs):
             }
         }
 
+    # Flush pending write-behind changes before the session ends.
+    fs_manager.flush()
     return {"effect": "logout"}
 
 def man(args, flags, user_context, **kwargs):
@@ -1,6 +1,6 @@
 # gem/core/commands/ls.py
 
-from filesystem import fs_manager
+from filesystem import fs_manager, mtime_key
 from datetime import datetime
 import os
 
@@ -74,7 +74,7 @@ def _format_columns(items, terminal_width=80):
 
 def _get_sort_key_for_node(flags):
     """Returns a key function for sorting nodes based on flags."""
-    if flags.get('sort-time'): return lambda item: item[1].get('mtime', '')
+    if flags.get('sort-time'): return lambda item: (-mtime_key(item[1].get('mtime')), item[0]) # newest first
     if flags.get('sort-size'):
         def size_key(item):
             node = item[1]
@@ -86,11 +86,7 @@ def _get_sort_key_for_node(flags):
     return lambda item: item[0].lower()
 
 def _list_directory_contents(path, flags, user_context, recursive_output, all_errors):
-    """Recursively lists directory contents."""
-    is_first_level = not recursive_output
-    if not is_first_level:
-        recursive_output.append(f"\n{path}:")
-
+    """Lists a directory's contents, and with -R those of every directory below it."""
     # When listing contents, we MUST resolve the link to get the target directory
     node = fs_manager.get_node(path, resolve_symlink=True)
 
@@ -98,46 +94,53 @@ def _list_directory_contents(path, flags, user_context, recursive_output, all_er
         all_errors.append(f"ls: cannot open directory '{path}': Not a directory")
         return
 
-    # Permission check for reading the directory's contents
-    if not fs_manager.has_permission(path, user_context, 'read'):
-        # THE FIX IS HERE! Added 'f' to make this an f-string.
-        all_errors.append(f"ls: cannot open directory '{path}': Permission denied")
-        return
+    start_path = fs_manager.get_absolute_path(path)
+    sort_key_func = _get_sort_key_for_node(flags)
+
+    def is_listed(name, depth):
+        return depth == 0 or flags.get('all') or not name.startswith('.')
+
+    def skip(abs_path, name, dir_node, depth):
+        return not is_listed(name, depth) or not fs_manager.has_permission(abs_path, user_context, 'read', node=dir_node)
+
+    walker = fs_manager.walk(start_path, max_depth=None if flags.get('recursive') else 0, prune=skip,
+                             key=sort_key_func, reverse=flags.get('reverse', False))
+    for abs_path, name, dir_node, depth in walker:
+        if dir_node.get('type') != 'directory' or not is_listed(name, depth):
+            continue
+        dir_path = path if depth == 0 else os.path.join(path, abs_path[len(start_path):].lstrip('/'))
+        if depth > 0:
+            recursive_output.append(f"\n{dir_path}:")
+
+        # Permission check for reading the directory's contents
+        if not fs_manager.has_permission(abs_path, user_context, 'read', node=dir_node):
+            all_errors.append(f"ls: cannot open directory '{dir_path}': Permission denied")
+            continue
 
+        recursive_output.extend(_format_directory(dir_path, dir_node, flags, sort_key_func))
+
+
+def _format_directory(path, node, flags, sort_key_func):
+    """The listing lines for one directory's children."""
     children_items = list(node.get('children', {}).items())
     if not flags.get('all'):
         children_items = [item for item in children_items if not item[0].startswith('.')]
 
-    sort_key_func = _get_sort_key_for_node(flags)
     sorted_children = sorted(children_items, key=sort_key_func, reverse=flags.get('reverse', False))
 
     dir_content = []
-    sub_dirs_to_recurse = []
-
     if flags.get('long'):
         for name, child_node in sorted_children:
             dir_content.append(_format_long(path, name, child_node))
-            if flags.get('recursive') and child_node.get('type') == 'directory':
-                sub_dirs_to_recurse.append(os.path.join(path, name))
     elif flags.get('one-per-line'):
         for name, child_node in sorted_children:
             dir_content.append(name)
-            if flags.get('recursive') and child_node.get('type') == 'directory':
-                sub_dirs_to_recurse.append(os.path.join(path, name))
     else:
         names = [name for name, child_node in sorted_children]
         formatted_columns = _format_columns(names)
         if formatted_columns:
             dir_content.append(formatted_columns)
-        for name, child_node in sorted_children:
-            if flags.get('recursive') and child_node.get('type') == 'directory':
-                sub_dirs_to_recurse.append(os.path.join(path, name))
-
-    recursive_output.extend(dir_content)
-
-    for sub_dir_path in sub_dirs_to_recurse:
-        _list_directory_contents(sub_dir_path, flags, user_context, recursive_output, all_errors)
-
+    return dir_content
 
 def run(args, flags, user_context, **kwargs):
     paths = args if args else ["."]
@@ -36,6 +36,14 @@ def run(args, flags, user_context, **kwargs):
                     "suggestion": "Check your permissions for the parent directory."
                 }
             }
+        except OSError as e:
+            return {
+                "success": False,
+                "error": {
+                    "message": f"mkdir: cannot create directory ‘{path}’: {e.strerror or e}",
+                    "suggestion": "Check the path and that there is room for the change; 'quota' shows your limits."
+                }
+            }
         except Exception as e:
             return {
                 "success": False,
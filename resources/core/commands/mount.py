@@ -0,0 +1,76 @@
+# gem/core/commands/mount.py
+
+from filesystem import fs_manager
+
+def define_flags():
+    """Declares the flags that the mount command accepts."""
+    return {
+        'flags': [
+            {'name': 'read-only', 'short': 'r', 'long': 'read-only', 'takes_value': False},
+            {'name': 'owner', 'short': 'o', 'long': 'owner', 'takes_value': True},
+            {'name': 'mkdir', 'long': 'mkdir', 'takes_value': False},
+        ],
+        'metadata': {}
+    }
+
+def _error(message, suggestion):
+    return {"success": False, "error": {"message": f"mount: {message}", "suggestion": suggestion}}
+
+def _describe(mount):
+    options = "ro" if mount["read_only"] else "rw"
+    return f"{mount['source']} on {mount['path']} ({options}, owner {mount['owner']}:{mount['group']})"
+
+def run(args, flags, user_context, **kwargs):
+    if not args:
+        return "\n".join(_describe(mount) for mount in fs_manager.get_host_mounts())
+    if len(args) != 2:
+        return _error("usage: mount [-r] [-o OWNER] [--mkdir] HOST_DIR PATH",
+                      "Run 'mount' on its own to list what is mounted.")
+    if user_context.get('name') != 'root':
+        return _error("only root can mount", "Try 'sudo mount ...'.")
+
+    host_path, path = args
+    owner = flags.get('owner') or 'root'
+    try:
+        mount = fs_manager.mount_host(path, host_path, owner=owner, group=owner,
+                                      read_only=flags.get('read-only', False), mkdir=flags.get('mkdir', False))
+    except Exception as e:
+        return _error(str(e), "The mount point must be an empty directory, or missing with --mkdir.")
+    return _describe(mount)
+
+def man(args, flags, user_context, **kwargs):
+    return """
+NAME
+    mount - show a host directory inside the file system
+
+SYNOPSIS
+    mount
+    mount [-r] [-o OWNER] [--mkdir] HOST_DIR PATH
+
+DESCRIPTION
+    Shows the directory HOST_DIR of the machine running the system at PATH,
+    which must be missing or an empty directory. Nothing is copied: each
+    directory is listed the first time it is entered, each file is read
+    from the host whenever it is opened, and writes go straight to the
+    host. Mounted files are never saved with the file system and count
+    toward no quota. They can't be linked to or given other owners or
+    modes, and moving files in or out of a mount copies them.
+
+    Without arguments, lists what is mounted. Mounting is for root only;
+    Config.FILESYSTEM.HOST_MOUNTS lists directories mounted at boot.
+
+OPTIONS
+    -r, --read-only
+          Refuse every change through the mount.
+    -o, --owner=OWNER
+          Show the mounted files as belonging to OWNER (default root).
+    --mkdir
+          Create the directories leading to PATH if they are missing.
+
+EXAMPLES
+    sudo mount --mkdir -o Guest /data /mnt/data
+    sudo umount /mnt/data
+"""
+
+def help(args, flags, user_context, **kwargs):
+    return "Usage: mount [-r] [-o OWNER] [--mkdir] HOST_DIR PATH"
@@ -30,6 +30,8 @@ def run(args, flags, user_context, **kwargs):
             return {"success": False, "error": {"message": f"mv: cannot stat '{source_path}': {e}", "suggestion": "Check the spelling and path of the source file."}}
         except FileExistsError as e:
             return {"success": False, "error": {"message": f"mv: cannot move to '{destination_path}': {e}", "suggestion": "Choose a different name for the destination or remove the existing file first."}}
+        except ValueError as e:
+            return {"success": False, "error": {"message": f"mv: {e}", "suggestion": "Choose a destination outside the directory being moved."}}
         except Exception as e:
             return {"success": False, "error": {"message": f"mv: an unexpected error occurred: {repr(e)}", "suggestion": "Please verify the source and destination paths."}}
 
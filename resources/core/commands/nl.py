@@ -1,14 +1,20 @@
 # /core/commands/nl.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, text_of
+from itertools import chain
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
-    lines = []
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """The streaming form of run: numbers each line as it is read."""
+    sources = []
     has_errors = False
     error_output = []
 
-    if stdin_data is not None:
-        lines.extend(str(stdin_data or "").splitlines())
+    if lines is not None:
+        sources.append(lines)
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -20,11 +26,13 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 error_output.append(f"nl: {path}: Is a directory")
                 has_errors = True
                 continue
-            lines.extend(node.get('content', '').splitlines())
+            content = node.get('content', '')
+            if content:
+                sources.append(blocks_of(content))
     else:
         return "" # No input, no output
 
-    if has_errors and not lines:
+    if has_errors and not sources:
         return {
             "success": False,
             "error": {
@@ -33,21 +41,18 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
             }
         }
 
-    output_lines = []
-    line_number = 1
-    for line in lines:
-        if line.strip():
-            output_lines.append(f"{str(line_number).rjust(6)}\t{line}")
-            line_number += 1
-        else:
-            output_lines.append("")
-
-    final_output_str = "\n".join(output_lines)
+    def output_lines():
+        line_number = 1
+        for source in sources:
+            for line in lines_in(source):
+                if line.strip():
+                    yield f"{str(line_number).rjust(6)}\t{line}"
+                    line_number += 1
+                else:
+                    yield ""
 
-    if error_output:
-        return "\n".join(error_output) + "\n" + final_output_str
+    return join_lines(chain(error_output, output_lines()))
 
-    return final_output_str
 
 def man(args, flags, user_context, **kwargs):
     return """
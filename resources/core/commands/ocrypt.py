@@ -6,6 +6,7 @@ from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from filesystem import fs_manager
+from binary_content import as_content, content_bytes, is_binary
 
 def define_flags():
     return {
@@ -45,7 +46,12 @@ def run(args, flags, user_context, **kwargs):
             "error": { "message": f"ocrypt: input file not found or is a directory: {input_path}", "suggestion": "Please ensure the input file exists." }
         }
 
-    input_content_bytes = input_node.get('content', '').encode('latin-1')
+    input_content_bytes = content_bytes(input_node)
+    if is_decrypt and not is_binary(input_node):
+        try:
+            input_content_bytes = input_node.get('content', '').encode('latin-1') # Written before ocrypt produced binary files.
+        except UnicodeEncodeError:
+            pass # Raw bytes read from a mounted host directory.
 
     try:
         if is_decrypt:
@@ -56,16 +62,14 @@ def run(args, flags, user_context, **kwargs):
             key = _derive_key(password, salt)
             f = Fernet(key)
             decrypted_content = f.decrypt(encrypted_data)
-            fs_manager.write_file(output_path, decrypted_content.decode('utf-8'), user_context)
+            fs_manager.write_file(output_path, as_content(decrypted_content), user_context)
             return "" # Success
         else:
             salt = os.urandom(16)
             key = _derive_key(password, salt)
             f = Fernet(key)
-            content_to_encrypt_bytes = input_node.get('content', '').encode('utf-8')
-            encrypted_content = f.encrypt(content_to_encrypt_bytes)
-            content_to_write = salt + encrypted_content
-            fs_manager.write_file(output_path, content_to_write.decode('latin-1'), user_context)
+            encrypted_content = f.encrypt(input_content_bytes)
+            fs_manager.write_file(output_path, salt + encrypted_content, user_context)
             return "" # Success
 
     except InvalidToken:
@@ -90,6 +94,8 @@ SYNOPSIS
 DESCRIPTION
     Encrypts or decrypts a file using a password. It uses a robust,
     salt-based key derivation function to protect against simple attacks.
+    The encrypted file is a binary file; decrypting gives back the original
+    bytes, as a text file if they are UTF-8 and a binary file otherwise.
 
     -d, --decode
           Decrypt the infile.
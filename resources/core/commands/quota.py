@@ -0,0 +1,117 @@
+# gem/core/commands/quota.py
+
+from filesystem import fs_manager
+from quota import parse_size
+
+def define_flags():
+    """Declares the flags that the quota command accepts."""
+    return {
+        'flags': [
+            {'name': 'vfs', 'long': 'vfs', 'takes_value': False},
+        ],
+        'metadata': {}
+    }
+
+def _format_bytes(byte_count):
+    for unit in ('B', 'K', 'M', 'G'):
+        if byte_count < 1024 or unit == 'G':
+            return f"{byte_count:.1f}{unit}".replace(".0", "")
+        byte_count /= 1024
+
+def _format_row(entry):
+    def limit(value, formatter=str):
+        return formatter(value) if value else "-"
+
+    byte_mark = "*" if entry["bytes_soft"] and entry["bytes"] > entry["bytes_soft"] else ""
+    inode_mark = "*" if entry["inodes_soft"] and entry["inodes"] > entry["inodes_soft"] else ""
+    owner = "(vfs)" if entry["owner"] is None else str(entry["owner"])
+    return (f"{owner.ljust(12)}{(_format_bytes(entry['bytes']) + byte_mark).rjust(9)}"
+            f"{limit(entry['bytes_soft'], _format_bytes).rjust(8)}{limit(entry['bytes_hard'], _format_bytes).rjust(8)}"
+            f"{(str(entry['inodes']) + inode_mark).rjust(9)}{limit(entry['inodes_soft']).rjust(8)}{limit(entry['inodes_hard']).rjust(8)}")
+
+def _table(entries):
+    header = f"{'Owner'.ljust(12)}{'Used'.rjust(9)}{'Soft'.rjust(8)}{'Hard'.rjust(8)}{'Inodes'.rjust(9)}{'Soft'.rjust(8)}{'Hard'.rjust(8)}"
+    return "\n".join([header] + [_format_row(entry) for entry in entries])
+
+def _error(message, suggestion):
+    return {"success": False, "error": {"message": f"quota: {message}", "suggestion": suggestion}}
+
+def _set(args, flags):
+    owner = None if flags.get('vfs') else (args[0] if args else None)
+    limits = args if flags.get('vfs') else args[1:]
+    if (owner is None and not flags.get('vfs')) or len(limits) not in (2, 4):
+        return _error("usage: quota set USER|--vfs BYTES_SOFT BYTES_HARD [INODES_SOFT INODES_HARD]",
+                      "Use 0 for no limit, e.g. 'quota set alice 8M 10M'.")
+    try:
+        bytes_soft, bytes_hard = parse_size(limits[0]), parse_size(limits[1])
+        inodes_soft, inodes_hard = (int(limits[2]), int(limits[3])) if len(limits) == 4 else (0, 0)
+    except ValueError as e:
+        return _error(str(e), "Sizes are bytes, or a number with K, M or G; inode limits are whole numbers.")
+    if (bytes_hard and bytes_soft > bytes_hard) or (inodes_hard and inodes_soft > inodes_hard):
+        return _error("a soft limit cannot be above its hard limit", "Raise the hard limit, or use 0 for none.")
+    fs_manager.set_quota(owner, bytes_soft, bytes_hard, inodes_soft, inodes_hard)
+    entries = fs_manager.get_quota_report(owner)
+    return _table(entries[-1:] if owner is None else entries[:1])
+
+def run(args, flags, user_context, **kwargs):
+    username = user_context.get('name')
+    is_root = username == 'root'
+    subcommand = args[0] if args else None
+
+    if subcommand == "set":
+        if not is_root:
+            return _error("only root can set quotas", "Try 'sudo quota set ...'.")
+        return _set(args[1:], flags)
+
+    if subcommand == "report":
+        if not is_root:
+            return _error("only root can report on every user", "Run 'quota' to see your own usage.")
+        return _table(fs_manager.get_quota_report())
+
+    owner = subcommand or username
+    if owner != username and not is_root:
+        return _error(f"cannot show quotas for '{owner}'", "Only root can look at other users' quotas.")
+    entries = fs_manager.get_quota_report(owner)
+    return f"Disk quotas for user {owner}:\n{_table(entries)}"
+
+def man(args, flags, user_context, **kwargs):
+    return """
+NAME
+    quota - show and set disk usage limits
+
+SYNOPSIS
+    quota [USER]
+    quota report
+    quota set USER|--vfs BYTES_SOFT BYTES_HARD [INODES_SOFT INODES_HARD]
+
+DESCRIPTION
+    Every user may be given limits on the bytes of file content and the
+    number of files, directories and links (inodes) they own, and the whole
+    file system may be given limits of its own. A write that would pass a
+    hard limit fails with "Disk quota exceeded" (or "No space left on
+    device" for the file system). Soft limits are only warnings: usage
+    above one is marked with '*'. A limit of 0 or '-' means none. root is
+    only held to the file system's limits.
+
+    Limits are kept in /etc/quota.json.
+
+    quota [USER]
+          Show your usage and limits, and the file system's. Only root can
+          name another user.
+
+    quota report
+          Show every user holding files or given limits (root only).
+
+    quota set USER|--vfs BYTES_SOFT BYTES_HARD [INODES_SOFT INODES_HARD]
+          Set a user's limits, or with --vfs the file system's (root only).
+          Sizes take a K, M or G suffix. Setting every limit to 0 removes
+          them.
+
+EXAMPLES
+    quota
+    sudo quota report
+    sudo quota set Guest 8M 10M 900 1000
+"""
+
+def help(args, flags, user_context, **kwargs):
+    return "Usage: quota [USER] | quota report | quota set USER|--vfs BYTES_SOFT BYTES_HARD [INODES_SOFT INODES_HARD]"
@@ -1,5 +1,7 @@
 # gem/core/commands/reboot.py
 
+from filesystem import fs_manager
+
 def run(args, flags, user_context, **kwargs):
     """
     Signals the front end to perform a page reload.
@@ -12,6 +14,8 @@ def run(args, flags, user_context, **kwargs):
                 "suggestion": "Simply run 'reboot' to restart the system."
             }
         }
+    # Persist any write-behind changes before the page reloads.
+    fs_manager.flush()
     return {"effect": "reboot"}
 
 def man(args, flags, user_context, **kwargs):
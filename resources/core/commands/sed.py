@@ -2,6 +2,7 @@
 
 import re
 from filesystem import fs_manager
+from text_stream import StreamError, blocks_of, join_lines, lines_in, text_of
 
 def define_flags():
     """Declares the flags that the sed command accepts."""
@@ -11,6 +12,14 @@ def define_flags():
     }
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: substitutes in each line as it is read. A bad
+    pattern only shows once there is a line to apply it to, so the error is
+    raised from inside the stream.
+    """
     if not args:
         return {
             "success": False,
@@ -35,10 +44,7 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
 
     pattern, replacement, s_flags = match.groups()
 
-    lines = []
-    if stdin_data is not None:
-        lines = stdin_data.splitlines()
-    elif file_path:
+    if lines is None and file_path:
         node = fs_manager.get_node(file_path)
         if not node:
             return {
@@ -56,27 +62,26 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                     "suggestion": "Sed can only operate on files, not directories."
                 }
             }
-        lines = node.get('content', '').splitlines()
-    else:
+        lines = blocks_of(node.get('content', ''))
+    elif lines is None:
         return ""
 
-    output_lines = []
     count = 0 if 'g' in s_flags else 1
 
-    for line in lines:
-        try:
-            new_line = re.sub(pattern, replacement, line, count=count)
-            output_lines.append(new_line)
-        except re.error as e:
-            return {
-                "success": False,
-                "error": {
-                    "message": f"sed: regex error in pattern '{pattern}': {e}",
-                    "suggestion": "Check your regular expression for syntax errors."
-                }
-            }
-
-    return "\n".join(output_lines)
+    def output_lines():
+        for line in lines_in(lines):
+            try:
+                yield re.sub(pattern, replacement, line, count=count)
+            except re.error as e:
+                raise StreamError({
+                    "success": False,
+                    "error": {
+                        "message": f"sed: regex error in pattern '{pattern}': {e}",
+                        "suggestion": "Check your regular expression for syntax errors."
+                    }
+                })
+
+    return join_lines(output_lines())
 
 def man(args, flags, user_context, **kwargs):
     return """
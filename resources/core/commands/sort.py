@@ -1,6 +1,8 @@
 # /core/commands/sort.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, nonempty, text_of
+from itertools import chain
 
 def define_flags():
     """Declares the flags that the sort command accepts."""
@@ -17,13 +19,21 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
     """
     Sorts lines of text from files or standard input.
     """
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run. Sorting needs every line before it can give
+    the first, so this only saves joining the input into one string.
+    """
+    stdin_lines = nonempty(lines)
     lines = []
     has_errors = False
     error_output = []
 
 
-    if stdin_data:
-        lines.extend(stdin_data.splitlines())
+    if stdin_lines is not None:
+        lines.extend(lines_in(stdin_lines))
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -74,12 +84,11 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 seen.add(line)
         lines = unique_lines
 
-    final_output = "\n".join(lines)
     if error_output:
         # This will likely not be hit due to the check above, but is kept for safety.
-        return "\n".join(error_output) + "\n" + final_output
+        return join_lines(chain(error_output, lines))
 
-    return final_output
+    return join_lines(lines)
 
 def man(args, flags, user_context, **kwargs):
     return """
@@ -1,6 +1,7 @@
 # gem/core/commands/storyboard.py
 
 import os
+import re
 from filesystem import fs_manager
 
 SUPPORTED_EXTENSIONS = {".md", ".txt", ".html", ".js", ".sh", ".css", ".json"}
@@ -14,39 +15,30 @@ def define_flags():
             {'name': 'ask', 'long': 'ask', 'takes_value': True},
             {'name': 'provider', 'long': 'provider', 'takes_value': True},
             {'name': 'model', 'long': 'model', 'takes_value': True},
+            {'name': 'match', 'long': 'match', 'takes_value': True},
         ],
         'metadata': {}
     }
 
-def _get_files_for_analysis(start_path, user_context):
+def _get_files_for_analysis(start_path, user_context, match=None):
     """
-    Recursively finds all supported files for analysis from a starting path.
+    Finds all supported files for analysis at or under a starting path. With
+    match, files the content index knows can't contain it are skipped.
     """
     files = []
-    visited = set()
-    start_node = fs_manager.get_node(start_path)
-
-    def recurse(current_path, node):
-        if current_path in visited: return
-        visited.add(current_path)
-        if not fs_manager.has_permission(current_path, user_context, "read"): return
-
-        if node.get('type') == 'file':
-            _, ext = os.path.splitext(current_path)
-            if ext.lower() in SUPPORTED_EXTENSIONS:
-                files.append({
-                    "name": os.path.basename(current_path),
-                    "path": current_path,
-                    "content": node.get('content', '')
-                })
-        elif node.get('type') == 'directory':
-            if not fs_manager.has_permission(current_path, user_context, "execute"): return
-            for child_name in sorted(node.get('children', {}).keys()):
-                child_path = fs_manager.get_absolute_path(os.path.join(current_path, child_name))
-                recurse(child_path, node['children'][child_name])
-
-    if start_node:
-        recurse(start_path, start_node)
+    may_match = fs_manager.content_filter(re.escape(match)) if match else None
+    for current_path, _, node, _ in fs_manager.walk(start_path, check_perms=user_context):
+        if node.get('type') != 'file' or not fs_manager.has_permission(current_path, user_context, "read", node=node):
+            continue
+        if may_match is not None and not may_match(current_path):
+            continue
+        _, ext = os.path.splitext(current_path)
+        if ext.lower() in SUPPORTED_EXTENSIONS:
+            files.append({
+                "name": os.path.basename(current_path),
+                "path": current_path,
+                "content": node.get('content', '')
+            })
     return files
 
 async def run(args, flags, user_context, stdin_data=None, ai_manager=None, api_key=None, **kwargs):
@@ -71,7 +63,11 @@ async def run(args, flags, user_context, stdin_data=None, ai_manager=None, api_k
                 files_to_analyze.append({"name": os.path.basename(path), "path": path, "content": node.get('content', '')})
     else:
         start_path = fs_manager.get_absolute_path(args[0] if args else ".")
-        files_to_analyze = _get_files_for_analysis(start_path, user_context)
+        files_to_analyze = _get_files_for_analysis(start_path, user_context, match=flags.get('match'))
+
+    if flags.get('match'):
+        matcher = re.compile(re.escape(flags['match']), re.IGNORECASE)
+        files_to_analyze = [f for f in files_to_analyze if matcher.search(str(f['content']))]
 
     if not files_to_analyze:
         return {
@@ -128,6 +124,8 @@ OPTIONS
         Specify the AI provider (e.g., 'gemini', 'ollama'). Defaults to 'ollama'.
     --model <name>
         Specify the exact model name to use for the chosen provider.
+    --match <text>
+        Only analyze files containing the text (ignoring case).
 
 EXAMPLES
     storyboard /home/guest/my_project
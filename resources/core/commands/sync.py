@@ -12,7 +12,7 @@ def run(args, flags, user_context, **kwargs):
             }
         }
     try:
-        fs_manager._save_state()
+        fs_manager.flush()
         return ""
     except Exception as e:
         return {
@@ -33,8 +33,10 @@ SYNOPSIS
 
 DESCRIPTION
     The sync utility forces a write of all buffered file system data
-    to the underlying persistent storage (IndexedDB in the browser). It is
-    useful to ensure all changes are saved before a critical operation.
+    to the underlying persistent storage (IndexedDB in the browser). When
+    the filesystem runs in write-behind mode, changes are only flushed
+    periodically; sync writes them out immediately. It is useful to ensure
+    all changes are saved before a critical operation.
 
 OPTIONS
     This command takes no options.
@@ -1,6 +1,8 @@
 # gem/core/commands/tail.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, nonempty, text_of
+from collections import deque
 
 def define_flags():
     """Declares the flags that the tail command accepts."""
@@ -14,19 +16,18 @@ def define_flags():
     }
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
-    if flags.get('follow', False):
-        return {
-            "success": False,
-            "error": {
-                "message": "tail: -f is handled by the JavaScript layer and should not reach the Python kernel.",
-                "suggestion": "The '-f' flag is a special case. It works as intended, this is an internal message."
-            }
-        }
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run. Keeps only the last lines of its input as it
+    reads it rather than the whole of it.
+    """
+    content = None
+    file_path = None
 
-    content = ""
-    if stdin_data:
-        content = stdin_data
-    elif args:
+    lines = nonempty(lines)
+    if lines is None and args:
         file_path = args[-1]
         node = fs_manager.get_node(file_path)
         if not node:
@@ -46,7 +47,8 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                 }
             }
         content = node.get('content', '')
-    else:
+        lines = blocks_of(content)
+    elif lines is None:
         return "" # No input, no output
 
     line_count_str = flags.get('lines')
@@ -56,7 +58,9 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
         try:
             byte_count = int(byte_count_str)
             if byte_count < 0: raise ValueError
-            return content[-byte_count:]
+            if content is None:
+                content = "".join(lines)
+            output = content[-byte_count:]
         except (ValueError, TypeError):
             return {
                 "success": False,
@@ -79,9 +83,19 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                         "suggestion": "Please provide a non-negative integer for the line count."
                     }
                 }
+        # A count of 0 keeps every line, as lines[-0:] did.
+        output = join_lines(deque(lines_in(lines), maxlen=line_count or None))
 
-        lines = content.splitlines()
-        return "\n".join(lines[-line_count:])
+    if flags.get('follow', False) and file_path is not None:
+        # The terminal prints the tail, then watches the file and prints
+        # whatever is appended from offset on until interrupted.
+        return {
+            "effect": "follow_file",
+            "path": fs_manager.get_absolute_path(file_path),
+            "content": text_of(output),
+            "offset": len(content)
+        }
+    return output
 
 
 def man(args, flags, user_context, **kwargs):
@@ -102,11 +116,14 @@ OPTIONS
     -c, --bytes=COUNT
           Output the last COUNT bytes.
     -f, --follow
-          Output appended data as the file grows.
+          Output appended data as the file grows, until interrupted with
+          Ctrl+C or Escape (or, in the background, until killed). Ignored
+          when reading standard input.
 
 EXAMPLES
     tail /var/log/system.log
     tail -n 20 my_notes.txt
+    tail -f /var/log/system.log
     ls -l | tail -n 5
 """
 
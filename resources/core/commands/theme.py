@@ -28,8 +28,9 @@ def _find_theme_by_name(theme_name_to_find):
     if not theme_node or theme_node.get('type') != 'directory':
         return None
 
-    for name, node in theme_node.get('children', {}).items():
+    for name in list(theme_node.get('children', {})):
         if name.endswith('.json'):
+            node = fs_manager.get_node(os.path.join(THEME_DIR, name), resolve_symlink=False)
             try:
                 theme_data = json.loads(node.get('content', '{}'))
                 if theme_data.get('name', '').lower() == theme_name_to_find.lower():
@@ -47,7 +48,8 @@ def run(args, flags, user_context, **kwargs):
         theme_node = fs_manager.get_node(THEME_DIR)
         theme_files = []
         if theme_node and theme_node.get('type') == 'directory':
-            for name, node in theme_node.get('children', {}).items():
+            for name in list(theme_node.get('children', {})):
+                node = fs_manager.get_node(os.path.join(THEME_DIR, name), resolve_symlink=False)
                 if name.endswith('.json') and node.get('type') == 'file':
                     try:
                         theme_data = json.loads(node.get('content', '{}'))
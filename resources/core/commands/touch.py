@@ -30,22 +30,18 @@ def run(args, flags, user_context, **kwargs):
 
     mtime_iso = timestamp_result["timestamp_iso"]
 
-    for path in args:
-        try:
-            node = fs_manager.get_node(path)
-            if node:
-                node['mtime'] = mtime_iso
-            else:
-                fs_manager.write_file(path, '', user_context)
-                new_node = fs_manager.get_node(path)
-                if new_node: new_node['mtime'] = mtime_iso
-        except IsADirectoryError:
-            # Touching a directory should just update its timestamp without error.
-            node['mtime'] = mtime_iso
-        except Exception as e:
-            return {"success": False, "error": f"touch: an unexpected error occurred with '{path}': {repr(e)}"}
+    # Stamped through fs_manager so the change is journaled and indexed; saved once at the end.
+    with fs_manager.batch(rollback=False):
+        for path in args:
+            try:
+                if not fs_manager.get_node(path):
+                    fs_manager.write_file(path, '', user_context)
+                fs_manager.set_mtime(path, mtime_iso)
+            except OSError as e:
+                return {"success": False, "error": {"message": f"touch: cannot touch '{path}': {e.strerror or e}", "suggestion": "Check the path and that there is room for the change; 'quota' shows your limits."}}
+            except Exception as e:
+                return {"success": False, "error": f"touch: an unexpected error occurred with '{path}': {repr(e)}"}
 
-    fs_manager._save_state()
     return ""
 
 def man(args, flags, user_context, **kwargs):
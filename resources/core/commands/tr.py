@@ -1,6 +1,8 @@
 # gem/core/commands/tr.py
 
+import re
 import string
+from text_stream import blocks_of, text_of, whole_lines
 
 def define_flags():
     """Declares the flags that the tr command accepts."""
@@ -37,7 +39,14 @@ def _expand_set(set_str):
     return expanded
 
 def run(args, flags, user_context, stdin_data=None):
-    if stdin_data is None: return ""
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: translates a block at a time, carrying the
+    last character over so -s squeezes runs that straddle two blocks.
+    """
+    if lines is None: return ""
     if not args:
         return {
             "success": False,
@@ -57,7 +66,7 @@ def run(args, flags, user_context, stdin_data=None):
         original_set1 = set(_expand_set(set1_str))
         set1_str = "".join([c for c in all_chars if c not in original_set1])
 
-    content = stdin_data
+    table = None
     if is_delete:
         if len(args) > 2 or (len(args) == 2 and not is_squeeze):
             return {
@@ -67,13 +76,12 @@ def run(args, flags, user_context, stdin_data=None):
                     "suggestion": "The -d flag only takes one set of characters to delete."
                 }
             }
-        delete_set = set(_expand_set(set1_str))
-        content = "".join([c for c in content if c not in delete_set])
+        table = str.maketrans({c: None for c in _expand_set(set1_str)})
     elif set2_str:
         set1, set2 = _expand_set(set1_str), _expand_set(set2_str)
-        translation_map = {set1[i]: (set2[i] if i < len(set2) else set2[-1]) for i in range(len(set1))}
-        content = "".join([translation_map.get(c, c) for c in content])
+        table = str.maketrans({set1[i]: (set2[i] if i < len(set2) else set2[-1]) for i in range(len(set1))})
 
+    squeeze_run = None
     if is_squeeze:
         squeeze_str = set2_str if is_delete and set2_str else (set2_str or set1_str)
         if not squeeze_str:
@@ -84,14 +92,28 @@ def run(args, flags, user_context, stdin_data=None):
                     "suggestion": "The -s flag requires a set of characters to squeeze."
                 }
             }
-        squeeze_set, squeezed_result, last_char = set(_expand_set(squeeze_str)), "", None
-        for char in content:
-            if not (char in squeeze_set and char == last_char):
-                squeezed_result += char
-            last_char = char
-        content = squeezed_result
-
-    return content
+        squeeze_set = set(_expand_set(squeeze_str))
+        if squeeze_set:
+            squeeze_run = re.compile("([" + "".join(re.escape(c) for c in sorted(squeeze_set)) + "])\\1+")
+
+    def translated():
+        last_char = None
+        for block in lines:
+            if table is not None:
+                block = block.translate(table)
+            if squeeze_run is not None and block:
+                if block[0] == last_char and last_char in squeeze_set:
+                    # The run started in the previous block, which kept its first character.
+                    block = block.lstrip(last_char)
+                    if not block:
+                        continue
+                last_char = block[-1]
+                block = squeeze_run.sub(r"\1", block)
+            yield block
+
+    # Deleting or translating line breaks moves where the lines end.
+    return whole_lines(translated())
+
 
 def man(args, flags, user_context, **kwargs):
     return """
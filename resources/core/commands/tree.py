@@ -58,26 +58,30 @@ def run(args, flags, user_context, **kwargs):
     dirs_only = flags.get('dirs-only', False)
     output, dir_count, file_count = [path_arg], 0, 0
 
-    def build_tree(node, prefix="", current_depth=0):
-        nonlocal dir_count, file_count
-        if current_depth >= max_depth: return
-
-        children = sorted(node.get('children', {}).keys())
-        for i, name in enumerate(children):
-            child_node = node['children'][name]
-            is_last = (i == len(children) - 1)
-            connector = "└── " if is_last else "├── "
-            new_prefix = prefix + ("    " if is_last else "│   ")
-
-            if child_node.get('type') == 'directory':
-                dir_count += 1
-                output.append(f"{prefix}{connector}{name}")
-                build_tree(child_node, new_prefix, current_depth + 1)
-            elif not dirs_only:
-                file_count += 1
-                output.append(f"{prefix}{connector}{name}")
-
-    build_tree(start_node)
+    entries = list(fs_manager.walk(start_path, max_depth=None if max_depth == float('inf') else max_depth))[1:]
+
+    # An entry is the last of its siblings when no later entry at its depth
+    # comes before the walk climbs back above it; one pass from the end finds them.
+    is_last = [False] * len(entries)
+    later_sibling = {}
+    for i in range(len(entries) - 1, -1, -1):
+        depth = entries[i][3]
+        is_last[i] = not later_sibling.get(depth, False)
+        later_sibling[depth] = True
+        later_sibling[depth + 1] = False
+
+    branches = []
+    for (_, name, node, depth), last in zip(entries, is_last):
+        del branches[depth - 1:]
+        prefix = "".join(branches)
+        connector = "└── " if last else "├── "
+        branches.append("    " if last else "│   ")
+        if node.get('type') == 'directory':
+            dir_count += 1
+            output.append(f"{prefix}{connector}{name}")
+        elif not dirs_only:
+            file_count += 1
+            output.append(f"{prefix}{connector}{name}")
 
     summary = f"\n{dir_count} director{'y' if dir_count == 1 else 'ies'}"
     if not dirs_only: summary += f", {file_count} file{'s' if file_count != 1 else ''}"
@@ -0,0 +1,38 @@
+# gem/core/commands/umount.py
+
+from filesystem import fs_manager
+
+def define_flags():
+    """Declares the flags that the umount command accepts."""
+    return {'flags': [], 'metadata': {}}
+
+def run(args, flags, user_context, **kwargs):
+    if len(args) != 1:
+        return {"success": False, "error": {"message": "umount: usage: umount PATH",
+                                             "suggestion": "Run 'mount' to list what is mounted."}}
+    if user_context.get('name') != 'root':
+        return {"success": False, "error": {"message": "umount: only root can unmount",
+                                             "suggestion": "Try 'sudo umount ...'."}}
+    try:
+        fs_manager.unmount_host(args[0])
+    except Exception as e:
+        return {"success": False, "error": {"message": f"umount: {e}",
+                                             "suggestion": "Run 'mount' to list what is mounted."}}
+    return ""
+
+def man(args, flags, user_context, **kwargs):
+    return """
+NAME
+    umount - detach a mounted host directory
+
+SYNOPSIS
+    umount PATH
+
+DESCRIPTION
+    Detaches the host directory mounted at PATH (see mount), leaving the
+    empty directory it was mounted on. Nothing on the host is changed.
+    Unmounting is for root only.
+"""
+
+def help(args, flags, user_context, **kwargs):
+    return "Usage: umount PATH"
@@ -1,6 +1,8 @@
 # gem/core/commands/uniq.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, join_lines, lines_in, text_of
+from itertools import chain
 
 def define_flags():
     """Declares the flags that the uniq command accepts."""
@@ -14,9 +16,13 @@ def define_flags():
     }
 
 def run(args, flags, user_context, stdin_data=None):
-    lines = []
-    if stdin_data is not None:
-        lines.extend(stdin_data.splitlines())
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """The streaming form of run: each run of equal lines goes out as soon as the next one starts."""
+    sources = []
+    if lines is not None:
+        sources.append(lines)
     elif args:
         for path in args:
             node = fs_manager.get_node(path)
@@ -36,11 +42,13 @@ def run(args, flags, user_context, stdin_data=None):
                         "suggestion": "Uniq can only process files, not directories."
                     }
                 }
-            lines.extend(node.get('content', '').splitlines())
+            sources.append(blocks_of(node.get('content', '')))
     else:
         return ""
 
-    if not lines:
+    input_lines = chain.from_iterable(lines_in(source) for source in sources)
+    first = next(input_lines, None)
+    if first is None:
         return ""
 
     is_count = flags.get('count', False)
@@ -56,25 +64,25 @@ def run(args, flags, user_context, stdin_data=None):
             }
         }
 
-    output_lines = []
-    if len(lines) > 0:
-        last_line, count = lines[0], 1
-        for i in range(1, len(lines)):
-            if lines[i] == last_line:
+    def output_lines():
+        last_line, count = first, 1
+        for line in input_lines:
+            if line == last_line:
                 count += 1
             else:
                 if (is_repeated and count > 1) or \
                         (is_unique and count == 1) or \
                         (not is_repeated and not is_unique):
-                    output_lines.append(f"{str(count).rjust(7)} {last_line}" if is_count else last_line)
-                last_line, count = lines[i], 1
+                    yield f"{str(count).rjust(7)} {last_line}" if is_count else last_line
+                last_line, count = line, 1
 
         if (is_repeated and count > 1) or \
                 (is_unique and count == 1) or \
                 (not is_repeated and not is_unique):
-            output_lines.append(f"{str(count).rjust(7)} {last_line}" if is_count else last_line)
+            yield f"{str(count).rjust(7)} {last_line}" if is_count else last_line
+
+    return join_lines(output_lines())
 
-    return "\n".join(output_lines)
 
 def man(args, flags, user_context, stdin_data=None):
     return """
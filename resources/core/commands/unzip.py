@@ -4,6 +4,7 @@ import io
 import zipfile
 import os
 from filesystem import fs_manager
+from binary_content import as_content, content_bytes, is_binary
 import base64
 
 def run(args, flags, user_context, **kwargs):
@@ -30,8 +31,9 @@ def run(args, flags, user_context, **kwargs):
         }
 
     try:
-        b64_content = archive_node.get('content', '')
-        zip_bytes = base64.b64decode(b64_content)
+        zip_bytes = content_bytes(archive_node)
+        if not is_binary(archive_node) and not zipfile.is_zipfile(io.BytesIO(zip_bytes)):
+            zip_bytes = base64.b64decode(zip_bytes) # An archive from before zip wrote binary files.
         zip_buffer = io.BytesIO(zip_bytes)
     except Exception:
         return {
@@ -44,7 +46,7 @@ def run(args, flags, user_context, **kwargs):
 
     output_messages = []
     try:
-        with zipfile.ZipFile(zip_buffer, 'r') as zipf:
+        with zipfile.ZipFile(zip_buffer, 'r') as zipf, fs_manager.batch():
             file_list = sorted(zipf.infolist(), key=lambda f: f.filename)
 
             for member in file_list:
@@ -61,9 +63,7 @@ def run(args, flags, user_context, **kwargs):
                 if member.is_dir():
                     fs_manager.create_directory(dest_path, user_context, parents=True)
                 else:
-                    content_bytes = zipf.read(member)
-                    content_str = content_bytes.decode('utf-8', 'replace')
-                    fs_manager.write_file(dest_path, content_str, user_context)
+                    fs_manager.write_file(dest_path, as_content(zipf.read(member)), user_context)
 
         return f"Archive:  {archive_path}\n" + '\n'.join(output_messages)
 
@@ -88,7 +88,8 @@ SYNOPSIS
 DESCRIPTION
     The unzip utility will extract files from a ZIP archive created by the 'zip'
     command. If a destination directory is specified, files will be extracted
-    there; otherwise, they are extracted to the current directory.
+    there; otherwise, they are extracted to the current directory. Members
+    that are not UTF-8 text are extracted as binary files, byte for byte.
 
 OPTIONS
     This command takes no options.
@@ -1,6 +1,7 @@
 # gem/core/commands/wc.py
 
 from filesystem import fs_manager
+from text_stream import blocks_of, text_of
 
 def define_flags():
     """Declares the flags that the wc command accepts."""
@@ -21,6 +22,13 @@ def _count_content(content):
     return lines, words, bytes_count
 
 def run(args, flags, user_context, stdin_data=None):
+    return text_of(run_stream(blocks_of(stdin_data), args, flags, user_context))
+
+def run_stream(lines, args, flags, user_context, **kwargs):
+    """
+    The streaming form of run: standard input is counted a block at a time.
+    Blocks end at line breaks, so their counts add up to the whole's.
+    """
     show_lines = flags.get('lines', False)
     show_words = flags.get('words', False)
     show_bytes = flags.get('bytes', False)
@@ -41,12 +49,17 @@ def run(args, flags, user_context, stdin_data=None):
         if name: parts.append(f" {name}")
         return "".join(parts)
 
-    sources = args if args else ([] if stdin_data is None else ['stdin'])
+    sources = args if args else ([] if lines is None else ['stdin'])
+    stdin_blocks = lines
 
     for source in sources:
         lines, words, bytes_count = 0, 0, 0
         if source == 'stdin':
-            lines, words, bytes_count = _count_content(stdin_data)
+            for block in stdin_blocks:
+                block_lines, block_words, block_bytes = _count_content(block)
+                lines += block_lines
+                words += block_words
+                bytes_count += block_bytes
             output_lines.append(format_output(lines, words, bytes_count))
         else:
             node = fs_manager.get_node(source)
@@ -1,6 +1,25 @@
 # gem/core/commands/xor.py
 
 from filesystem import fs_manager
+from binary_content import as_content, content_bytes
+
+def define_flags():
+    """Declares the flags that the xor command accepts."""
+    return {
+        'flags': [
+            {'name': 'output', 'short': 'o', 'long': 'output', 'takes_value': True},
+        ],
+        'metadata': {}
+    }
+
+def _xor(data, key_bytes):
+    """data XORed with key_bytes repeated, done as one big-integer XOR rather than byte by byte."""
+    if not data:
+        return b""
+    repeats = len(data) // len(key_bytes) + 1
+    key_stream = (key_bytes * repeats)[:len(data)]
+    result = int.from_bytes(data, 'big') ^ int.from_bytes(key_stream, 'big')
+    return result.to_bytes(len(data), 'big')
 
 def run(args, flags, user_context, stdin_data=None, **kwargs):
     if not args:
@@ -26,9 +45,8 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
         }
 
 
-    content = ""
     if stdin_data is not None:
-        content = stdin_data
+        data = str(stdin_data or "").encode('utf-8')
     elif file_path:
         node = fs_manager.get_node(file_path)
         if not node:
@@ -47,7 +65,7 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
                     "suggestion": "The xor command can only operate on files."
                 }
             }
-        content = node.get('content', '')
+        data = content_bytes(node)
     else:
         return {
             "success": False,
@@ -57,13 +75,20 @@ def run(args, flags, user_context, stdin_data=None, **kwargs):
             }
         }
 
-    string_content = str(content or "")
+    result_bytes = _xor(data, key.encode('utf-8'))
 
-    key_bytes = key.encode('utf-8')
-    content_bytes = string_content.encode('utf-8')
-    key_len = len(key_bytes)
-
-    result_bytes = bytearray(byte ^ key_bytes[i % key_len] for i, byte in enumerate(content_bytes))
+    if flags.get('output'):
+        try:
+            fs_manager.write_file(flags['output'], as_content(result_bytes), user_context)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": {
+                    "message": f"xor: {flags['output']}: cannot write file",
+                    "suggestion": f"An unexpected error occurred: {repr(e)}"
+                }
+            }
+        return ""
 
     try:
         return result_bytes.decode('utf-8')
@@ -78,7 +103,7 @@ NAME
     xor - perform XOR encryption/decryption
 
 SYNOPSIS
-    xor KEY [FILE]
+    xor [-o OUTFILE] KEY [FILE]
 
 DESCRIPTION
     Encrypts or decrypts the given FILE or standard input using a repeating
@@ -86,13 +111,19 @@ DESCRIPTION
     running it a second time with the same key will decrypt the content. This
     is a simple cipher and should not be used for serious security.
 
+    Binary files are XORed byte for byte. Printed output that is not UTF-8
+    is shown one character per byte; use -o to keep the exact bytes.
+
 OPTIONS
-    This command takes no options.
+    -o, --output=OUTFILE
+          Write the result to OUTFILE instead of printing it. A result that
+          is not UTF-8 text makes OUTFILE a binary file.
 
 EXAMPLES
     echo "secret message" | xor mykey > encrypted.txt
     cat encrypted.txt | xor mykey
+    xor -o photo.xor mykey photo.png
 """
 
 def help(args, flags, user_context, **kwargs):
-    return "Usage: xor KEY [FILE]"
\ No newline at end of file
+    return "Usage: xor [-o OUTFILE] KEY [FILE]"
\ No newline at end of file
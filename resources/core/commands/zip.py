@@ -5,7 +5,7 @@ import zipfile
 import os
 from filesystem import fs_manager
 from datetime import datetime
-import base64
+from binary_content import content_bytes
 
 def define_flags():
     """Declares the flags that the zip command accepts."""
@@ -24,7 +24,7 @@ def _add_to_zip(zipf, path, archive_path=""):
     current_archive_name = os.path.join(archive_path, os.path.basename(path))
 
     if node['type'] == 'file':
-        zipf.writestr(current_archive_name, node.get('content', '').encode('utf-8'))
+        zipf.writestr(current_archive_name, content_bytes(node))
     elif node['type'] == 'directory':
         # For directories, recursively add their children.
         # An explicit directory entry is often not needed if it contains files,
@@ -55,10 +55,8 @@ def run(args, flags, user_context, **kwargs):
             # We start with an empty archive path for the top-level items.
             _add_to_zip(zipf, path, archive_path="")
 
-    zip_content_b64 = base64.b64encode(in_memory_zip.getvalue()).decode('utf-8')
-
     try:
-        fs_manager.write_file(archive_name, zip_content_b64, user_context)
+        fs_manager.write_file(archive_name, in_memory_zip.getvalue(), user_context)
         # Generate a more realistic output message.
         output_lines = [f"  adding: {p} (deflated 0%)" for p in source_paths]
         return "\n".join(output_lines)
@@ -83,7 +81,8 @@ SYNOPSIS
 DESCRIPTION
     zip is a compression and file packaging utility. It puts one or more
     files into a single zip archive. Directories are archived recursively.
-    The resulting archive is base64-encoded to be stored as a text file.
+    The archive is stored as a binary file; binary files going into it are
+    archived byte for byte, and text files as UTF-8.
 
 OPTIONS
     This command takes no options.
@@ -0,0 +1,221 @@
+# gem/core/compact_nodes.py
+
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from lazy_image import LazyContent
+from binary_content import LazyBinary
+from mounts import MOUNT_KEY
+
+_EPOCH = datetime(1970, 1, 1)
+_MISSING = object()
+
+
+def iso_to_micros(value):
+    """Turns an ISO mtime ('...Z') into integer microseconds since the epoch, or returns it untouched if it won't parse."""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def micros_to_iso(value):
+    if not isinstance(value, int):
+        return value
+    return (_EPOCH + timedelta(microseconds=value)).isoformat() + "Z"
+
+
+class CompactNode(MutableMapping):
+    """
+    A VFS node stored in slots rather than a dict. It reads and writes like the
+    dict it replaces (node.get('content'), node['mode'] = ..., 'target' in node),
+    but owner/group strings are interned and mtime is kept as integer
+    microseconds, converted to and from the usual ISO string on access.
+    Keys without a slot land in a small overflow dict.
+    """
+    __slots__ = ('owner', 'group', 'mode', '_mtime', '_extra')
+    type = None
+    _fields = ('owner', 'group', 'mode')
+
+    def __init__(self, data=()):
+        self._extra = None
+        fields = self._fields
+        for key, value in dict(data).items():
+            if key in ('owner', 'group'):
+                setattr(self, key, sys.intern(str(value)))
+            elif key in fields:
+                setattr(self, key, value)
+            elif key == 'mtime':
+                self._mtime = iso_to_micros(value)
+            elif key != 'type':
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[key] = value
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.type
+        if key == 'mtime':
+            value = getattr(self, '_mtime', _MISSING)
+            if value is _MISSING:
+                raise KeyError(key)
+            return micros_to_iso(value)
+        if key in self._fields:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if key == 'type':
+            if value != self.type:
+                raise TypeError(f"Cannot change a {self.type} node into a {value}")
+        elif key == 'mtime':
+            self._mtime = iso_to_micros(value)
+        elif key in ('owner', 'group'):
+            setattr(self, key, sys.intern(str(value)))
+        elif key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key == 'type':
+            raise TypeError("Cannot delete a node's type")
+        slot = '_mtime' if key == 'mtime' else key
+        if key == 'mtime' or key in self._fields:
+            if getattr(self, slot, _MISSING) is _MISSING:
+                raise KeyError(key)
+            delattr(self, slot)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+            if not self._extra:
+                self._extra = None
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        yield 'type'
+        for key in self._fields:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                yield key
+        if getattr(self, '_mtime', _MISSING) is not _MISSING:
+            yield 'mtime'
+        if self._extra is not None:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def copy(self):
+        """A shallow copy, like dict.copy(); children/content are shared, not duplicated."""
+        clone = type(self).__new__(type(self))
+        for slot in self._all_slots():
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                setattr(clone, slot, value)
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    @classmethod
+    def _all_slots(cls):
+        return [slot for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ())]
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+
+class FileNode(CompactNode):
+    __slots__ = ('content', 'content_hash')
+    type = 'file'
+    _fields = ('owner', 'group', 'mode', 'content', 'content_hash')
+
+
+class DirectoryNode(CompactNode):
+    __slots__ = ('children', 'total_size', 'file_count')
+    type = 'directory'
+    _fields = ('owner', 'group', 'mode', 'children', 'total_size', 'file_count')
+
+
+class SymlinkNode(CompactNode):
+    __slots__ = ('target',)
+    type = 'symlink'
+    _fields = ('owner', 'group', 'mode', 'target')
+
+
+NODE_CLASSES = {cls.type: cls for cls in (FileNode, DirectoryNode, SymlinkNode)}
+
+
+def compact_node(data):
+    """Builds the compact node for a node dict; anything that isn't a node dict comes back unchanged."""
+    node_type = data.get('type') if isinstance(data, dict) else None
+    node_class = NODE_CLASSES.get(node_type) if isinstance(node_type, str) else None
+    return node_class(data) if node_class else data
+
+
+def compact_tree(root):
+    """Converts a whole (dict) tree to compact nodes, returning the new root."""
+    new_root = compact_node(root)
+    stack = [new_root]
+    while stack:
+        node = stack.pop()
+        # A mounted directory's children live on the host; the tree only holds the mount point.
+        children = node.get('children') if node.get('type') == 'directory' and MOUNT_KEY not in node else None
+        if children:
+            for name, child in children.items():
+                children[name] = compact_node(child)
+                stack.append(children[name])
+    return new_root
+
+
+def expand_tree(root):
+    """The inverse of compact_tree: plain dicts all the way down."""
+    new_root = root.to_dict() if isinstance(root, CompactNode) else root
+    stack = [new_root]
+    while stack:
+        node = stack.pop()
+        children = node.get('children') if node.get('type') == 'directory' and MOUNT_KEY not in node else None
+        if children:
+            for name, child in children.items():
+                if isinstance(child, CompactNode):
+                    children[name] = child.to_dict()
+                stack.append(children[name])
+    return new_root
+
+
+def json_default(obj):
+    """json.dumps(default=...) hook so compact nodes and lazily loaded contents serialize like the dicts and strings they replace."""
+    if isinstance(obj, CompactNode):
+        return obj.to_dict()
+    if isinstance(obj, LazyBinary):
+        return obj.saved()
+    if isinstance(obj, LazyContent):
+        return obj.value()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
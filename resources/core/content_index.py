@@ -0,0 +1,266 @@
+# gem/core/content_index.py
+
+import re
+import time
+from array import array
+from name_index import iter_tree, join_path
+
+TOKEN_RE = re.compile(r'\w+')
+MIN_PIECE_LENGTH = 3 # shorter pieces of a pattern match too many tokens to narrow anything
+# Rough CPython costs used to keep the index under its memory cap.
+POSTING_BYTES = array('L').itemsize + 1 # one generation in a token's array, with some slack for growth
+TOKEN_BYTES = 150 # a vocabulary entry: the string, its dict slot and an empty array
+MIN_COMPACT_GENERATIONS = 256
+# re.IGNORECASE treats 'I', dotless 'ı' and dotted 'İ' as the same letter, but
+# casefold() keeps 'ı' and turns 'İ' into 'i' plus a combining dot.
+_FOLD_EXTRA = str.maketrans({'\u0131': 'i', '\u0307': None})
+
+
+def fold(text):
+    """Case-folds text the way the index stores it; matching under re.IGNORECASE survives it."""
+    return text.casefold().translate(_FOLD_EXTRA)
+
+
+def _skip_quantifier(pattern, i):
+    """Index just past the quantifier starting at pattern[i], including a lazy/possessive suffix."""
+    if pattern[i] == '{':
+        close = pattern.find('}', i)
+        i = close + 1 if close != -1 else i + 1
+    else:
+        i += 1
+    if i < len(pattern) and pattern[i] in '?+':
+        i += 1
+    return i
+
+
+def required_literals(pattern):
+    """
+    Strings that must appear in any line the regular expression matches, or
+    None when it can't be told cheaply (alternation and groups). Classes,
+    anchors, wildcards and optional characters just split the literal runs.
+    """
+    runs, current, i, n = [], [], 0, len(pattern)
+
+    def flush():
+        if current:
+            runs.append(''.join(current))
+            current.clear()
+
+    while i < n:
+        char = pattern[i]
+        if char in '|()':
+            return None
+        if char in '*?+{':
+            flush()
+            i = _skip_quantifier(pattern, i)
+            continue
+        if char in '.^$':
+            flush()
+            i += 1
+            continue
+        if char == '[':
+            flush()
+            j = i + 1
+            if j < n and pattern[j] == '^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 2 if pattern[j] == '\\' else 1
+            i = j + 1
+            continue
+        if char == '\\':
+            if i + 1 >= n or pattern[i + 1].isalnum():
+                flush() # \d, \b, \1 and friends
+                i += 2
+                continue
+            literal, i = pattern[i + 1], i + 2
+        else:
+            literal, i = char, i + 1
+        if i < n and pattern[i] in '*?{':
+            flush() # The character is optional.
+            i = _skip_quantifier(pattern, i)
+        elif i < n and pattern[i] == '+':
+            current.append(literal)
+            flush()
+            i = _skip_quantifier(pattern, i)
+        else:
+            current.append(literal)
+    flush()
+    return runs
+
+
+def required_pieces(pattern):
+    """
+    The word pieces (runs of \\w, folded) of a pattern's required literals that
+    are long enough to look up, or None if there are none. Each piece of a
+    literal sits inside some word of any text containing that literal.
+    """
+    literals = required_literals(pattern)
+    if literals is None:
+        return None
+    pieces = {piece for literal in literals for piece in TOKEN_RE.findall(fold(literal)) if len(piece) >= MIN_PIECE_LENGTH}
+    return pieces or None
+
+
+class ContentIndex:
+    """
+    An inverted index from the words in file contents to the files holding
+    them, used to rule files out before a regex scan. Files are keyed by
+    canonical path. Each (re)indexing of a file gets a fresh generation number
+    and the postings are arrays of generations, only ever appended to and so
+    kept in ascending order; rewriting, moving or removing a file only has to
+    retire or re-key its generation, and postings of retired generations are
+    purged in bulk by compact(). Changed files wait in a
+    pending set until index_pending() gets to them, and are treated as possible
+    matches until then. Once the estimated size reaches max_bytes, further
+    files are left unindexed (and so always scanned) rather than evicting.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._docs = {} # path -> generation its current content is indexed under
+        self._postings = {} # token -> array of generations
+        self._retired = set() # generations still in postings but no longer any file's
+        self._pending = set() # paths whose content is not indexed yet
+        self._next_generation = 0
+        self._posting_count = 0
+        self._token_chars = 0
+        self.capped = False
+
+    def estimated_bytes(self):
+        return self._posting_count * POSTING_BYTES + len(self._postings) * TOKEN_BYTES + self._token_chars
+
+    def _retire(self, path):
+        generation = self._docs.pop(path, None)
+        if generation is not None:
+            self._retired.add(generation)
+
+    def mark(self, path):
+        """Records that the file at path has new content."""
+        self._retire(path)
+        self._pending.add(path)
+
+    def forget(self, path):
+        self._retire(path)
+        self._pending.discard(path)
+
+    def add_tree(self, parent, name, node):
+        for directory, entry_name, entry in iter_tree(parent, name, node):
+            if entry.get('type') == 'file':
+                self.mark(join_path(directory, entry_name))
+
+    def discard_tree(self, parent, name, node):
+        for directory, entry_name, entry in iter_tree(parent, name, node):
+            if entry.get('type') == 'file':
+                self.forget(join_path(directory, entry_name))
+
+    def move_tree(self, old_parent, old_name, new_parent, new_name, node):
+        """Re-keys the files under a moved node; their contents, and so their postings, are unchanged."""
+        old_root, new_root = join_path(old_parent, old_name), join_path(new_parent, new_name)
+        for directory, entry_name, entry in iter_tree(old_parent, old_name, node):
+            if entry.get('type') != 'file':
+                continue
+            old_path = join_path(directory, entry_name)
+            new_path = new_root + old_path[len(old_root):]
+            generation = self._docs.pop(old_path, None)
+            if generation is not None:
+                self._docs[new_path] = generation
+            if old_path in self._pending:
+                self._pending.discard(old_path)
+                self._pending.add(new_path)
+
+    def _index_file(self, path, content):
+        tokens = set(TOKEN_RE.findall(fold(content)))
+        new_tokens = [token for token in tokens if token not in self._postings]
+        growth = len(tokens) * POSTING_BYTES + len(new_tokens) * TOKEN_BYTES + sum(map(len, new_tokens))
+        if self.estimated_bytes() + growth > self.max_bytes:
+            self.compact()
+            if self.estimated_bytes() + growth > self.max_bytes:
+                self.capped = True
+                return False
+        generation = self._next_generation
+        self._next_generation += 1
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array('L')
+                self._token_chars += len(token)
+            postings.append(generation)
+        self._posting_count += len(tokens)
+        self._docs[path] = generation
+        return True
+
+    def index_pending(self, read_content, time_budget=None):
+        """
+        Indexes pending files, reading each through read_content(path) (None
+        for anything that is no longer a file). Stops after time_budget seconds
+        if given. Returns True if work is left that another call could do.
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        self.capped = False
+        if len(self._retired) > max(len(self._docs), MIN_COMPACT_GENERATIONS):
+            self.compact() # More of the postings are dead than alive.
+        while self._pending:
+            path = self._pending.pop()
+            content = read_content(path)
+            if content is None:
+                continue
+            if not self._index_file(path, content):
+                self._pending.add(path)
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return bool(self._pending)
+
+    def compact(self):
+        """Drops retired generations from the postings."""
+        if not self._retired:
+            return
+        retired = self._retired
+        for token, postings in list(self._postings.items()):
+            live = array('L', [generation for generation in postings if generation not in retired])
+            if live:
+                self._postings[token] = live
+            else:
+                del self._postings[token]
+        self._retired = set()
+        self._posting_count = sum(map(len, self._postings.values()))
+        self._token_chars = sum(map(len, self._postings))
+
+    def filter(self, pattern):
+        """
+        A predicate saying whether the file at a path may contain a line the
+        regular expression pattern matches (with or without re.IGNORECASE), or
+        None when the index can't narrow the search for this pattern.
+        """
+        pieces = required_pieces(pattern)
+        if pieces is None:
+            return None
+        matching = None
+        for piece in sorted(pieces, key=len, reverse=True):
+            generations = set(self._postings.get(piece, ()))
+            for token, postings in self._postings.items():
+                if piece in token and token != piece:
+                    generations.update(postings)
+            matching = generations if matching is None else matching & generations
+            if not matching:
+                break
+        docs = self._docs
+
+        def may_contain(path):
+            generation = docs.get(path)
+            return generation is None or generation in matching
+        return may_contain
+
+    def stats(self):
+        return {
+            "files": len(self._docs),
+            "pending": len(self._pending),
+            "tokens": len(self._postings),
+            "postings": self._posting_count,
+            "retired_generations": len(self._retired),
+            "estimated_bytes": self.estimated_bytes(),
+            "max_bytes": self.max_bytes,
+            "capped": self.capped
+        }
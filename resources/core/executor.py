@@ -7,12 +7,16 @@ from filesystem import fs_manager
 from users import user_manager
 from groups import group_manager
 from session import alias_manager, env_manager
+from text_stream import StreamError, blocks_of, is_stream, text_of
 import inspect
 import os
 import re
-import fnmatch
 import asyncio
 import traceback
+from collections import OrderedDict
+
+DEFAULT_PARSE_CACHE_SIZE = 256
+GLOB_CHARACTERS = ('*', '?')
 
 class CommandExecutor:
     def __init__(self):
@@ -20,6 +24,16 @@ class CommandExecutor:
         self.commands = self._discover_commands()
         self.user_context = {"name": "Guest"}
         self._flag_def_cache = {}
+        # Two LRU caches in front of the parser. The first maps a raw command
+        # string (with the alias generation it was resolved under) to the
+        # string after brace expansion and alias resolution; the second maps
+        # a fully expanded string to its parsed pipelines. $VAR, $(...) and
+        # globs depend on state that changes between runs, so they are bound
+        # afresh every time, between and after the two.
+        self._alias_cache = OrderedDict()
+        self._parse_cache = OrderedDict()
+        self._parse_cache_size = DEFAULT_PARSE_CACHE_SIZE
+        self._parse_cache_counts = {"alias_hits": 0, "alias_misses": 0, "parse_hits": 0, "parse_misses": 0}
         self.ai_manager = None
         self.js_native_commands = set()
 
@@ -68,17 +82,64 @@ class CommandExecutor:
         self._flag_def_cache[command_name] = {}
         return {}
 
+    def set_parse_cache_size(self, size):
+        self._parse_cache_size = max(0, int(size))
+        for cache in (self._alias_cache, self._parse_cache):
+            while len(cache) > self._parse_cache_size:
+                cache.popitem(last=False)
+        return True
+
+    def clear_parse_cache(self):
+        self._alias_cache.clear()
+        self._parse_cache.clear()
+        return True
+
+    def get_parse_cache_stats(self):
+        counts = self._parse_cache_counts
+        alias_lookups = counts["alias_hits"] + counts["alias_misses"]
+        parse_lookups = counts["parse_hits"] + counts["parse_misses"]
+        return {
+            "alias_hits": counts["alias_hits"],
+            "alias_misses": counts["alias_misses"],
+            "alias_hit_rate": (counts["alias_hits"] / alias_lookups) if alias_lookups else 0.0,
+            "parse_hits": counts["parse_hits"],
+            "parse_misses": counts["parse_misses"],
+            "parse_hit_rate": (counts["parse_hits"] / parse_lookups) if parse_lookups else 0.0,
+            "alias_size": len(self._alias_cache),
+            "parse_size": len(self._parse_cache),
+            "capacity": self._parse_cache_size,
+            "alias_generation": alias_manager.generation
+        }
+
+    def _cache_lookup(self, cache, key, kind):
+        entry = cache.get(key)
+        if entry is None:
+            self._parse_cache_counts[f"{kind}_misses"] += 1
+            return None
+        cache.move_to_end(key)
+        self._parse_cache_counts[f"{kind}_hits"] += 1
+        return entry
+
+    def _cache_store(self, cache, key, entry):
+        if self._parse_cache_size:
+            cache[key] = entry
+            if len(cache) > self._parse_cache_size:
+                cache.popitem(last=False)
+        return entry
+
+    def _has_glob(self, part):
+        return any(ch in part for ch in GLOB_CHARACTERS) or ('[' in part and ']' in part)
+
     def _parts_to_segment(self, segment_parts):
         if not segment_parts:
             return None
+        return self._parse_flags(segment_parts[0], self._expand_globs(segment_parts[1:]))
 
-        command_name = segment_parts[0]
-        raw_args_and_flags = segment_parts[1:]
-
+    def _expand_globs(self, raw_args_and_flags):
         # Wildcard Expansion (Globbing)
         expanded_parts = []
         for part in raw_args_and_flags:
-            if '*' in part or '?' in part or ('[' in part and ']' in part):
+            if self._has_glob(part):
                 path_prefix, pattern_part = os.path.split(part)
                 if not path_prefix: path_prefix = '.'
 
@@ -86,10 +147,9 @@ class CommandExecutor:
                 dir_node = self.fs_manager.get_node(search_dir_abs)
 
                 if dir_node and dir_node.get('type') == 'directory':
-                    children_names = dir_node.get('children', {}).keys()
-                    matches = fnmatch.filter(children_names, pattern_part)
+                    matches = self.fs_manager.glob_children(search_dir_abs, dir_node, pattern_part)
                     if matches:
-                        for name in sorted(matches):
+                        for name in matches:
                             expanded_parts.append(os.path.join(path_prefix, name) if path_prefix != '.' else name)
                     else:
                         expanded_parts.append(part) # No match, pass the glob pattern literally
@@ -97,7 +157,9 @@ class CommandExecutor:
                     expanded_parts.append(part)
             else:
                 expanded_parts.append(part)
+        return expanded_parts
 
+    def _parse_flags(self, command_name, expanded_parts):
         parts_to_process = [command_name] + expanded_parts
         raw_definitions = self._get_command_flag_definitions(command_name)
 
@@ -197,6 +259,59 @@ class CommandExecutor:
         return [segment]
 
     async def _preprocess_command_string(self, command_string, js_context_json):
+        key = (command_string, alias_manager.generation)
+        resolved = self._cache_lookup(self._alias_cache, key, "alias")
+        if resolved is None:
+            resolved = self._cache_store(self._alias_cache, key, self._resolve_aliases(command_string))
+        command_string = resolved
+        if '$' not in command_string:
+            return command_string
+
+        # Environment Variable Expansion
+        def replace_var(match):
+            var_name = match.group(1) or match.group(2)
+            return env_manager.get(var_name) or ""
+
+        parts = command_string.split("'")
+        result_parts = []
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                expanded_part = re.sub(r'\$([a-zA-Z_][a-zA-Z0-9_]*)|\$\{([a-zA-Z_][a-zA-Z0-9_]*)\}', replace_var, part)
+                result_parts.append(expanded_part)
+            else:
+                result_parts.append(part)
+        command_string = "'".join(result_parts)
+
+        # Command Substitution
+        pattern = re.compile(r'\$\((.*?)\)', re.DOTALL)
+        match = pattern.search(command_string)
+        while match:
+            sub_command = match.group(1)
+            sub_result = await self.execute_result(sub_command, js_context_json)
+            if sub_result.get("success"):
+                # Shell-like behavior: strip trailing newlines; replace embedded newlines with spaces
+                output = str(sub_result.get("output", ""))
+                # Normalize Windows CRLF and Unix LF
+                output = output.replace('\r\n', '\n').replace('\r', '\n')
+                # Remove trailing newlines
+                output = output.rstrip('\n')
+                # Replace remaining newlines with spaces
+                output = output.replace('\n', ' ')
+                # If substitution occurs immediately after '=', treat as a single assignment value by quoting
+                before_idx = match.start() - 1
+                if before_idx >= 0 and command_string[before_idx] == '=':
+                    # Escape any double quotes in the output
+                    safe_output = output.replace('"', '\\"')
+                    replacement = f'"{safe_output}"'
+                else:
+                    replacement = output
+                command_string = command_string[:match.start()] + replacement + command_string[match.end():]
+            else:
+                raise ValueError(f"Command substitution failed: {sub_result.get('error')}")
+            match = pattern.search(command_string)
+        return command_string
+
+    def _resolve_aliases(self, command_string):
         # Brace Expansion (quote-aware)
         if '{' in command_string and '}' in command_string:
             def _split_preserving_quotes(s):
@@ -244,53 +359,53 @@ class CommandExecutor:
             if alias_value:
                 remaining_args = ' '.join(parts[1:])
                 command_string = f"{alias_value} {remaining_args}".strip()
+        return command_string
 
-        # Environment Variable Expansion
-        def replace_var(match):
-            var_name = match.group(1) or match.group(2)
-            return env_manager.get(var_name) or ""
+    def _parse_command_string(self, command_string):
+        """
+        (assignments, pipelines) for an expanded command string, from the
+        parse cache when it has been seen before. assignments is the list of
+        (name, value) pairs when the string is nothing but VAR=value words,
+        else None; the pipelines are templates for _bind_pipeline.
+        """
+        entry = self._cache_lookup(self._parse_cache, command_string, "parse")
+        if entry is None:
+            assignments = self._parse_assignments(command_string)
+            pipelines = self._parse_pipelines(command_string) if assignments is None else []
+            entry = self._cache_store(self._parse_cache, command_string, (assignments, pipelines))
+        return entry
+
+    def _parse_assignments(self, command_string):
+        # Standalone variable assignment(s) (e.g., VAR=value [VAR2=value ...])
+        try:
+            parts = shlex.split(command_string)
+        except ValueError as e:
+            raise ValueError(f"Syntax error in command: {e}")
+        if parts and all(re.match(r'^[A-Za-z_][A-Za-z0-9_]*=', tok) for tok in parts):
+            return [tuple(tok.split('=', 1)) for tok in parts]
+        return None
+
+    def _segment_template(self, segment_parts):
+        """
+        Parses a segment's flags now, unless globbing could change its
+        arguments, in which case the parts are kept for _bind_segment.
+        """
+        if not segment_parts:
+            return None
+        if any(self._has_glob(part) for part in segment_parts[1:]):
+            return {'parts': segment_parts}
+        return self._parse_flags(segment_parts[0], segment_parts[1:])
 
-        parts = command_string.split("'")
-        result_parts = []
-        for i, part in enumerate(parts):
-            if i % 2 == 0:
-                expanded_part = re.sub(r'\$([a-zA-Z_][a-zA-Z0-9_]*)|\$\{([a-zA-Z_][a-zA-Z0-9_]*)\}', replace_var, part)
-                result_parts.append(expanded_part)
-            else:
-                result_parts.append(part)
-        command_string = "'".join(result_parts)
+    def _bind_pipeline(self, pipeline):
+        """A runnable copy of a cached pipeline: globs expanded, args and flags the command's own to change."""
+        return {**pipeline, 'segments': [self._bind_segment(segment) for segment in pipeline['segments']]}
 
-        # Command Substitution
-        pattern = re.compile(r'\$\((.*?)\)', re.DOTALL)
-        match = pattern.search(command_string)
-        while match:
-            sub_command = match.group(1)
-            sub_result_json = await self.execute(sub_command, js_context_json)
-            sub_result = json.loads(sub_result_json)
-            if sub_result.get("success"):
-                # Shell-like behavior: strip trailing newlines; replace embedded newlines with spaces
-                output = str(sub_result.get("output", ""))
-                # Normalize Windows CRLF and Unix LF
-                output = output.replace('\r\n', '\n').replace('\r', '\n')
-                # Remove trailing newlines
-                output = output.rstrip('\n')
-                # Replace remaining newlines with spaces
-                output = output.replace('\n', ' ')
-                # If substitution occurs immediately after '=', treat as a single assignment value by quoting
-                before_idx = match.start() - 1
-                if before_idx >= 0 and command_string[before_idx] == '=':
-                    # Escape any double quotes in the output
-                    safe_output = output.replace('"', '\\"')
-                    replacement = f'"{safe_output}"'
-                else:
-                    replacement = output
-                command_string = command_string[:match.start()] + replacement + command_string[match.end():]
-            else:
-                raise ValueError(f"Command substitution failed: {sub_result.get('error')}")
-            match = pattern.search(command_string)
-        return command_string
+    def _bind_segment(self, segment):
+        if 'parts' in segment:
+            return self._parts_to_segment(segment['parts'])
+        return {'command': segment['command'], 'args': list(segment['args']), 'flags': dict(segment['flags'])}
 
-    def _parse_command_string(self, command_string):
+    def _parse_pipelines(self, command_string):
         # Use a negative lookbehind `(?<!\\)` to avoid splitting on escaped semicolons (`\;`),
         # while still respecting quoted strings. This is the key fix.
         commands_raw = re.split(r'''(?<!\\);(?=(?:[^'"]|'[^']*'|"[^"]*")*$)''', command_string)
@@ -344,14 +459,14 @@ class CommandExecutor:
                 segments, current_segment_parts = [], []
                 for part in command_parts:
                     if part == '|':
-                        segment = self._parts_to_segment(current_segment_parts)
+                        segment = self._segment_template(current_segment_parts)
                         if not segment: raise ValueError("Syntax error: invalid null command.")
                         segments.append(segment)
                         current_segment_parts = []
                     else:
                         current_segment_parts.append(part)
 
-                final_segment = self._parts_to_segment(current_segment_parts)
+                final_segment = self._segment_template(current_segment_parts)
                 if final_segment: segments.append(final_segment)
 
                 is_background = sub_cmd['operator'] == '&'
@@ -362,6 +477,14 @@ class CommandExecutor:
 
 
     async def execute(self, command_string, js_context_json, stdin_data=None):
+        return self.result_json(await self.execute_result(command_string, js_context_json, stdin_data))
+
+    async def execute_result(self, command_string, js_context_json, stdin_data=None):
+        """
+        Runs a command line and returns its result as a dict. Results pass
+        between segments and out of $(...) as they are, so nothing is turned
+        into JSON until result_json is called at the kernel boundary.
+        """
         try:
             context = json.loads(js_context_json)
             if 'users' in context: user_manager.load_users(context['users'])
@@ -374,27 +497,19 @@ class CommandExecutor:
                 session_start_time=context.get("session_start_time"), session_stack=context.get("session_stack")
             )
             processed_command_string = await self._preprocess_command_string(command_string, js_context_json)
-            # Standalone variable assignment(s) handling (e.g., VAR=value [VAR2=value ...])
-            try:
-                assign_parts = shlex.split(processed_command_string)
-            except ValueError as e:
-                raise ValueError(f"Syntax error in command: {e}")
-            def is_assignment_token(tok):
-                return bool(re.match(r'^[A-Za-z_][A-Za-z0-9_]*=', tok))
-            if assign_parts and all(is_assignment_token(tok) for tok in assign_parts):
-                for tok in assign_parts:
-                    name, value = tok.split('=', 1)
+            assignments, command_sequence = self._parse_command_string(processed_command_string)
+            if assignments is not None:
+                for name, value in assignments:
                     env_manager.set(name, value)
-                return json.dumps({"success": True, "output": ""})
-
-            command_sequence = self._parse_command_string(processed_command_string)
+                return {"success": True, "output": ""}
 
-            if not command_sequence: return json.dumps({"success": True, "output": ""})
+            if not command_sequence: return {"success": True, "output": ""}
 
             last_result_obj = {"success": True, "output": ""}
             collected_effects = []
 
             for pipeline in command_sequence:
+                pipeline = self._bind_pipeline(pipeline)
                 if pipeline.get('operator') == '&&' and not last_result_obj.get("success"): continue
                 if pipeline.get('operator') == '||' and last_result_obj.get("success"): continue
 
@@ -416,12 +531,23 @@ class CommandExecutor:
 
                 pipeline_input = stdin_data
                 for i, segment in enumerate(pipeline['segments']):
-                    result_or_promise = await self._execute_segment(segment, pipeline_input)
-                    result_json = result_or_promise
-                    last_result_obj = json.loads(result_json)
-
                     is_last_in_pipe = (i == len(pipeline['segments']) - 1)
-                    if (last_result_obj.get('effect') == 'page_output' and not is_last_in_pipe):
+                    if is_stream(pipeline_input) and self._stream_function(segment['command']) is None:
+                        # A command without run_stream gets its input as one string.
+                        last_result_obj = self._drain_stream(pipeline_input)
+                        if not last_result_obj.get("success"): break
+                        pipeline_input = last_result_obj.get("output")
+
+                    result = await self._execute_segment(segment, pipeline_input)
+                    if is_stream(result):
+                        # Streams are chained lazily; only the last one in the pipe is read out.
+                        pipeline_input = result
+                        if not is_last_in_pipe: continue
+                        last_result_obj = self._drain_stream(pipeline_input)
+                    else:
+                        last_result_obj = result
+
+                    if (last_result_obj.get('effect') in ('page_output', 'follow_file') and not is_last_in_pipe):
                         last_result_obj = {
                             "success": True,
                             "output": last_result_obj.get("content", "")
@@ -438,10 +564,11 @@ class CommandExecutor:
                         content_to_write = last_result_obj.get("output", "")
                         if pipeline['redirection']['type'] == 'append':
                             try:
-                                existing_node = self.fs_manager.get_node(file_path)
-                                if existing_node: content_to_write = existing_node.get('content', '') + "\n" + content_to_write
-                            except FileNotFoundError: pass
-                        self.fs_manager.write_file(file_path, content_to_write, self.user_context)
+                                self.fs_manager.append_file(file_path, "\n" + content_to_write, self.user_context, create=False)
+                            except FileNotFoundError:
+                                self.fs_manager.write_file(file_path, content_to_write, self.user_context)
+                        else:
+                            self.fs_manager.write_file(file_path, content_to_write, self.user_context)
                         last_result_obj['output'] = ""
                     except PermissionError as e:
                         # This is the key change: catch the specific error
@@ -452,6 +579,14 @@ class CommandExecutor:
                                 "suggestion": "Check your permissions for the target directory."
                             }
                         }
+                    except OSError as e:
+                        last_result_obj = {
+                            "success": False,
+                            "error": {
+                                "message": f"bash: {pipeline['redirection']['file']}: {e.strerror or e}",
+                                "suggestion": "Check the path and that there is room for the change; 'quota' shows your limits."
+                            }
+                        }
                     except Exception as e:
                         last_result_obj = {
                             "success": False,
@@ -465,18 +600,29 @@ class CommandExecutor:
             if collected_effects:
                 response_obj = {k: v for k, v in last_result_obj.items() if k != 'effect'}
                 response_obj['effects'] = collected_effects
-                return json.dumps(response_obj)
+                return response_obj
 
-            return json.dumps(last_result_obj)
+            return last_result_obj
         except Exception as e:
             # General exception handler for the entire execute function
-            return json.dumps({
-                "success": False,
-                "error": {
-                    "message": f"An unexpected error occurred in the command executor: {str(e)}",
-                    "suggestion": "This may be a bug. Please report the command you tried to run."
-                }
-            })
+            return self._executor_error(e)
+
+    def result_json(self, result):
+        """The JSON the frontend gets for a result from execute_result."""
+        try:
+            return json.dumps(result)
+        except Exception as e:
+            # A command handed back something JSON can't hold.
+            return json.dumps(self._executor_error(e))
+
+    def _executor_error(self, e):
+        return {
+            "success": False,
+            "error": {
+                "message": f"An unexpected error occurred in the command executor: {str(e)}",
+                "suggestion": "This may be a bug. Please report the command you tried to run."
+            }
+        }
 
     async def _execute_segment(self, segment, stdin_data):
         command_name = segment['command']
@@ -489,7 +635,7 @@ class CommandExecutor:
             metadata = {}
 
         if metadata.get('root_required') and self.user_context.get('name') != 'root':
-            return json.dumps({"success": False, "error": f"{command_name}: permission denied. You must be root to run this command."})
+            return {"success": False, "error": f"{command_name}: permission denied. You must be root to run this command."}
 
         kwargs_for_run = {
             "users": self.users,
@@ -503,7 +649,10 @@ class CommandExecutor:
             "session_stack": self.session_stack,
             "commands": self.commands
         }
-        result = await self.run_command_by_name(
+        run_stream = self._stream_function(command_name)
+        if run_stream is not None:
+            return self._run_stream(command_name, run_stream, segment, stdin_data, kwargs_for_run)
+        result = await self._run_command(
             command_name=command_name,
             args=segment['args'],
             flags=segment['flags'],
@@ -513,6 +662,82 @@ class CommandExecutor:
         )
         return result
 
+    def _stream_function(self, command_name):
+        """The command's run_stream, if it streams."""
+        if command_name not in self.commands:
+            return None
+        try:
+            command_module = import_module(f"commands.{command_name}")
+        except Exception:
+            return None # _run_command reports it.
+        return getattr(command_module, 'run_stream', None)
+
+    def _run_stream(self, command_name, run_stream, segment, stdin_data, kwargs):
+        """
+        Runs a segment through its command's run_stream. Returns the output
+        stream, unread, or the result object of whatever else the command returned.
+        """
+        lines = stdin_data if is_stream(stdin_data) else blocks_of(stdin_data)
+        possible_kwargs = {
+            "lines": lines, "args": segment['args'], "flags": segment['flags'], "user_context": self.user_context,
+            **kwargs
+        }
+        try:
+            result = self._call_with_supported_kwargs(run_stream, possible_kwargs)
+        except StreamError as e:
+            return e.result # from upstream, read by a command that needs all its input up front
+        except Exception as e:
+            return self._command_error(command_name, e)
+        if is_stream(result):
+            return self._guard_stream(command_name, result)
+        return self._result_object(result)
+
+    def _guard_stream(self, command_name, stream):
+        """Passes a command's stream through, turning an exception inside it into the error _run_command would give."""
+        try:
+            yield from stream
+        except StreamError:
+            raise
+        except Exception as e:
+            raise StreamError(self._command_error(command_name, e))
+
+    def _drain_stream(self, stream):
+        """Reads a stream out into the result object of a command that returned its text."""
+        output = text_of(stream)
+        if isinstance(output, dict):
+            return output
+        return {"success": True, "output": output}
+
+    def _call_with_supported_kwargs(self, func, possible_kwargs):
+        sig = inspect.signature(func)
+        params = sig.parameters
+        has_varkw = any(p.kind == p.VAR_KEYWORD for p in params.values())
+        kwargs_for_run = {k: v for k, v in possible_kwargs.items() if k in params} if not has_varkw else possible_kwargs
+        return func(**kwargs_for_run)
+
+    def _result_object(self, result):
+        """
+        What a command returned, as a result dict of the executor's own: a
+        shallow copy, so marking it up later can't reach a dict the command kept.
+        """
+        if isinstance(result, dict):
+            result = dict(result)
+            if 'success' not in result: result['success'] = True
+            return result
+        else:
+            return {"success": True, "output": str(result)}
+
+    def _command_error(self, command_name, e):
+        # This is the final catch-all for errors within a command's `run` function.
+        # We format it nicely here.
+        return {
+            "success": False,
+            "error": {
+                "message": f"Error executing '{command_name}': {repr(e)}",
+                "suggestion": "An internal error occurred in the command. Please check your arguments."
+            }
+        }
+
     async def run_command_by_name(self, command_name, args, flags, user_context, stdin_data, kwargs, js_context_json=None):
         if js_context_json:
             context = json.loads(js_context_json)
@@ -523,48 +748,32 @@ class CommandExecutor:
                 api_key=context.get("api_key"), session_start_time=context.get("session_start_time"),
                 session_stack=context.get("session_stack")
             )
+        return self.result_json(await self._run_command(command_name, args, flags, user_context, stdin_data, kwargs))
 
+    async def _run_command(self, command_name, args, flags, user_context, stdin_data, kwargs):
         if command_name not in self.commands:
-            return json.dumps({
+            return {
                 "success": False,
                 "error": {
                     "message": f"{command_name}: command not found",
                     "suggestion": "Check the spelling or run 'help' to see all available commands."
                 }
-            })
+            }
         try:
             command_module = import_module(f"commands.{command_name}")
             run_func = getattr(command_module, 'run', None)
             if not run_func:
-                return json.dumps({"success": False, "error": f"Command '{command_name}' is not runnable."})
+                return {"success": False, "error": f"Command '{command_name}' is not runnable."}
             possible_kwargs = {
                 "args": args, "flags": flags, "user_context": user_context, "stdin_data": stdin_data,
                 **kwargs
             }
-            sig = inspect.signature(run_func)
-            params = sig.parameters
-            has_varkw = any(p.kind == p.VAR_KEYWORD for p in params.values())
-            kwargs_for_run = {k: v for k, v in possible_kwargs.items() if k in params} if not has_varkw else possible_kwargs
-
-            if inspect.iscoroutinefunction(run_func):
-                result = await run_func(**kwargs_for_run)
-            else:
-                result = run_func(**kwargs_for_run)
+            result = self._call_with_supported_kwargs(run_func, possible_kwargs)
+            if inspect.isawaitable(result):
+                result = await result
 
-            if isinstance(result, dict):
-                if 'success' not in result: result['success'] = True
-                return json.dumps(result)
-            else:
-                return json.dumps({"success": True, "output": str(result)})
+            return self._result_object(result)
         except Exception as e:
-            # This is the final catch-all for errors within a command's `run` function.
-            # We format it nicely here.
-            return json.dumps({
-                "success": False,
-                "error": {
-                    "message": f"Error executing '{command_name}': {repr(e)}",
-                    "suggestion": "An internal error occurred in the command. Please check your arguments."
-                }
-            })
+            return self._command_error(command_name, e)
 
 command_executor = CommandExecutor()
\ No newline at end of file
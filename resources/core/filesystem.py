@@ -1,26 +1,1405 @@
 # /core/filesystem.py
 
+import errno
 import json
 from datetime import datetime
 import os
 import re
+import time
+import asyncio
+import copy
+import hashlib
+import shlex
+from fnmatch import fnmatchcase
+from compact_nodes import compact_node, compact_tree, expand_tree, iso_to_micros, json_default
+import lazy_image
+from lazy_image import LazyContent
+from name_index import NameIndex, iter_tree, join_path
+from content_index import ContentIndex
+from mtime_index import MtimeIndex, mtime_key
+from fs_events import EventBus
+from quota import NO_LIMITS, QuotaLedger, compile_limits, tally
+from chunked_content import ChunkedContent
+from binary_content import BINARY_ENCODING, BYTES_TYPES, bytes_to_content, content_bytes, is_binary, load_content, saved_content
+from mounts import MOUNT_KEY, HostChildren, HostContent, LocalDirectoryBackend, Mount, host_location, join_rel
+from collections import OrderedDict
+from contextlib import contextmanager
+
+PERSISTENCE_MODES = ('immediate', 'write_behind')
+DEFAULT_FLUSH_INTERVAL = 2.0 # seconds
+DEFAULT_NODE_CACHE_SIZE = 4096
+MAX_SYMLINK_HOPS = 40
+BLOB_TABLE_KEY = "__blobs__"
+JOURNAL_SEQ_KEY = "__journal_seq__"
+DEFAULT_JOURNAL_MAX_RECORDS = 500
+DEFAULT_JOURNAL_MAX_BYTES = 1024 * 1024
+SHARDED_FORMAT = "sharded"
+ROOT_SHARD = "/"
+AGENDA_PATH = "/etc/agenda.json"
+QUOTA_PATH = "/etc/quota.json"
+GLOB_INDEX_MIN_CHILDREN = 256 # smaller directories are quicker to scan than to look up
+DEFAULT_CONTENT_INDEX_MAX_BYTES = 16 * 1024 * 1024
+CONTENT_INDEX_DELAY = 0.1 # seconds after a change before background indexing starts
+CONTENT_INDEX_SLICE = 0.02 # seconds of indexing per background step, to keep the terminal responsive
+FSCK_PROGRESS_INTERVAL = 10000 # nodes checked between progress reports
+FSCK_MAX_DIRTY = 10000 # changed subtrees tracked for an incremental fsck before giving up on it
+# The kinds of record in a batch's undo log (see begin_batch).
+UNDO_CHILD = 'child' # (kind, directory node, name, the child it held or _ABSENT)
+UNDO_FIELDS = 'fields' # (kind, node, shallow copy of the node before the batch first changed it)
+UNDO_AGGREGATES = 'aggregates' # (kind, directory chain, size delta, file delta)
+UNDO_BLOB = 'blob' # (kind, content hash, reference delta, blob content)
+UNDO_TREE = 'tree' # (kind, the fs_data that was replaced wholesale)
+_ABSENT = object()
+
+def walk_order(entry):
+    """Sort key putting (abs_path, ...) entries in the order walk() yields them."""
+    return entry[0].replace('/', '\0') # Sorts each directory right before what is under it.
+
+def _at_mount(path, name, node, depth):
+    """A walk() prune for bookkeeping that covers only what the VFS itself holds."""
+    return MOUNT_KEY in node
 
 class FileSystemManager:
     def __init__(self):
         self.fs_data = {}
         self.current_path = "/"
         self.save_function = None
+        self.journal_function = None
         self.user_groups = {} # Initialize the attribute
+        self.persistence_mode = 'immediate'
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL
+        self._dirty = False
+        self._last_flush_time = 0.0
+        self._flush_handle = None
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._batch_undo = None # the open batch's undo log, or None if it can't be rolled back
+        self._batch_touched = set() # ids of the nodes whose fields the undo log already holds
+        self._batch_ledger = None # the quota ledger as the batch found it, logging its charges
+        self._batch_aggregates_stale = False
+        self._ward_source = None # the agenda content _ward_paths was compiled from
+        self._ward_paths = frozenset()
+        self._node_cache = OrderedDict()
+        self._node_cache_size = DEFAULT_NODE_CACHE_SIZE
+        self._dir_generations = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self.content_store_enabled = False
+        self._blobs = {} # content hash -> content shared by every file holding it
+        self._blob_refs = {} # content hash -> number of file nodes referencing it
+        self.journal_enabled = False
+        self.journal_max_records = DEFAULT_JOURNAL_MAX_RECORDS
+        self.journal_max_bytes = DEFAULT_JOURNAL_MAX_BYTES
+        self._journal_pending = [] # serialized records not yet handed to journal_function
+        self._journal_records = 0 # records appended since the last base snapshot
+        self._journal_bytes = 0
+        self._journal_seq = 0
+        self._journal_logged = False
+        self._journal_needs_snapshot = True
+        self._batch_journal_mark = None
+        self.shard_mounts = [] # e.g. ['/home/*', '/etc', '/var']; empty saves one monolithic image
+        self._shard_versions = {} # shard name -> version of its last saved image
+        self._shard_version = 0
+        self._dirty_shards = set()
+        self._all_shards_dirty = True
+        self.compact_nodes = False
+        self.lazy_load = False
+        self._lazy_contents = False # whether the tree may still hold LazyContent
+        self._aggregates_stale = False
+        self.name_index_enabled = False
+        self._name_index = None # built on first use, dropped whenever the tree is replaced
+        self.content_index_enabled = False
+        self.content_index_max_bytes = DEFAULT_CONTENT_INDEX_MAX_BYTES
+        self._content_index = None
+        self._content_index_handle = None
+        self.mtime_index_enabled = False
+        self._mtime_index = None
+        self._fsck_dirty = None # canonical paths of subtrees changed since the last clean fsck; None if unknown
+        self._fsck_links_stale = False
+        self._fsck_principals = None # the users and groups the last clean fsck checked against
+        self.max_vfs_bytes = 0 # hard limit on file content in the whole VFS; 0 for none
+        self._quota_ledger = None # built when a limit first needs it, then kept current
+        self._quota_source = None # the quota file content _quota_limits was compiled from
+        self._quota_limits = ({}, NO_LIMITS)
+        self._events = EventBus()
+        self.host_mounts = {} # canonical VFS path -> Mount of a host directory attached there
+        self._has_binary = False # set once a binary file is written or loaded; saves then base64 their contents
         self._initialize_default_filesystem()
 
     def set_save_function(self, func):
         self.save_function = func
 
+    def set_journal_function(self, func):
+        self.journal_function = func
+
+    def set_journal_mode(self, enabled, max_records=None, max_bytes=None):
+        """Journals each flush's operations instead of saving the whole tree, compacting past the limits."""
+        if max_records is not None:
+            self.journal_max_records = max(1, int(max_records))
+        if max_bytes is not None:
+            self.journal_max_bytes = max(1, int(max_bytes))
+        self.journal_enabled = bool(enabled)
+        self._journal_pending = []
+        self._journal_needs_snapshot = True
+        return True
+
+    def set_persistence_mode(self, mode, flush_interval=None):
+        """Selects 'immediate' saves or 'write_behind' flushes at most once per flush_interval."""
+        if mode not in PERSISTENCE_MODES:
+            raise ValueError(f"Unknown persistence mode: '{mode}'")
+        if flush_interval is not None:
+            self.flush_interval = max(0.0, float(flush_interval))
+        self.persistence_mode = mode
+        if mode == 'immediate':
+            self.flush()
+        return True
+
     def _save_state(self):
-        if self.save_function:
-            self.save_function(json.dumps(self.get_fs_data()))
+        if self.journal_enabled or self.shard_mounts:
+            # Mutations that didn't log a record can only be persisted by a full save.
+            if not self._journal_logged:
+                self._journal_needs_snapshot = True
+                self._all_shards_dirty = True
+            self._journal_logged = False
+        self._persist()
+
+    def _persist(self):
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
+        self._dirty = True
+        if self.persistence_mode == 'write_behind':
+            self._schedule_flush()
         else:
+            self.flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return # A flush is already pending; it will pick up this change too.
+        delay = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush_time))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to (e.g. a plain CPython script), so flush
+            # inline once the interval has elapsed and leave the rest to flush().
+            if delay == 0:
+                self.flush()
+            return
+        self._flush_handle = loop.call_later(delay, self._run_scheduled_flush)
+
+    def _run_scheduled_flush(self):
+        self._flush_handle = None
+        self.flush()
+
+    def flush(self):
+        """Writes any pending filesystem changes to persistent storage."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._dirty:
+            return False
+        if not self.save_function:
             print("CRITICAL: Filesystem save function not provided.")
+            return False
+        if self._journal_can_append():
+            self._journal_seq += 1
+            line = '{"seq": %d, "records": [%s]}\n' % (self._journal_seq, ", ".join(self._journal_pending))
+            self.journal_function(line)
+            self._journal_records += len(self._journal_pending)
+            self._journal_bytes += len(line)
+        elif self.shard_mounts:
+            self.save_function(json.dumps(self._build_shard_save(), default=json_default))
+            self._journal_records = 0
+            self._journal_bytes = 0
+            self._journal_needs_snapshot = False
+        else:
+            self.save_function(json.dumps(self.get_fs_data(), default=json_default))
+            self._journal_records = 0
+            self._journal_bytes = 0
+            self._journal_needs_snapshot = False
+        self._journal_pending = []
+        if self._batch_depth:
+            self._batch_journal_mark = None # Part of the open batch is now on disk.
+        self._dirty = False
+        self._last_flush_time = time.monotonic()
+        return True
+
+    def has_pending_changes(self):
+        return self._dirty
+
+    def _journal_can_append(self):
+        return (self.journal_enabled and self.journal_function is not None
+                and not self._journal_needs_snapshot and self._journal_pending
+                and self._journal_records + len(self._journal_pending) <= self.journal_max_records
+                and self._journal_bytes < self.journal_max_bytes)
+
+    def _journal(self, op, **fields):
+        """Records a change for whichever persistence needs it: dirty shards and/or the journal."""
+        self._journal_logged = True
+        if self.shard_mounts:
+            for key in ('path', 'old', 'new'):
+                if key in fields:
+                    self._mark_shards_dirty(fields[key], resolve_last=op in ('chmod', 'chown', 'touch'))
+        if self._mtime_index is not None:
+            # A record names every node whose mtime the change set, which is what replay relies on too.
+            self._index_mtimes(op, fields)
+        if self._fsck_dirty is not None:
+            self._fsck_note_change(op, fields)
+        if self._events.watching and op in ('chmod', 'chown', 'touch'):
+            self._events.emit('attrib', self._real_path(fields['path'])[0] or fields['path'])
+        if not self.journal_enabled:
+            return
+        fields['op'] = op
+        # Serialized now, so later in-place edits to the nodes can't leak into this record.
+        self._journal_pending.append(json.dumps(fields, default=json_default))
+
+    @staticmethod
+    def _journal_node(node):
+        entry = {k: v for k, v in node.items() if k not in ('content_hash', 'total_size', 'file_count')}
+        if is_binary(entry):
+            entry['content'] = saved_content(entry.get('content', ''))
+        return entry
+
+    def _journal_tree(self, node):
+        """A grafted subtree as its journal record holds it: binary contents as base64, as in a saved image."""
+        if not self._has_binary or not any(is_binary(file_node) for file_node in self._iter_files(node)):
+            return node
+        root_copy = dict(node)
+        stack = [root_copy]
+        while stack:
+            entry = stack.pop()
+            if entry.get('type') == 'directory':
+                children = {name: dict(child) for name, child in entry.get('children', {}).items()}
+                entry['children'] = children
+                stack.extend(children.values())
+            elif is_binary(entry):
+                entry['content'] = saved_content(entry.get('content', ''))
+        return root_copy
+
+    def _load_binary(self, obj):
+        """json object_hook turning a saved binary file's base64 back into its content."""
+        if obj.get('encoding') == BINARY_ENCODING and obj.get('type') == 'file':
+            self._has_binary = True
+            if 'content' in obj:
+                obj['content'] = load_content(obj['content'])
+        return obj
+
+    def get_journal_stats(self):
+        return {
+            "enabled": self.journal_enabled, "seq": self._journal_seq,
+            "records": self._journal_records, "bytes": self._journal_bytes,
+            "pending": len(self._journal_pending), "max_records": self.journal_max_records,
+            "max_bytes": self.journal_max_bytes
+        }
+
+    def _replay_journal(self, journal_text):
+        """Applies the journal entries newer than the loaded base, stopping at the first torn one."""
+        for line in journal_text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line, object_hook=self._load_binary)
+            except json.JSONDecodeError:
+                print("WARNING: Discarding torn filesystem journal tail.")
+                break
+            seq = entry.get('seq', 0)
+            if seq <= self._journal_seq:
+                continue # Already folded into the base snapshot.
+            try:
+                for record in entry.get('records', []):
+                    self._apply_journal_record(record)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"WARNING: Stopping filesystem journal replay at entry {seq}: {e!r}")
+                break
+            self._journal_seq = seq
+
+    def _apply_journal_record(self, record):
+        # Lookups must see the records applied so far, not the pre-replay tree.
+        self._node_cache.clear()
+        op = record['op']
+        if op in ('write', 'mkdir', 'symlink', 'graft'):
+            parent_node = self._journal_parent(record['path'])
+            node = record['node']
+            if op == 'mkdir':
+                node.setdefault('children', {})
+            parent_node['children'][os.path.basename(record['path'])] = node
+            parent_node['mtime'] = record['mtime']
+        elif op == 'append':
+            parent_node = self._journal_parent(record['path'])
+            node = parent_node['children'][os.path.basename(record['path'])]
+            node.pop('content_hash', None)
+            self._append_content(node, record['data'])
+            node['mtime'] = parent_node['mtime'] = record['mtime']
+        elif op == 'remove':
+            parent_node = self._journal_parent(record['path'])
+            del parent_node['children'][os.path.basename(record['path'])]
+            parent_node['mtime'] = record['mtime']
+        elif op == 'rename':
+            old_parent = self._journal_parent(record['old'])
+            new_parent = self._journal_parent(record['new'])
+            node = old_parent['children'].pop(os.path.basename(record['old']))
+            node['mtime'] = record['mtime']
+            new_parent['children'][os.path.basename(record['new'])] = node
+            old_parent['mtime'] = new_parent['mtime'] = record['mtime']
+        elif op in ('chmod', 'chown', 'touch'):
+            node = self.get_node(record['path'])
+            if node is None:
+                raise ValueError(f"No such node: {record['path']}")
+            targets = [node]
+            while targets:
+                target = targets.pop()
+                target.update(record['attrs'])
+                target['mtime'] = record['mtime']
+                if record.get('recursive') and target.get('type') == 'directory':
+                    targets.extend(target.get('children', {}).values())
+        else:
+            raise ValueError(f"Unknown journal op: {op}")
+
+    def _journal_parent(self, path):
+        parent_node = self.get_node(os.path.dirname(path))
+        if not parent_node or parent_node.get('type') != 'directory':
+            raise ValueError(f"No parent directory for {path}")
+        return parent_node
+
+    @contextmanager
+    def batch(self, rollback=True):
+        """Groups mutations into one unit that is saved once, or rolled back if the block raises."""
+        self.begin_batch(rollback)
+        try:
+            yield self
+        except BaseException:
+            self.rollback_batch()
+            raise
+        self.commit_batch()
+
+    def begin_batch(self, rollback=True):
+        """Opens a batch; with rollback, mutations log what they change so rollback_batch can undo them."""
+        if self._batch_depth == 0:
+            if rollback:
+                self._batch_undo = []
+                self._batch_ledger = self._quota_ledger
+                if self._batch_ledger is not None:
+                    self._batch_ledger.begin_changes()
+                self._batch_aggregates_stale = self._aggregates_stale
+            self._batch_journal_mark = len(self._journal_pending)
+            self._batch_dirty = False
+        self._batch_depth += 1
+        return True
+
+    def commit_batch(self):
+        if self._batch_depth == 0:
+            raise RuntimeError("No filesystem batch is active.")
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            was_dirty = self._batch_dirty
+            self._end_batch()
+            if was_dirty:
+                self._persist()
+        return True
+
+    def rollback_batch(self):
+        if self._batch_depth == 0:
+            return False
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            if self._batch_undo is not None:
+                self._undo_batch()
+                if self._batch_journal_mark is not None:
+                    del self._journal_pending[self._batch_journal_mark:]
+                elif self.journal_enabled:
+                    # Some of the batch was already flushed; only a full save can undo it.
+                    self._end_batch()
+                    self._save_state()
+                    return True
+                self._end_batch()
+            else:
+                # Nothing can be undone, so what the batch wrote stays and must be saved.
+                was_dirty = self._batch_dirty
+                self._end_batch()
+                if was_dirty:
+                    self._persist()
+        return True
+
+    def _end_batch(self):
+        self._batch_dirty = False
+        self._batch_undo = None
+        self._batch_touched = set()
+        if self._batch_ledger is not None:
+            self._batch_ledger.end_changes()
+            self._batch_ledger = None
+        self._batch_journal_mark = None
+
+    def _undo_child(self, dir_node, name):
+        """Logs what a directory holds under name (if anything) before the entry changes."""
+        if self._batch_undo is not None:
+            self._batch_undo.append((UNDO_CHILD, dir_node, name, dir_node['children'].get(name, _ABSENT)))
+
+    def _undo_fields(self, node):
+        """Logs a node's fields before the batch first changes them in place."""
+        if self._batch_undo is None or id(node) in self._batch_touched:
+            return
+        self._batch_touched.add(id(node)) # The log keeps the node alive, so its id can't be reused.
+        saved = node.copy() # Shallow: a directory's entries are logged one by one as they change.
+        content = saved.get('content')
+        if isinstance(content, ChunkedContent):
+            saved['content'] = copy.copy(content) # Appended to in place.
+        self._batch_undo.append((UNDO_FIELDS, node, saved))
+
+    def _undo_tree(self):
+        if self._batch_undo is not None:
+            self._batch_undo.append((UNDO_TREE, self.fs_data))
+
+    def _undo_batch(self):
+        """Replays the open batch's undo log backwards and drops the lookups built from its tree."""
+        undo, self._batch_undo = self._batch_undo, None # Nothing replayed here is logged again.
+        replaced = False
+        for record in reversed(undo):
+            kind = record[0]
+            if kind == UNDO_CHILD:
+                _, dir_node, name, previous = record
+                if previous is _ABSENT:
+                    dir_node['children'].pop(name, None)
+                else:
+                    dir_node['children'][name] = previous
+            elif kind == UNDO_FIELDS:
+                _, node, saved = record
+                for key in [key for key in node if key not in saved]:
+                    del node[key]
+                for key, value in saved.items():
+                    if key != 'type':
+                        node[key] = value
+            elif kind == UNDO_AGGREGATES:
+                _, chain, size_delta, file_delta = record
+                for dir_node in chain:
+                    dir_node['total_size'] = dir_node.get('total_size', 0) - size_delta
+                    dir_node['file_count'] = dir_node.get('file_count', 0) - file_delta
+            elif kind == UNDO_BLOB:
+                _, digest, ref_delta, content = record
+                refs = self._blob_refs.get(digest, 0) - ref_delta
+                if refs > 0:
+                    self._blob_refs[digest] = refs
+                    if content is not None:
+                        self._blobs.setdefault(digest, content)
+                else:
+                    self._blob_refs.pop(digest, None)
+                    self._blobs.pop(digest, None)
+            elif kind == UNDO_TREE:
+                self.fs_data = record[1]
+                replaced = True
+        if replaced:
+            self._reset_derived_state()
+            return
+        if self._batch_ledger is not None:
+            self._batch_ledger.revert_changes()
+        self._quota_ledger = self._batch_ledger # None if it was built during the batch, from the batch's tree.
+        if self._batch_aggregates_stale:
+            self._aggregates_stale = True # Computed during the batch, from the batch's tree.
+        self._reset_lookups()
+
+    def in_batch(self):
+        return self._batch_depth > 0
+
+    def _reset_derived_state(self):
+        """Rebuilds everything derived from the tree after fs_data is replaced wholesale."""
+        self._rebuild_aggregates()
+        self._rebuild_blob_store()
+        self._quota_ledger = None
+        self._reset_lookups()
+
+    def _reset_lookups(self):
+        """Drops the caches and indexes over the tree and reattaches the mounts after it was replaced."""
+        if self.host_mounts:
+            self._reattach_mounts()
+        self._node_cache.clear()
+        self._dir_generations.clear()
+        self._name_index = None
+        self._content_index = None
+        self._mtime_index = None
+        self._fsck_dirty = None
+        if self._events.watching:
+            self._events.overflow() # Nothing queued describes the new tree.
+        self._schedule_content_indexing()
+
+    def _bump_generation(self, dir_node):
+        """Records that a directory's set of children changed, invalidating lookups through it."""
+        key = id(dir_node)
+        self._dir_generations[key] = self._dir_generations.get(key, 0) + 1
+
+    def _forget_generations(self, root_node):
+        """Drops the generations of every directory in a subtree that has left the tree."""
+        generations = self._dir_generations
+        if not generations or root_node is None:
+            return
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
+            if node.get('type') != 'directory':
+                continue
+            generations.pop(id(node), None)
+            children = node.get('children')
+            if children:
+                stack.extend(dict.values(children)) # Only what a mount has listed; nothing is read from the host.
+
+    def set_node_cache_size(self, size):
+        self._node_cache_size = max(0, int(size))
+        while len(self._node_cache) > self._node_cache_size:
+            self._node_cache.popitem(last=False)
+        return True
+
+    def get_cache_stats(self):
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": (self._cache_hits / lookups) if lookups else 0.0,
+            "size": len(self._node_cache),
+            "capacity": self._node_cache_size
+        }
+
+    def _directory_chain(self, path):
+        """The real directory nodes from / down to path, following symlinks, or None."""
+        return self._resolve_directory(path)[1]
+
+    def _resolve_directory(self, path):
+        """(canonical path, directory chain) for a directory path, or (None, None); see _directory_chain."""
+        abs_path = self.get_absolute_path(path)
+        for _ in range(MAX_SYMLINK_HOPS):
+            parts = [part for part in abs_path.split('/') if part]
+            chain = [self.fs_data.get('/')]
+            for i, part in enumerate(parts):
+                child = chain[-1].get('children', {}).get(part)
+                if child is None:
+                    return None, None
+                if child.get('type') == 'symlink':
+                    link_directory = "/" + "/".join(parts[:i])
+                    abs_path = os.path.normpath(os.path.join(link_directory, child.get('target', ''), *parts[i+1:]))
+                    break
+                if child.get('type') != 'directory':
+                    return None, None
+                chain.append(child)
+            else:
+                return abs_path, chain
+        return None, None # Too many levels of symbolic links
+
+    def _real_path(self, path):
+        """(canonical path, node) for whatever path leads to once every symlink is followed, or (None, None)."""
+        abs_path = self.get_absolute_path(path)
+        for _ in range(MAX_SYMLINK_HOPS):
+            if abs_path == '/':
+                return '/', self.fs_data.get('/')
+            parent_path, chain = self._resolve_directory(os.path.dirname(abs_path))
+            if chain is None:
+                return None, None
+            node = chain[-1].get('children', {}).get(os.path.basename(abs_path))
+            if node is None:
+                return None, None
+            if node.get('type') != 'symlink':
+                return join_path(parent_path, os.path.basename(abs_path)), node
+            abs_path = os.path.normpath(os.path.join(parent_path, node.get('target', '')))
+        return None, None
+
+    def _compute_aggregates(self, root_node):
+        """Recomputes total_size/file_count for every directory under root_node in one pass."""
+        stack = [(root_node, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if node.get('type') != 'directory':
+                continue
+            # A mount point counts for nothing: what is under it is on the host.
+            children = node.get('children', {}) if MOUNT_KEY not in node else {}
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children.values())
+                continue
+            total_size, file_count = 0, 0
+            for child in children.values():
+                child_size, child_files = self._node_totals(child)
+                total_size += child_size
+                file_count += child_files
+            node['total_size'] = total_size
+            node['file_count'] = file_count
+
+    def _rebuild_aggregates(self):
+        # Deferred until something asks for a size, so a boot doesn't have to
+        # measure (and so decode) every file just to show a prompt.
+        self._aggregates_stale = True
+
+    def _ensure_aggregates(self):
+        if self._aggregates_stale:
+            self._aggregates_stale = False
+            root = self.fs_data.get('/')
+            if root:
+                self._compute_aggregates(root)
+
+    def _node_totals(self, node):
+        """The (bytes, files) a node contributes to the aggregates of its ancestors."""
+        node_type = node.get('type')
+        if node_type == 'file':
+            return len(node.get('content', '')), 1
+        if node_type == 'directory':
+            return node.get('total_size', 0), node.get('file_count', 0)
+        return 0, 0 # Symlinks do not count towards usage
+
+    def _adjust_aggregates(self, chain, size_delta, file_delta):
+        """Applies a size change to every directory in an ancestor chain, O(depth)."""
+        if self._aggregates_stale or not chain or (not size_delta and not file_delta):
+            return
+        if self._batch_undo is not None:
+            self._batch_undo.append((UNDO_AGGREGATES, chain, size_delta, file_delta))
+        for dir_node in chain:
+            dir_node['total_size'] = dir_node.get('total_size', 0) + size_delta
+            dir_node['file_count'] = dir_node.get('file_count', 0) + file_delta
+
+    def _iter_files(self, root_node):
+        """Yields every file node under root_node (including root_node itself)."""
+        stack = [root_node]
+        while stack:
+            node = stack.pop()
+            node_type = node.get('type')
+            if node_type == 'file':
+                yield node
+            elif node_type == 'directory' and MOUNT_KEY not in node:
+                stack.extend(node.get('children', {}).values())
+
+    def set_content_store(self, enabled):
+        """Turns the content-addressed store, which shares identical file contents, on or off."""
+        self.content_store_enabled = bool(enabled)
+        self._rebuild_blob_store()
+        return True
+
+    @staticmethod
+    def _hash_content(content, binary=False):
+        if isinstance(content, LazyContent):
+            content = content.value()
+        if binary:
+            # Marked with a byte UTF-8 never produces, so bytes and the text they'd spell hash apart.
+            digest = hashlib.sha1(b'\xff')
+            digest.update(content.encode('latin-1'))
+            return digest.hexdigest()
+        data = content.encode('utf-8', 'surrogatepass') if isinstance(content, str) else bytes(content)
+        return hashlib.sha1(data).hexdigest()
+
+    def _intern_content(self, content, digest=None, binary=False):
+        """Takes a reference on a blob, returning the shared content and its hash."""
+        if isinstance(content, ChunkedContent):
+            content = content.value() # Appended to in place, so it can't be the shared copy.
+        if digest is None:
+            digest = self._hash_content(content, binary)
+        shared = self._blobs.setdefault(digest, content)
+        self._blob_refs[digest] = self._blob_refs.get(digest, 0) + 1
+        if self._batch_undo is not None:
+            self._batch_undo.append((UNDO_BLOB, digest, 1, shared))
+        return shared, digest
+
+    def _retain_file(self, node):
+        node['content'], node['content_hash'] = self._intern_content(node.get('content', ''), node.get('content_hash'), is_binary(node))
+
+    def _release_file(self, node):
+        digest = node.get('content_hash')
+        if digest is None:
+            return
+        if self._batch_undo is not None:
+            self._batch_undo.append((UNDO_BLOB, digest, -1, self._blobs.get(digest)))
+        refs = self._blob_refs.get(digest, 0) - 1
+        if refs > 0:
+            self._blob_refs[digest] = refs
+        else:
+            self._blob_refs.pop(digest, None)
+            self._blobs.pop(digest, None)
+
+    def _rebuild_blob_store(self):
+        self._blobs = {}
+        self._blob_refs = {}
+        root = self.fs_data.get('/')
+        if not root:
+            return
+        for file_node in self._iter_files(root):
+            if self.content_store_enabled:
+                self._retain_file(file_node)
+            else:
+                file_node.pop('content_hash', None)
+
+    def _resolve_blob_refs(self, root_node, blobs):
+        """Turns content_ref entries from a persisted image back into inline content."""
+        if not root_node:
+            return
+        for file_node in self._iter_files(root_node):
+            digest = file_node.pop('content_ref', None)
+            if digest is not None:
+                content = blobs.get(digest, '')
+                file_node['content'] = load_content(content) if is_binary(file_node) else content
+                file_node['content_hash'] = digest
+
+    def _build_image(self, root_node=None, exclude=()):
+        """Copies the tree (or the subtree at root_node) for saving, leaving out the node ids in exclude."""
+        blobs = {}
+        root_copy = dict(self.fs_data.get('/', {}) if root_node is None else root_node)
+        stack = [root_copy]
+        while stack:
+            node = stack.pop()
+            if node.pop(MOUNT_KEY, None) is not None:
+                node['children'] = {}
+            elif node.get('type') == 'directory':
+                children = {name: dict(child) for name, child in node.get('children', {}).items() if id(child) not in exclude}
+                node['children'] = children
+                stack.extend(children.values())
+            elif node.get('type') == 'file':
+                if is_binary(node):
+                    node['content'] = saved_content(node.get('content', ''))
+                if 'content_hash' in node:
+                    digest = node.pop('content_hash')
+                    blobs.setdefault(digest, node.pop('content', ''))
+                    node['content_ref'] = digest
+        if not self.content_store_enabled:
+            return {'/': root_copy}
+        return {'/': root_copy, BLOB_TABLE_KEY: blobs}
+
+    def set_compact_nodes(self, enabled):
+        """Switches the in-memory tree between plain dict nodes and slotted compact nodes."""
+        if self._batch_depth:
+            raise RuntimeError("Cannot change the node representation inside a batch.")
+        enabled = bool(enabled)
+        if enabled != self.compact_nodes:
+            self.compact_nodes = enabled
+            convert = compact_tree if enabled else expand_tree
+            self.fs_data['/'] = convert(self.fs_data['/'])
+            self._reset_derived_state()
+        return True
+
+    def _new_node(self, data):
+        return compact_node(data) if self.compact_nodes else data
+
+    def set_lazy_load(self, enabled):
+        """When on, long file contents are decoded from the loaded image the first time they are fetched."""
+        self.lazy_load = bool(enabled)
+        return True
+
+    def _hydrate(self, node):
+        """Decodes a lazily loaded file's content in place, sharing the result through the blob store."""
+        content = node.get('content')
+        if not isinstance(content, LazyContent) or isinstance(content, HostContent):
+            return node
+        digest = node.get('content_hash')
+        blob = self._blobs.get(digest) if digest is not None else None
+        if blob is not None:
+            if isinstance(blob, LazyContent):
+                blob = self._blobs[digest] = blob.value()
+            node['content'] = blob
+        else:
+            node['content'] = content.value()
+        return node
+
+    def set_name_index(self, enabled):
+        """Turns the filename index (see name_index) on or off."""
+        self.name_index_enabled = bool(enabled)
+        self._name_index = None
+        return True
+
+    def _name_index_ready(self):
+        if not self.name_index_enabled:
+            return None
+        if self._name_index is None:
+            index = NameIndex()
+            for name, child in self.fs_data['/'].get('children', {}).items():
+                index.add_tree('/', name, child)
+            self._name_index = index
+        return self._name_index
+
+    def _canonical_node(self, abs_path):
+        """The node at abs_path if every directory on the way is a real one, not a symlink."""
+        node = self.fs_data.get('/')
+        for part in abs_path.split('/'):
+            if part:
+                if node.get('type') != 'directory':
+                    return None
+                node = node.get('children', {}).get(part)
+                if node is None:
+                    return None
+        return node
+
+    def _is_canonical_directory(self, abs_path):
+        node = self._canonical_node(abs_path)
+        return node is not None and node.get('type') == 'directory'
+
+    def _indexes_live(self):
+        return (self._name_index is not None or self._content_index is not None or self._mtime_index is not None
+                or self._events.watching)
+
+    def _index_add(self, parent_path, name, node):
+        """Tells the indexes and the quota ledger about a node (and its subtree) filed as name in a directory."""
+        if self._quota_ledger is not None:
+            self._quota_ledger.add_tree(node)
+        if not self._indexes_live():
+            return
+        # The indexes file entries under canonical paths, so resolve any symlink on the way.
+        parent_path = self._resolve_directory(parent_path)[0]
+        if self._name_index is not None:
+            self._name_index.add_tree(parent_path, name, node)
+        if self._content_index is not None:
+            self._content_index.add_tree(parent_path, name, node)
+            self._schedule_content_indexing()
+        if self._mtime_index is not None:
+            self._mtime_index.add_tree(parent_path, name, node)
+        if self._events.watching:
+            self._events.emit('create', join_path(parent_path, name))
+
+    def _index_discard(self, parent_path, name, node):
+        if self._quota_ledger is not None:
+            self._quota_ledger.discard_tree(node)
+        if not self._indexes_live():
+            return
+        parent_path = self._resolve_directory(parent_path)[0]
+        if self._name_index is not None:
+            self._name_index.discard_tree(parent_path, name, node)
+        if self._content_index is not None:
+            self._content_index.discard_tree(parent_path, name, node)
+        if self._mtime_index is not None:
+            self._mtime_index.discard_tree(parent_path, name, node)
+        if self._events.watching:
+            self._events.emit('delete', join_path(parent_path, name))
+
+    def _index_move(self, old_parent_path, old_name, new_parent_path, new_name, node):
+        if not self._indexes_live():
+            return
+        old_parent_path = self._resolve_directory(old_parent_path)[0]
+        new_parent_path = self._resolve_directory(new_parent_path)[0]
+        if self._name_index is not None:
+            self._name_index.discard_tree(old_parent_path, old_name, node)
+            self._name_index.add_tree(new_parent_path, new_name, node)
+        if self._content_index is not None:
+            self._content_index.move_tree(old_parent_path, old_name, new_parent_path, new_name, node)
+        if self._mtime_index is not None:
+            self._mtime_index.move_tree(old_parent_path, old_name, new_parent_path, new_name, node)
+        if self._events.watching:
+            self._events.emit('rename', join_path(new_parent_path, new_name), old_path=join_path(old_parent_path, old_name))
+
+    def _index_rewrite(self, parent_path, name):
+        """Tells the content index and any watches that a file's content changed."""
+        if self._content_index is None and not self._events.watching:
+            return
+        path = join_path(self._resolve_directory(parent_path)[0], name)
+        if self._content_index is not None:
+            self._content_index.mark(path)
+            self._schedule_content_indexing()
+        if self._events.watching:
+            self._events.emit('modify', path)
+
+    def find_by_name(self, pattern, start_path='/', follow_symlinks=True):
+        """(abs_path, node) under start_path whose name matches pattern, from the name index, or None."""
+        index = self._name_index_ready()
+        if index is None:
+            return None
+        abs_start = self.get_absolute_path(start_path)
+        start_node = self._canonical_node(abs_start)
+        if start_node is None or start_node.get('type') != 'directory' or self._mount_overlaps(abs_start):
+            return None
+        if follow_symlinks:
+            for link in index.links_under(abs_start):
+                target = self.get_node(link)
+                if target is not None and target.get('type') == 'directory':
+                    return None
+        found = []
+        if fnmatchcase(os.path.basename(abs_start), pattern):
+            found.append((abs_start, start_node))
+        directories = {abs_start: start_node}
+        for parent, name in index.entries(pattern, abs_start):
+            directory = directories.get(parent)
+            if directory is None:
+                # Climb to the nearest directory already resolved, then come back down.
+                pending = []
+                while directory is None:
+                    pending.append(parent)
+                    parent = os.path.dirname(parent)
+                    directory = directories.get(parent)
+                for parent in reversed(pending):
+                    directory = directories[parent] = directory['children'][os.path.basename(parent)]
+            node = directory['children'][name]
+            path = join_path(parent, name)
+            if follow_symlinks and node.get('type') == 'symlink':
+                node = self.get_node(path) or node
+            found.append((path, node))
+        found.sort(key=walk_order)
+        return found
+
+    def glob_children(self, path, dir_node, pattern):
+        """Sorted names of the children of a directory matching a shell pattern."""
+        children = dir_node.get('children', {})
+        if len(children) >= GLOB_INDEX_MIN_CHILDREN:
+            index = self._name_index_ready()
+            abs_path = self.get_absolute_path(path)
+            if index is not None and self._is_canonical_directory(abs_path) and not self._mount_overlaps(abs_path):
+                names = index.names_in(abs_path, pattern, limit=len(children))
+                if names is not None:
+                    return sorted(names)
+        return sorted(name for name in children if fnmatchcase(name, pattern))
+
+    def set_content_index(self, enabled, max_bytes=None):
+        """Turns the full-text index (see content_index) on or off."""
+        if max_bytes is not None:
+            self.content_index_max_bytes = max(0, int(max_bytes))
+        self.content_index_enabled = bool(enabled)
+        self._content_index = None
+        self._schedule_content_indexing()
+        return True
+
+    def _content_index_ready(self):
+        if not self.content_index_enabled:
+            return None
+        if self._content_index is None:
+            index = ContentIndex(self.content_index_max_bytes)
+            for name, child in self.fs_data['/'].get('children', {}).items():
+                index.add_tree('/', name, child)
+            self._content_index = index
+        return self._content_index
+
+    def _schedule_content_indexing(self):
+        if not self.content_index_enabled or self._content_index_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # No event loop to work in the background; rebuild_content_index() does it all at once.
+        self._content_index_handle = loop.call_later(CONTENT_INDEX_DELAY, self._run_content_indexing)
+
+    def _run_content_indexing(self):
+        self._content_index_handle = None
+        index = self._content_index_ready()
+        if index is not None and index.index_pending(self._read_for_index, CONTENT_INDEX_SLICE):
+            self._schedule_content_indexing()
+
+    def _read_for_index(self, path):
+        node = self.get_node(path, resolve_symlink=False)
+        if node is None or node.get('type') != 'file' or is_binary(node):
+            return None
+        return node.get('content', '')
+
+    def rebuild_content_index(self):
+        """Throws the full-text index away and indexes every file now, up to the memory cap."""
+        self._content_index = None
+        index = self._content_index_ready()
+        if index is not None:
+            index.index_pending(self._read_for_index)
+        return self.get_content_index_stats()
+
+    def content_filter(self, pattern):
+        """A predicate for the files that may match pattern, or None if every file must be searched."""
+        index = self._content_index_ready()
+        return index.filter(pattern) if index is not None else None
+
+    def get_content_index_stats(self):
+        index = self._content_index_ready()
+        return dict(index.stats(), enabled=True) if index is not None else {"enabled": False}
+
+    def set_mtime_index(self, enabled):
+        """Turns the modification-time index (see mtime_index) on or off."""
+        self.mtime_index_enabled = bool(enabled)
+        self._mtime_index = None
+        return True
+
+    def _mtime_index_ready(self):
+        if not self.mtime_index_enabled:
+            return None
+        if self._mtime_index is None:
+            index = MtimeIndex()
+            index.build(self.fs_data['/'])
+            self._mtime_index = index
+        return self._mtime_index
+
+    def _index_mtimes(self, op, fields):
+        """Refiles the nodes a journaled change stamped: the node it names and the parent directories touched."""
+        if op in ('chmod', 'chown', 'touch'):
+            path, node = self._real_path(fields['path'])
+            if node is None:
+                return
+            if fields.get('recursive') and path != '/':
+                self._mtime_index.add_tree(os.path.dirname(path), os.path.basename(path), node)
+            else:
+                self._mtime_index.update(path, node)
+                if fields.get('recursive'):
+                    for name, child in node.get('children', {}).items():
+                        self._mtime_index.add_tree('/', name, child)
+            return
+        if op == 'rename':
+            self._refile_mtime(os.path.dirname(fields['old']))
+            path = fields['new']
+        else:
+            path = fields['path']
+        self._refile_mtime(os.path.dirname(path), None if op == 'remove' else os.path.basename(path))
+
+    def _refile_mtime(self, parent_path, name=None):
+        parent_path, chain = self._resolve_directory(parent_path)
+        if chain is None:
+            return
+        self._mtime_index.update(parent_path, chain[-1])
+        node = chain[-1].get('children', {}).get(name) if name is not None else None
+        if node is not None:
+            self._mtime_index.update(join_path(parent_path, name), node)
+
+    def modified_since(self, since, start_path='/', follow_symlinks=True):
+        """(abs_path, node) under start_path possibly modified after since, from the mtime index, or None."""
+        index = self._mtime_index_ready()
+        if index is None:
+            return None
+        abs_start = self.get_absolute_path(start_path)
+        if not self._is_canonical_directory(abs_start) or self._mount_overlaps(abs_start):
+            return None
+        paths = {path for _, path in index.since(since, abs_start)}
+        links = {}
+        if follow_symlinks:
+            for link in index.links_under(abs_start):
+                target = self.get_node(link)
+                if target is not None and target.get('type') == 'directory':
+                    return None
+                links[link] = target
+                if target is not None and mtime_key(target.get('mtime')) > since:
+                    paths.add(link)
+        found = []
+        for path in paths:
+            node = self._canonical_node(path)
+            if node is None:
+                continue
+            if path in links:
+                node = links[path] or node
+            found.append((path, node))
+        found.sort(key=walk_order)
+        return found
+
+    def changed_since(self, since, start_path='/'):
+        """{"path", "mtime"} records for everything under start_path modified after since, oldest first."""
+        since = int(since * 1000000) if isinstance(since, (int, float)) else mtime_key(since)
+        abs_start, start_node = self._real_path(start_path)
+        if start_node is None:
+            raise FileNotFoundError(f"Cannot access '{start_path}': No such file or directory")
+        index = self._mtime_index_ready()
+        if index is not None:
+            changes = [(path, self._canonical_node(path)) for _, path in index.since(since, abs_start)]
+        else:
+            changed = [(mtime_key(node.get('mtime')), path, node) for path, _, node, _ in self.walk(abs_start, prune=_at_mount)]
+            changes = [(path, node) for key, path, node in sorted(changed, key=lambda entry: entry[:2]) if key > since]
+        return [{"path": path, "mtime": node.get('mtime')} for path, node in changes]
+
+    def get_mtime_index_stats(self):
+        index = self._mtime_index_ready()
+        return dict(index.stats(), enabled=True) if index is not None else {"enabled": False}
+
+    def rebuild_mtime_index(self):
+        self._mtime_index = None
+        return self.get_mtime_index_stats()
+
+    def rebuild_name_index(self):
+        self._name_index = None
+        return self.get_name_index_stats()
+
+    def get_name_index_stats(self):
+        index = self._name_index_ready()
+        return dict(index.stats(), enabled=True) if index is not None else {"enabled": False}
+
+    def add_watch(self, path, recursive=False):
+        """Starts queueing change events for path (recursively if asked) and returns the watch id."""
+        abs_path, node = self._real_path(path)
+        if node is None:
+            raise FileNotFoundError(f"Cannot watch '{path}': No such file or directory")
+        return self._events.add_watch(abs_path, recursive)
+
+    def remove_watch(self, watch_id):
+        return self._events.remove_watch(watch_id)
+
+    def poll_events(self, watch_id=None):
+        """Every event queued since the last poll, for one watch or all of them, as one batch."""
+        return {"generation": self._events.generation, "events": self._events.drain(watch_id)}
+
+    def read_from(self, path, offset=0):
+        """{"content", "offset", "truncated"} for the file at path from offset on, or None if it is gone."""
+        node = self.get_node(path)
+        if node is None or node.get('type') != 'file':
+            return None
+        content = node.get('content', '')
+        truncated = len(content) < offset
+        if truncated:
+            offset = 0
+        return {"content": content[offset:], "offset": len(content), "truncated": truncated}
+
+    def mount_host(self, path, host_path, owner='root', group='root', read_only=False, mkdir=False):
+        """Mounts a directory the Python runtime can reach (see LocalDirectoryBackend) at path."""
+        return self.attach_mount(path, LocalDirectoryBackend(host_path, read_only), owner, group, read_only, mkdir)
+
+    def attach_mount(self, path, backend, owner='root', group='root', read_only=False, mkdir=False):
+        """Mounts backend (see mounts.MountBackend) at path, a missing or empty directory."""
+        abs_path = self.get_absolute_path(path)
+        if abs_path == '/':
+            raise PermissionError("Cannot mount over the root directory.")
+        if mkdir:
+            self.create_directory(os.path.dirname(abs_path), {"name": "root", "group": "root"}, parents=True)
+        parent_path, chain = self._resolve_directory(os.path.dirname(abs_path))
+        if chain is None:
+            raise FileNotFoundError(f"Cannot mount on '{path}': No such file or directory")
+        name = os.path.basename(abs_path)
+        abs_path = join_path(parent_path, name)
+        for other in self.host_mounts:
+            if abs_path == other or abs_path.startswith(other + '/') or other.startswith(abs_path + '/'):
+                raise OSError(errno.EBUSY, f"Cannot mount on '{path}': '{other}' is already mounted")
+        existing = chain[-1]['children'].get(name)
+        if existing is not None and (existing.get('type') != 'directory' or existing.get('children')):
+            raise OSError(errno.ENOTEMPTY, f"Cannot mount on '{path}': Not an empty directory")
+
+        mount = Mount(abs_path, backend, owner, group, read_only)
+        node = self._new_node(mount.root_node())
+        if existing is None:
+            # The mount point itself is part of the VFS, so it is saved (empty) like any directory.
+            self.graft_node(abs_path, {key: value for key, value in node.items() if key != MOUNT_KEY} | {"children": {}})
+            existing = chain[-1]['children'][name]
+        self._index_discard(parent_path, name, existing)
+        chain[-1]['children'][name] = node
+        self._bump_generation(chain[-1])
+        self._index_add(parent_path, name, node)
+        self.host_mounts[abs_path] = mount
+        return mount.describe()
+
+    def unmount_host(self, path):
+        """Detaches the mount at path, leaving the empty directory it was mounted on."""
+        abs_path = self.get_absolute_path(path)
+        parent_path, chain = self._resolve_directory(os.path.dirname(abs_path))
+        name = os.path.basename(abs_path)
+        mount = self.host_mounts.get(join_path(parent_path, name)) if chain is not None else None
+        if mount is None:
+            raise OSError(errno.EINVAL, f"Cannot unmount '{path}': Not a mount point")
+        del self.host_mounts[mount.path]
+        node = chain[-1]['children'][name]
+        stub = self._new_node({key: value for key, value in node.items() if key != MOUNT_KEY} | {"children": {}})
+        self._index_discard(parent_path, name, node)
+        chain[-1]['children'][name] = stub
+        self._bump_generation(chain[-1])
+        self._index_add(parent_path, name, stub)
+        return True
+
+    def get_host_mounts(self):
+        return [self.host_mounts[path].describe() for path in sorted(self.host_mounts)]
+
+    def _reattach_mounts(self):
+        """Puts every mount back over its mount point after the tree was replaced (a load, reset or rollback)."""
+        for path, mount in list(self.host_mounts.items()):
+            node = self._canonical_node(path)
+            if node is not None and node.get(MOUNT_KEY) == path:
+                continue # Still there; a rolled-back tree keeps its mount points.
+            parent = self._canonical_node(os.path.dirname(path))
+            # A missing mount point comes back too (it is saved with the next image), so an older image can't drop a mount.
+            if ((node is None and parent is not None and parent.get('type') == 'directory')
+                    or (node is not None and node.get('type') == 'directory' and not node.get('children'))):
+                try:
+                    parent['children'][os.path.basename(path)] = self._new_node(mount.root_node())
+                    continue
+                except OSError:
+                    pass
+            print(f"WARNING: Mount point '{path}' is gone or no longer usable; unmounting it.")
+            del self.host_mounts[path]
+
+    def _mount_overlaps(self, abs_path):
+        """Whether something is mounted at, under or above abs_path."""
+        prefix = abs_path.rstrip('/') + '/'
+        return any(path == abs_path or path.startswith(prefix) or abs_path.startswith(path + '/')
+                   for path in self.host_mounts)
+
+    def _check_busy(self, abs_path, action):
+        """Refuses to remove, move or replace a mount point or a directory with one under it."""
+        if not self.host_mounts or abs_path == '/':
+            return
+        parent_path = self._resolve_directory(os.path.dirname(abs_path))[0]
+        if parent_path is None:
+            return
+        canonical = join_path(parent_path, os.path.basename(abs_path))
+        for path in self.host_mounts:
+            if path == canonical or path.startswith(canonical + '/'):
+                raise OSError(errno.EBUSY, f"Cannot {action} '{abs_path}': '{path}' is mounted")
+
+    def _refile_host(self, parent_node, name, event=None):
+        """Brings a mounted directory's entry for name up to date after a change made through the mount."""
+        children = parent_node['children']
+        rel = join_rel(children.rel, name)
+        replaced_node = dict.get(children, name)
+        try:
+            children[name] = children.mount.stat_node(rel)
+        except FileNotFoundError:
+            children.pop(name, None)
+        parent_node['mtime'] = datetime.utcnow().isoformat() + "Z"
+        self._bump_generation(parent_node)
+        self._forget_generations(replaced_node)
+        if event is not None and self._events.watching:
+            self._events.emit(event, f"{children.mount.path}/{rel}")
+
+    def _host_write(self, parent_path, parent_node, name, content, user_context):
+        children = parent_node['children']
+        existing = children.get(name)
+        if existing is not None:
+            if existing.get('type') != 'file':
+                raise IsADirectoryError(f"Cannot write to '{join_path(parent_path, name)}': It is a directory.")
+            self._check_permission(join_path(parent_path, name), existing, user_context, 'write')
+        else:
+            self._check_permission(parent_path, parent_node, user_context, 'write')
+        children.mount.check_writable()
+        children.mount.backend.write(join_rel(children.rel, name), content)
+        self._refile_host(parent_node, name, 'modify' if existing is not None else 'create')
+
+    def _host_graft(self, parent_node, name, node):
+        """Writes a subtree out into a mounted directory, replacing whatever was there under name."""
+        children = parent_node['children']
+        mount = children.mount
+        mount.check_writable()
+        if any(entry.get('type') == 'symlink' for _, _, entry in iter_tree('/', name, node)):
+            raise OSError(errno.EOPNOTSUPP, f"Cannot copy symbolic links into '{mount.path}': Operation not supported")
+        rel = join_rel(children.rel, name)
+        if name in children:
+            mount.backend.remove(rel)
+        stack = [(rel, node)]
+        while stack:
+            entry_rel, entry = stack.pop()
+            if entry.get('type') == 'directory':
+                mount.backend.mkdir(entry_rel)
+                stack.extend((join_rel(entry_rel, child_name), child) for child_name, child in entry.get('children', {}).items())
+            else:
+                mount.backend.write(entry_rel, content_bytes(entry) if is_binary(entry) else entry.get('content', ''))
+        self._refile_host(parent_node, name, 'create')
+
+    def _host_rename(self, old_parent_path, old_parent_node, old_name, new_parent_path, new_parent_node, new_name):
+        old_children, new_children = old_parent_node['children'], new_parent_node['children']
+        for children in (old_children, new_children):
+            if isinstance(children, HostChildren):
+                children.mount.check_writable()
+        if isinstance(old_children, HostChildren) and isinstance(new_children, HostChildren) and old_children.mount is new_children.mount:
+            mount = old_children.mount
+            old_rel, new_rel = join_rel(old_children.rel, old_name), join_rel(new_children.rel, new_name)
+            mount.backend.rename(old_rel, new_rel)
+            self._refile_host(old_parent_node, old_name)
+            self._refile_host(new_parent_node, new_name)
+            if self._events.watching:
+                self._events.emit('rename', f"{mount.path}/{new_rel}", old_path=f"{mount.path}/{old_rel}")
+            return
+        # Between a mount and the VFS (or two mounts) there is no rename, only a copy and a removal, as mv does across devices.
+        self.graft_node(join_path(new_parent_path, new_name), self.clone_node(old_parent_node['children'][old_name]))
+        self.remove(join_path(old_parent_path, old_name), recursive=True)
+
+    def _refuse_on_host(self, path, action):
+        """Mounted nodes only have the owner, group and mode their mount gives them."""
+        node = self._real_path(path)[1] if self.host_mounts else None
+        if node is not None and host_location(node) is not None:
+            raise OSError(errno.EOPNOTSUPP, f"Cannot {action} '{path}': Operation not supported on a mounted file")
+
+    def set_shard_mounts(self, mounts):
+        """Saves the image in shards split at the given mount points ('*' matches one component)."""
+        self.shard_mounts = sorted({'/' + m.strip('/') for m in mounts if m.strip('/')}, key=lambda m: -m.count('/'))
+        self._all_shards_dirty = True
+        return True
+
+    def _shard_name(self, path):
+        parts = [part for part in path.split('/') if part]
+        for mount in self.shard_mounts:
+            mount_parts = mount.strip('/').split('/')
+            if len(parts) >= len(mount_parts) and all(fnmatchcase(p, m) for p, m in zip(parts, mount_parts)):
+                return '/' + '/'.join(parts[:len(mount_parts)])
+        return ROOT_SHARD
+
+    def _mark_shards_dirty(self, path, resolve_last=False):
+        # A change below a symlink lands wherever it points, so don't guess.
+        parts = [part for part in path.split('/') if part]
+        if not resolve_last:
+            parts = parts[:-1]
+        node = self.fs_data.get('/')
+        for part in parts:
+            node = node.get('children', {}).get(part) if node else None
+            if node and node.get('type') == 'symlink':
+                self._all_shards_dirty = True
+                return
+        self._dirty_shards.add(self._shard_name(path))
+        if not resolve_last:
+            # The parent's mtime changes too, and a mount point's parent sits in another shard.
+            self._dirty_shards.add(self._shard_name(os.path.dirname(path)))
+        # Removing, moving or recursively changing a directory reaches the shards under it.
+        prefix = path.rstrip('/') + '/'
+        self._dirty_shards.update(name for name in self._shard_versions if name.startswith(prefix))
+
+    def _expand_shard_mounts(self):
+        """Maps each shard name to its directory node in the current tree."""
+        shards = {ROOT_SHARD: self.fs_data.get('/')}
+        for mount in self.shard_mounts:
+            level = [('', self.fs_data.get('/'))]
+            for pattern in mount.strip('/').split('/'):
+                level = [(f"{path}/{name}", child) for path, node in level if MOUNT_KEY not in node
+                         for name, child in node.get('children', {}).items()
+                         if child.get('type') == 'directory' and fnmatchcase(name, pattern)]
+            for path, node in level:
+                shards.setdefault(path, node)
+        return shards
+
+    def _build_shard_save(self):
+        shards = self._expand_shard_mounts()
+        nested = {name: {id(shards[other]) for other in shards if other != name and other.startswith(name.rstrip('/') + '/')}
+                  for name in shards}
+        self._shard_version += 1
+        versions, images = {}, {}
+        for name, node in shards.items():
+            if self._all_shards_dirty or name in self._dirty_shards or name not in self._shard_versions:
+                images[name] = self._build_image(node, exclude=nested[name])
+                versions[name] = self._shard_version
+            else:
+                versions[name] = self._shard_versions[name]
+        self._shard_versions = versions
+        self._dirty_shards.clear()
+        self._all_shards_dirty = False
+        manifest = {"format": SHARDED_FORMAT, "version": self._shard_version, "shards": versions, JOURNAL_SEQ_KEY: self._journal_seq}
+        return {"format": SHARDED_FORMAT, "manifest": manifest, "shards": images}
+
+    def _assemble_shards(self, data):
+        """Stitches a sharded save back into one tree, returning its root node."""
+        manifest = data.get('manifest', {})
+        images = data.get('shards', {})
+
+        def unpack(image):
+            root_node = image.get('/')
+            blobs = image.get(BLOB_TABLE_KEY)
+            if blobs is not None:
+                self._resolve_blob_refs(root_node, blobs)
+            return root_node
+
+        root = unpack(images[ROOT_SHARD])
+        for name in sorted(images, key=lambda n: n.count('/')):
+            if name == ROOT_SHARD:
+                continue
+            parent = root
+            for part in [part for part in name.split('/') if part][:-1]:
+                parent = parent.get('children', {}).get(part) if parent else None
+            if not parent or parent.get('type') != 'directory':
+                print(f"WARNING: No parent directory for filesystem shard '{name}'; skipping it.")
+                continue
+            parent['children'][os.path.basename(name)] = unpack(images[name])
+        self._shard_versions = dict(manifest.get('shards', {}))
+        self._shard_version = max([manifest.get('version', 0)] + list(self._shard_versions.values()))
+        return root, manifest.get(JOURNAL_SEQ_KEY, 0)
+
+    def get_content_hash(self, node):
+        """A stable digest of a file's content; free when the content store is on."""
+        if not node or node.get('type') != 'file':
+            return None
+        return node.get('content_hash') or self._hash_content(node.get('content', ''), is_binary(node))
+
+    def contents_equal(self, node_a, node_b):
+        if node_a is node_b:
+            return True
+        hash_a, hash_b = node_a.get('content_hash'), node_b.get('content_hash')
+        if hash_a and hash_b:
+            return hash_a == hash_b
+        return is_binary(node_a) == is_binary(node_b) and node_a.get('content', '') == node_b.get('content', '')
+
+    def read_bytes(self, path):
+        """A file's content as bytes: its own bytes if it is binary, else its text as UTF-8."""
+        node = self.get_node(path)
+        if not node:
+            raise FileNotFoundError(f"'{path}': No such file or directory")
+        if node.get('type') != 'file':
+            raise IsADirectoryError(f"'{path}': Is a directory")
+        return content_bytes(node)
+
+    def read_view(self, path):
+        """read_bytes as a memoryview, for slicing big binaries without copying them again."""
+        return memoryview(self.read_bytes(path))
 
 
     def set_context(self, current_path, user_groups=None):
@@ -40,6 +1419,11 @@ class FileSystemManager:
 
     def _initialize_default_filesystem(self):
         now_iso = datetime.utcnow().isoformat() + "Z"
+        self._journal_pending = []
+        self._journal_needs_snapshot = True
+        self._all_shards_dirty = True
+        self._lazy_contents = False
+        self._undo_tree()
         self.fs_data = {
             "/": {
                 "type": "directory", "children": {
@@ -68,6 +1452,9 @@ class FileSystemManager:
                 }, "owner": "root", "group": "root", "mode": 0o755, "mtime": now_iso,
             }
         }
+        if self.compact_nodes:
+            self.fs_data['/'] = compact_tree(self.fs_data['/'])
+        self._reset_derived_state()
 
     def reset(self):
         """Resets the filesystem to a default state."""
@@ -75,9 +1462,56 @@ class FileSystemManager:
         self._save_state()
 
     def get_node(self, path, resolve_symlink=True, visited_links=None):
-        if visited_links is None:
-            visited_links = set()
+        if visited_links is not None:
+            node = self._resolve_node(path, resolve_symlink, visited_links, [])
+            if self._lazy_contents and node is not None:
+                self._hydrate(node)
+            return self._host_view(node) if self.host_mounts else node
+
+        # Relative lookups depend on the working directory, absolute ones do not.
+        if path and path.startswith('/'):
+            cache_key = (path, resolve_symlink)
+        else:
+            cache_key = (path, resolve_symlink, self.current_path)
+
+        entry = self._node_cache.get(cache_key)
+        if entry is not None:
+            node, dependencies = entry
+            generations = self._dir_generations
+            for dir_node, generation in dependencies:
+                if generations.get(id(dir_node), 0) != generation:
+                    break
+            else:
+                self._node_cache.move_to_end(cache_key)
+                self._cache_hits += 1
+                if self._lazy_contents and node is not None:
+                    self._hydrate(node) # Appended to since it was cached.
+                return self._host_view(node) if self.host_mounts else node
+            del self._node_cache[cache_key]
+
+        self._cache_misses += 1
+        dependencies = []
+        node = self._resolve_node(path, resolve_symlink, set(), dependencies)
+        if self._lazy_contents and node is not None:
+            self._hydrate(node)
+        if self._node_cache_size:
+            self._node_cache[cache_key] = (node, tuple(dependencies))
+            if len(self._node_cache) > self._node_cache_size:
+                self._node_cache.popitem(last=False)
+        return self._host_view(node) if self.host_mounts else node
+
+    def _host_view(self, node):
+        """A copy of a mounted file's node holding the content as read from the host now."""
+        content = node.get('content') if node is not None else None
+        if not isinstance(content, HostContent):
+            return node
+        try:
+            return dict(node, content=content.value())
+        except FileNotFoundError:
+            return None # Removed on the host since its directory was listed.
 
+    def _resolve_node(self, path, resolve_symlink, visited_links, dependencies):
+        """Walks the tree to resolve a path, recording each consulted directory's generation in dependencies."""
         abs_path = self.get_absolute_path(path)
 
         if abs_path in visited_links:
@@ -90,9 +1524,13 @@ class FileSystemManager:
 
         parts = [part for part in abs_path.split('/') if part]
         node = self.fs_data.get('/')
+        generations = self._dir_generations
 
         for i, part in enumerate(parts):
-            if not node or node.get('type') != 'directory' or 'children' not in node or part not in node['children']:
+            if not node or node.get('type') != 'directory' or 'children' not in node:
+                return None
+            dependencies.append((node, generations.get(id(node), 0)))
+            if part not in node['children']:
                 return None
 
             node = node['children'][part]
@@ -105,82 +1543,282 @@ class FileSystemManager:
                 remaining_parts = parts[i+1:]
                 full_new_path = os.path.join(resolved_target_abs_path, *remaining_parts)
 
-                return self.get_node(full_new_path, resolve_symlink=True, visited_links=visited_links)
+                return self._resolve_node(full_new_path, True, visited_links, dependencies)
 
         return node
 
-    def fsck(self, users, groups, repair=False):
+    def walk(self, path, topdown=True, follow_symlinks=False, max_depth=None, prune=None, check_perms=None, key=None, reverse=False):
+        """Yields (abs_path, name, node, depth) for path and everything below it, iteratively."""
+        abs_path = self.get_absolute_path(path)
+        node = self.get_node(abs_path)
+        if node is None:
+            return
+        # (abs_path, name, node, depth, parent's children dict, entry in it,
+        # ancestor directories as (node, parent link) when following links, expanded)
+        stack = [(abs_path, os.path.basename(abs_path) or '/', node, 0, None, node, None, False)]
+        while stack:
+            current_path, name, node, depth, siblings, entry, ancestors, expanded = stack.pop()
+            if expanded:
+                yield current_path, name, node, depth
+                continue
+            descend = node.get('type') == 'directory' and (max_depth is None or depth < max_depth)
+            if descend and follow_symlinks:
+                link = ancestors
+                while link is not None and link[0] is not node:
+                    link = link[1]
+                descend = link is None # Otherwise a symlink loop back to one of our ancestors.
+                ancestors = (node, ancestors)
+            if descend and prune is not None and prune(current_path, name, node, depth):
+                descend = False
+            if descend and check_perms is not None and not self._can_descend(current_path, node, check_perms):
+                descend = False
+            if not descend:
+                yield current_path, name, node, depth
+                continue
+            if topdown:
+                yield current_path, name, node, depth
+                if siblings is not None and siblings.get(name) is not entry:
+                    continue # Removed or replaced while we were paused on it.
+            else:
+                stack.append((current_path, name, node, depth, siblings, entry, None, True))
+            children = node.get('children', {})
+            if key is None:
+                ordered = sorted(children, reverse=reverse)
+            else:
+                ordered = [item[0] for item in sorted(children.items(), key=key, reverse=reverse)]
+            prefix = current_path if current_path.endswith('/') else current_path + '/'
+            for child_name in reversed(ordered): # Pushed last-first so they pop in order.
+                child = children[child_name]
+                child_path = prefix + child_name
+                target = child
+                if follow_symlinks and child.get('type') == 'symlink':
+                    target = self.get_node(child_path) or child
+                stack.append((child_path, child_name, target, depth + 1, children, child, ancestors, False))
+
+    def _can_descend(self, path, node, user_context):
+        try:
+            return (self._check_permission(path, node, user_context, 'read')
+                    and self._check_permission(path, node, user_context, 'execute'))
+        except PermissionError:
+            return False
+
+    def fsck(self, users, groups, repair=False, verify_sizes=False, incremental=False, progress=None):
         """Checks and optionally repairs the filesystem integrity."""
         report = []
         changes_made = False
-        all_nodes = []
-
-        def traverse(node, path):
-            all_nodes.append((path, node))
-            if node.get('type') == 'directory':
-                for name, child in node.get('children', {}).items():
-                    traverse(child, os.path.join(path, name))
-
-        traverse(self.fs_data['/'], '/')
-
         existing_users = set(users.keys())
         existing_groups = set(groups.keys())
-
-        for path, node in all_nodes:
-            if node.get('owner') not in existing_users:
-                report.append(f"Orphaned node found at {path} (owner '{node.get('owner')}' does not exist).")
-                if repair:
-                    node['owner'] = 'root'
-                    report.append(f" -> Repaired: Set owner to 'root'.")
-                    changes_made = True
-
-            if node.get('group') not in existing_groups:
-                report.append(f"Orphaned node found at {path} (group '{node.get('group')}' does not exist).")
-                if repair:
-                    node['group'] = 'root'
-                    report.append(f" -> Repaired: Set group to 'root'.")
-                    changes_made = True
-
-            if node.get('type') == 'symlink':
-                target_path = self.get_absolute_path(os.path.join(os.path.dirname(path), node.get('target')))
-                if self.get_node(target_path) is None:
-                    report.append(f"Dangling symlink found at {path} pointing to '{node.get('target')}'")
+        principals = (frozenset(existing_users), frozenset(existing_groups))
+        if verify_sizes:
+            self._ensure_aggregates()
+
+        if incremental and self._fsck_dirty is not None and self._fsck_principals == principals:
+            roots = self._fsck_roots()
+            paths = None # Links are few here; resolve them from the root.
+            links = {}
+            if self._fsck_links_stale:
+                index = self._mtime_index_ready() or self._name_index_ready()
+                if index is None:
+                    roots, paths = ['/'], {}
+                else:
+                    links = {path: self._canonical_node(path) for path in index.links_under('/')}
+        else:
+            roots, paths, links = ['/'], {}, {}
+
+        checked = 0
+        attrs_repaired = False
+        with self.batch(rollback=False):
+            for root in roots:
+                root_node = self._canonical_node(root)
+                if root_node is None:
+                    continue # Removed since; that marked the links stale.
+                # A symlink root is checked as itself; walk() would start at its target.
+                entries = [(root, root_node)] if root_node.get('type') == 'symlink' else (
+                    (path, node) for path, _, node, _ in self.walk(root, topdown=not verify_sizes, prune=_at_mount))
+                totals = {} # directory path -> [bytes, files] of the children seen so far
+                for path, node in entries:
+                    checked += 1
+                    if progress is not None and checked % FSCK_PROGRESS_INTERVAL == 0:
+                        progress(checked, path)
+                    if paths is not None:
+                        paths[path] = node
+                    node_type = node.get('type')
+
+                    if node.get('owner') not in existing_users:
+                        report.append(f"Orphaned node found at {path} (owner '{node.get('owner')}' does not exist).")
+                        if repair:
+                            self._undo_fields(node)
+                            node['owner'] = 'root'
+                            attrs_repaired = True
+                            report.append(f" -> Repaired: Set owner to 'root'.")
+
+                    if node.get('group') not in existing_groups:
+                        report.append(f"Orphaned node found at {path} (group '{node.get('group')}' does not exist).")
+                        if repair:
+                            self._undo_fields(node)
+                            node['group'] = 'root'
+                            attrs_repaired = True
+                            report.append(f" -> Repaired: Set group to 'root'.")
+
+                    if node_type == 'symlink':
+                        links[path] = node
+
+                    if verify_sizes:
+                        # Post-order: a directory comes after everything under it.
+                        if node_type == 'directory':
+                            total_size, file_count = totals.pop(path, (0, 0))
+                            if node.get('total_size') != total_size or node.get('file_count') != file_count:
+                                report.append(f"Size aggregate mismatch at {path} (recorded {node.get('total_size')} bytes/{node.get('file_count')} files, actual {total_size} bytes/{file_count} files).")
+                                if repair:
+                                    self._undo_fields(node)
+                                    node['total_size'] = total_size
+                                    node['file_count'] = file_count
+                                    attrs_repaired = True
+                                    report.append(f" -> Repaired: Updated size aggregate.")
+                            node_totals = (total_size, file_count)
+                        else:
+                            node_totals = self._node_totals(node)
+                        if path != root:
+                            parent_totals = totals.setdefault(path[:path.rfind('/')] or '/', [0, 0])
+                            parent_totals[0] += node_totals[0]
+                            parent_totals[1] += node_totals[1]
+
+            if attrs_repaired:
+                changes_made = True
+                self._quota_ledger = None # Owners were rewritten in place.
+                self._save_state() # Edited in place without a journal record, so this forces a full save.
+
+            for path, link in links.items():
+                if link is None or link.get('type') != 'symlink':
+                    continue
+                target_path = os.path.normpath(os.path.join(os.path.dirname(path), link.get('target', '')))
+                target = self._lookup_in(paths, target_path) if paths is not None else self.get_node(target_path)
+                if target is None:
+                    report.append(f"Dangling symlink found at {path} pointing to '{link.get('target')}'")
                     if repair:
-                        parent_path = os.path.dirname(path)
-                        parent_node = self.get_node(parent_path)
-                        del parent_node['children'][os.path.basename(path)]
+                        self.remove(path)
                         report.append(f" -> Repaired: Removed dangling link.")
                         changes_made = True
 
-        home_dir_node = self.get_node("/home")
-        for user in existing_users:
-            if user not in home_dir_node.get('children', {}):
-                report.append(f"User '{user}' is missing a home directory.")
-                if repair:
-                    self.create_directory(f"/home/{user}", {"name": user, "group": users[user].get('primaryGroup', user)})
-                    self.chown(f"/home/{user}", user)
-                    report.append(f" -> Repaired: Created /home/{user}.")
-                    changes_made = True
-
-        if changes_made:
-            self._save_state()
+            home_dir_node = self.get_node("/home") or {}
+            for user in existing_users:
+                if user not in home_dir_node.get('children', {}):
+                    report.append(f"User '{user}' is missing a home directory.")
+                    if repair:
+                        # Made as root, since only root may write /home, then handed over.
+                        self.create_directory(f"/home/{user}", {"name": "root", "group": users[user].get('primaryGroup', user)})
+                        self.chown(f"/home/{user}", user)
+                        report.append(f" -> Repaired: Created /home/{user}.")
+                        changes_made = True
 
+        if progress is not None:
+            progress(checked, None)
+        if not report or repair:
+            # Clean now; later checks only need to look at what changes from here on.
+            self._fsck_dirty = set()
+            self._fsck_links_stale = False
+            self._fsck_principals = principals
         return report, changes_made
 
+    def _lookup_in(self, paths, abs_path):
+        """get_node for abs_path, following symlinks, against a {canonical path: node} map of the tree."""
+        for _ in range(MAX_SYMLINK_HOPS):
+            node = paths.get(abs_path)
+            if node is not None:
+                # Already canonical, so only the node itself can be a link.
+                if node.get('type') != 'symlink':
+                    return node
+                abs_path = os.path.normpath(os.path.join(os.path.dirname(abs_path), node.get('target', '')))
+                continue
+            parts = [part for part in abs_path.split('/') if part]
+            current, node = '/', paths.get('/')
+            for i, part in enumerate(parts):
+                current = join_path(current, part)
+                node = paths.get(current)
+                if node is None:
+                    return None
+                if node.get('type') == 'symlink':
+                    abs_path = os.path.normpath(os.path.join(os.path.dirname(current), node.get('target', ''), *parts[i+1:]))
+                    break
+            else:
+                return node
+        return None # Too many levels of symbolic links
+
+    def _fsck_roots(self):
+        """The changed subtrees an incremental fsck has to visit, with any nested in another dropped."""
+        roots = []
+        for path in sorted(self._fsck_dirty, key=lambda path: path.replace('/', '\0')):
+            if not roots or not (path + '/').startswith(roots[-1].rstrip('/') + '/'):
+                roots.append(path)
+        return roots
+
+    def _fsck_note_change(self, op, fields):
+        """Records what a journaled change could have broken since the last clean fsck."""
+        if op in ('remove', 'rename', 'graft'):
+            self._fsck_links_stale = True
+        if op in ('chmod', 'touch', 'remove'):
+            return
+        if op == 'chown':
+            path = self._real_path(fields['path'])[0]
+        else:
+            path = fields['new'] if op == 'rename' else fields['path']
+            parent_path = self._resolve_directory(os.path.dirname(path))[0]
+            path = join_path(parent_path, os.path.basename(path)) if parent_path is not None else None
+        if path is None or len(self._fsck_dirty) >= FSCK_MAX_DIRTY:
+            self._fsck_dirty = None # Not worth tracking any more; the next check visits everything.
+        else:
+            self._fsck_dirty.add(path)
 
-    def load_state_from_json(self, json_string):
+    def load_state_from_json(self, json_string, journal=None):
+        """Loads a saved image, then replays any journal entries written after it."""
         try:
-            self.fs_data = json.loads(json_string)
+            # Compact nodes are built while parsing, so the dict form of the tree never exists all at once.
+            hook = (lambda obj: compact_node(self._load_binary(obj))) if self.compact_nodes else self._load_binary
+            data = lazy_image.loads(json_string, hook) if self.lazy_load else json.loads(json_string, object_hook=hook)
+            self._lazy_contents = self.lazy_load
+            if data.get('format') == SHARDED_FORMAT:
+                root, base_seq = self._assemble_shards(data)
+                data = {'/': root}
+                self._dirty_shards.clear()
+                self._all_shards_dirty = False
+            else:
+                # A legacy single image; every shard gets written on the next save.
+                base_seq = data.pop(JOURNAL_SEQ_KEY, 0)
+                blobs = data.pop(BLOB_TABLE_KEY, None)
+                if blobs is not None:
+                    self._resolve_blob_refs(data.get('/'), blobs)
+                self._shard_versions = {}
+                self._all_shards_dirty = True
+            self._undo_tree()
+            self.fs_data = data
+            self._journal_seq = base_seq
+            if journal:
+                self._replay_journal(journal)
+                self._all_shards_dirty = True
+            if self.compact_nodes:
+                data['/'] = compact_tree(data['/'])
+            # The stored journal no longer matches memory; fold it into a new base on the next flush.
+            self._journal_pending = []
+            self._journal_needs_snapshot = True
+            self._reset_derived_state()
             return True
         except json.JSONDecodeError:
             self._initialize_default_filesystem()
             return False
 
     def get_fs_data(self):
-        return self.fs_data
+        """The persisted form of the tree, with shared contents in a blob table when the content store is on."""
+        if self.content_store_enabled or self.compact_nodes or self.host_mounts or self._has_binary:
+            image = self._build_image()
+        else:
+            image = self.fs_data
+        if self.journal_enabled:
+            image = dict(image)
+            image[JOURNAL_SEQ_KEY] = self._journal_seq
+        return image
 
     def save_state_to_json(self):
-        return json.dumps(self.fs_data)
+        return json.dumps(self.get_fs_data(), default=json_default)
 
     def write_file(self, path, content, user_context):
         abs_path = self.get_absolute_path(path)
@@ -197,6 +1835,13 @@ class FileSystemManager:
             except Exception as e:
                 raise FileNotFoundError(f"Cannot create file in '{parent_path}': {repr(e)}")
 
+        if isinstance(parent_node['children'], HostChildren):
+            return self._host_write(parent_path, parent_node, file_name, content, user_context)
+        binary = isinstance(content, BYTES_TYPES)
+        if binary:
+            content = bytes_to_content(content)
+            self._has_binary = True
+
         existing_node = parent_node['children'].get(file_name)
 
         if existing_node:
@@ -208,24 +1853,102 @@ class FileSystemManager:
         if existing_node:
             if existing_node.get('type') != 'file':
                 raise IsADirectoryError(f"Cannot write to '{path}': It is a directory.")
+            size_delta = len(content) - len(existing_node.get('content', ''))
+            self._enforce_quota(path, existing_node.get('owner'), size_delta, 0, user_context)
+            self._undo_fields(existing_node)
+            if self.content_store_enabled:
+                # Dropping our reference detaches this file from any clones sharing the old blob.
+                content, digest = self._intern_content(content, binary=binary)
+                self._release_file(existing_node)
+                existing_node['content_hash'] = digest
+            else:
+                existing_node.pop('content_hash', None)
             existing_node['content'] = content
+            if binary:
+                existing_node['encoding'] = BINARY_ENCODING
+            else:
+                existing_node.pop('encoding', None)
             existing_node['mtime'] = now_iso
+            self._index_rewrite(parent_path, file_name)
+            if self._quota_ledger is not None:
+                self._quota_ledger.charge(existing_node.get('owner'), size_delta, 0)
+            self._adjust_aggregates(self._directory_chain(parent_path), size_delta, 0)
         else:
             parent_mode = parent_node.get('mode', 0)
             is_collaborative = (parent_mode & 0o070) and not (parent_mode & 0o007)
 
             new_file_group = parent_node.get('group') if is_collaborative else user_context.get('group', 'guest')
             new_file_mode = 0o660 if is_collaborative else 0o644
+            self._enforce_quota(path, str(user_context.get('name', 'guest')), len(content), 1, user_context)
 
-            new_file = {
+            new_file = self._new_node({
                 "type": "file", "content": content, "owner": str(user_context.get('name', 'guest')),
-                "group": str(new_file_group), "mode": new_file_mode, "mtime": now_iso
-            }
+                "group": str(new_file_group), "mode": new_file_mode, "mtime": now_iso,
+                **({"encoding": BINARY_ENCODING} if binary else {})
+            })
+            if self.content_store_enabled:
+                self._retain_file(new_file)
+            self._undo_child(parent_node, file_name)
             parent_node['children'][file_name] = new_file
+            self._bump_generation(parent_node)
+            self._index_add(parent_path, file_name, new_file)
+            self._adjust_aggregates(self._directory_chain(parent_path), len(content), 1)
+
+        self._undo_fields(parent_node)
+        parent_node['mtime'] = now_iso
+        self._journal('write', path=abs_path, node=self._journal_node(parent_node['children'][file_name]), mtime=now_iso)
+        self._save_state()
 
+    def append_file(self, path, data, user_context, create=True):
+        """Adds data to the end of the file at path, creating it if missing and create is set."""
+        abs_path = self.get_absolute_path(path)
+        parent_path = os.path.dirname(abs_path)
+        file_name = os.path.basename(abs_path)
+        parent_node = self.get_node(parent_path)
+        existing_node = None
+        if parent_node and parent_node.get('type') == 'directory':
+            existing_node = parent_node['children'].get(file_name)
+        if existing_node is None:
+            if not create:
+                raise FileNotFoundError(f"'{path}': No such file or directory")
+            return self.write_file(path, data, user_context)
+        if existing_node.get('type') != 'file':
+            raise IsADirectoryError(f"Cannot write to '{path}': It is a directory.")
+        if isinstance(parent_node['children'], HostChildren) or isinstance(data, BYTES_TYPES) or is_binary(existing_node):
+            # Rare enough to take the long way round.
+            if isinstance(data, BYTES_TYPES) or is_binary(existing_node):
+                data = content_bytes(existing_node) + (bytes(data) if isinstance(data, BYTES_TYPES) else str(data).encode('utf-8'))
+            else:
+                data = existing_node.get('content', '') + data
+            return self.write_file(path, data, user_context)
+        self._check_permission(abs_path, existing_node, user_context, 'write')
+        if not data:
+            return
+        self._enforce_quota(path, existing_node.get('owner'), len(data), 0, user_context)
+
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        self._undo_fields(existing_node)
+        if self.content_store_enabled:
+            self._release_file(existing_node)
+        existing_node.pop('content_hash', None)
+        self._append_content(existing_node, data)
+        existing_node['mtime'] = now_iso
+        self._index_rewrite(parent_path, file_name)
+        if self._quota_ledger is not None:
+            self._quota_ledger.charge(existing_node.get('owner'), len(data), 0)
+        self._adjust_aggregates(self._directory_chain(parent_path), len(data), 0)
+        self._undo_fields(parent_node)
         parent_node['mtime'] = now_iso
+        self._journal('append', path=abs_path, data=data, mtime=now_iso)
         self._save_state()
 
+    def _append_content(self, node, data):
+        content = node.get('content', '')
+        if not isinstance(content, ChunkedContent):
+            content = node['content'] = ChunkedContent([content])
+            self._lazy_contents = True # So get_node joins the pieces before handing the node out.
+        content.append(data)
+
     def create_directory(self, path, user_context, parents=False):
         abs_path = self.get_absolute_path(path)
         if self.get_node(abs_path):
@@ -237,6 +1960,7 @@ class FileSystemManager:
         current_node = self.fs_data.get('/')
         current_path_so_far = '/'
         now_iso = datetime.utcnow().isoformat() + "Z"
+        vfs_changed = False
 
         for i, part in enumerate(parts):
             is_last_part = i == len(parts) - 1
@@ -248,77 +1972,136 @@ class FileSystemManager:
                     raise FileNotFoundError(f"Cannot create directory '{path}': No such file or directory")
 
                 self._check_permission(parent_path_for_perm_check, current_node, user_context, 'write')
-
-                new_dir = {
-                    "type": "directory", "children": {}, "owner": str(user_context.get('name', 'guest')),
-                    "group": str(user_context.get('group', 'guest')), "mode": 0o755, "mtime": now_iso
-                }
-                current_node['children'][part] = new_dir
-                current_node['mtime'] = now_iso
+                children = current_node['children']
+                if isinstance(children, HostChildren):
+                    children.mount.check_writable()
+                    children.mount.backend.mkdir(join_rel(children.rel, part))
+                    self._refile_host(current_node, part, 'create')
+                else:
+                    self._enforce_quota(current_path_so_far, str(user_context.get('name', 'guest')), 0, 1, user_context)
+
+                    new_dir = self._new_node({
+                        "type": "directory", "children": {}, "owner": str(user_context.get('name', 'guest')),
+                        "group": str(user_context.get('group', 'guest')), "mode": 0o755, "mtime": now_iso,
+                        "total_size": 0, "file_count": 0
+                    })
+                    self._undo_child(current_node, part)
+                    self._undo_fields(current_node)
+                    current_node['children'][part] = new_dir
+                    current_node['mtime'] = now_iso
+                    self._bump_generation(current_node)
+                    self._index_add(parent_path_for_perm_check, part, new_dir)
+                    self._journal('mkdir', path=current_path_so_far, node=self._journal_node(new_dir), mtime=now_iso)
+                    vfs_changed = True
 
             current_node = current_node['children'][part]
 
             if current_node.get('type') != 'directory':
                 raise FileExistsError(f"Cannot create directory '{path}': A component '{part}' is a file.")
 
-        self._save_state()
+        if vfs_changed:
+            self._save_state()
 
 
     def chmod(self, path, mode_str):
         if not re.match(r'^[0-7]{3,4}$', mode_str):
             raise ValueError(f"Invalid mode: '{mode_str}'")
 
+        self._refuse_on_host(path, "change the mode of")
         node = self.get_node(path)
         if not node:
             raise FileNotFoundError(f"Cannot access '{path}': No such file or directory")
 
+        self._undo_fields(node)
         node['mode'] = int(mode_str, 8)
         node['mtime'] = datetime.utcnow().isoformat() + "Z"
+        self._journal('chmod', path=self.get_absolute_path(path), attrs={'mode': node['mode']}, mtime=node['mtime'])
         self._save_state()
 
-    def _recursive_chown(self, node, new_owner):
-        now_iso = datetime.utcnow().isoformat() + "Z"
+    def set_mtime(self, path, mtime_iso):
+        """Sets the modification time of the node at path, as touch does."""
+        real_path, node = self._real_path(path) if self.host_mounts else (None, None)
+        location = host_location(node) if node is not None else None
+        if location is not None:
+            mount, rel = location
+            mount.check_writable()
+            mount.backend.set_mtime(rel, iso_to_micros(mtime_iso) / 1000000)
+            node['mtime'] = mtime_iso
+            if self._events.watching:
+                self._events.emit('attrib', real_path)
+            return
+
+        node = self.get_node(path)
+        if not node:
+            raise FileNotFoundError(f"Cannot access '{path}': No such file or directory")
+
+        self._undo_fields(node)
+        node['mtime'] = mtime_iso
+        self._journal('touch', path=self.get_absolute_path(path), attrs={}, mtime=mtime_iso)
+        self._save_state()
+
+    def _recursive_chown(self, node, new_owner, now_iso):
+        self._undo_fields(node)
         node['owner'] = new_owner
         node['mtime'] = now_iso
-        if node.get('type') == 'directory' and node.get('children'):
+        if node.get('type') == 'directory' and MOUNT_KEY not in node and node.get('children'):
             for child_node in node['children'].values():
-                self._recursive_chown(child_node, new_owner)
+                self._recursive_chown(child_node, new_owner, now_iso)
 
     def chown(self, path, new_owner, recursive=False):
+        self._refuse_on_host(path, "change the owner of")
         node = self.get_node(path)
         if not node:
             raise FileNotFoundError(f"Cannot access '{path}': No such file or directory")
 
-        if recursive and node.get('type') == 'directory':
-            self._recursive_chown(node, new_owner)
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        recursive = recursive and node.get('type') == 'directory'
+        ledger = self._quota_ledger
+        if recursive:
+            if ledger is not None:
+                ledger.discard_tree(node)
+            self._recursive_chown(node, new_owner, now_iso)
+            if ledger is not None:
+                ledger.add_tree(node)
         else:
+            if ledger is not None:
+                ledger.add_node(node, -1)
+            self._undo_fields(node)
             node['owner'] = new_owner
-            node['mtime'] = datetime.utcnow().isoformat() + "Z"
+            node['mtime'] = now_iso
+            if ledger is not None:
+                ledger.add_node(node)
 
+        self._journal('chown', path=self.get_absolute_path(path), attrs={'owner': new_owner}, recursive=recursive, mtime=now_iso)
         self._save_state()
 
-    def _recursive_chgrp(self, node, new_group):
-        now_iso = datetime.utcnow().isoformat() + "Z"
+    def _recursive_chgrp(self, node, new_group, now_iso):
+        self._undo_fields(node)
         node['group'] = new_group
         node['mtime'] = now_iso
-        if node.get('type') == 'directory' and node.get('children'):
+        if node.get('type') == 'directory' and MOUNT_KEY not in node and node.get('children'):
             for child_node in node['children'].values():
-                self._recursive_chgrp(child_node, new_group)
+                self._recursive_chgrp(child_node, new_group, now_iso)
 
     def chgrp(self, path, new_group, recursive=False):
+        self._refuse_on_host(path, "change the group of")
         node = self.get_node(path)
         if not node:
             raise FileNotFoundError(f"Cannot access '{path}': No such file or directory")
 
-        if recursive and node.get('type') == 'directory':
-            self._recursive_chgrp(node, new_group)
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        recursive = recursive and node.get('type') == 'directory'
+        if recursive:
+            self._recursive_chgrp(node, new_group, now_iso)
         else:
+            self._undo_fields(node)
             node['group'] = new_group
-            node['mtime'] = datetime.utcnow().isoformat() + "Z"
+            node['mtime'] = now_iso
 
+        self._journal('chown', path=self.get_absolute_path(path), attrs={'group': new_group}, recursive=recursive, mtime=now_iso)
         self._save_state()
 
-    def ln(self, target, link_name_arg, user_context):
+    def ln(self, target, link_name_arg, user_context, force=False):
         link_path = self.get_absolute_path(link_name_arg)
         link_name = os.path.basename(link_path)
         parent_path = os.path.dirname(link_path)
@@ -326,22 +2109,107 @@ class FileSystemManager:
         parent_node = self.get_node(parent_path)
         if not parent_node or parent_node.get('type') != 'directory':
             raise FileNotFoundError(f"cannot create symbolic link '{link_name}': No such file or directory")
+        if isinstance(parent_node['children'], HostChildren):
+            raise OSError(errno.EOPNOTSUPP, f"cannot create symbolic link '{link_name}': Operation not supported in a mounted directory")
 
-        if link_name in parent_node.get('children', {}):
-            raise FileExistsError(f"cannot create symbolic link '{link_name}': File exists")
+        existing_node = parent_node.get('children', {}).get(link_name)
+        if existing_node:
+            if not force:
+                raise FileExistsError(f"cannot create symbolic link '{link_name}': File exists")
+            if existing_node.get('type') == 'directory':
+                raise IsADirectoryError(f"cannot overwrite directory '{link_name}' with a symbolic link")
+        self._enforce_quota(link_path, str(user_context.get('name', 'guest')), 0, 0 if existing_node else 1, user_context)
 
         now_iso = datetime.utcnow().isoformat() + "Z"
-        symlink_node = {
+        symlink_node = self._new_node({
             "type": "symlink",
             "target": target,
             "owner": str(user_context.get('name', 'guest')),
             "group": str(user_context.get('group', 'guest')),
             "mode": 0o777,
             "mtime": now_iso
-        }
+        })
 
+        if existing_node:
+            self._index_discard(parent_path, link_name, existing_node)
+        self._undo_child(parent_node, link_name)
+        self._undo_fields(parent_node)
         parent_node['children'][link_name] = symlink_node
         parent_node['mtime'] = now_iso
+        self._bump_generation(parent_node)
+        self._index_add(parent_path, link_name, symlink_node)
+        self._journal('symlink', path=link_path, node=symlink_node, mtime=now_iso)
+        self._save_state()
+
+    def clone_node(self, source_node, metadata=None):
+        """Copies a subtree, sharing file contents with the source until either side is rewritten."""
+        metadata = metadata or {}
+        from_host = []
+
+        def clone(node):
+            node_copy = node.copy()
+            node_copy.update(metadata)
+            node_copy.pop(MOUNT_KEY, None)
+            content = node_copy.get('content')
+            if isinstance(content, HostContent):
+                node_copy['content'] = content.value()
+                from_host.append(node_copy)
+            elif isinstance(content, ChunkedContent):
+                node_copy['content'] = content.value() # Its pieces are appended to in place, so never shared.
+            return node_copy
+
+        root_copy = clone(source_node)
+        stack = [root_copy]
+        while stack:
+            node = stack.pop()
+            if node.get('type') == 'directory':
+                children = {name: clone(child) for name, child in node.get('children', {}).items()}
+                node['children'] = children
+                stack.extend(children.values())
+        if from_host:
+            self._compute_aggregates(root_copy) # Mounted directories carry no aggregates to inherit.
+        return root_copy
+
+    def graft_node(self, path, node, recompute_aggregates=True):
+        """Attaches an already-built node, and any subtree under it, at path."""
+        abs_path = self.get_absolute_path(path)
+        if abs_path == '/':
+            raise PermissionError("Cannot replace the root directory.")
+
+        parent_chain = self._directory_chain(os.path.dirname(abs_path))
+        if not parent_chain:
+            raise FileNotFoundError(f"Cannot create '{path}': No such file or directory")
+        parent_node = parent_chain[-1]
+        if isinstance(parent_node['children'], HostChildren):
+            return self._host_graft(parent_node, os.path.basename(abs_path), node)
+        self._check_busy(abs_path, "replace")
+
+        if self.compact_nodes:
+            node = compact_tree(node)
+        if recompute_aggregates:
+            self._compute_aggregates(node)
+        replaced_node = parent_node['children'].get(os.path.basename(abs_path))
+        old_size, old_files = self._node_totals(replaced_node) if replaced_node else (0, 0)
+        new_size, new_files = self._node_totals(node)
+        self._enforce_subtree_quota(path, node, replaced_node)
+        if self.content_store_enabled:
+            for file_node in self._iter_files(node):
+                self._retain_file(file_node)
+            if replaced_node:
+                for file_node in self._iter_files(replaced_node):
+                    self._release_file(file_node)
+
+        if replaced_node:
+            self._index_discard(os.path.dirname(abs_path), os.path.basename(abs_path), replaced_node)
+        self._undo_child(parent_node, os.path.basename(abs_path))
+        self._undo_fields(parent_node)
+        parent_node['children'][os.path.basename(abs_path)] = node
+        parent_node['mtime'] = datetime.utcnow().isoformat() + "Z"
+        self._bump_generation(parent_node)
+        self._forget_generations(replaced_node)
+        self._index_add(os.path.dirname(abs_path), os.path.basename(abs_path), node)
+        self._adjust_aggregates(parent_chain, new_size - old_size, new_files - old_files)
+        self._journal('graft', path=abs_path, node=self._journal_tree(node), mtime=parent_node['mtime'])
         self._save_state()
 
     def rename_node(self, old_path, new_path):
@@ -350,6 +2218,7 @@ class FileSystemManager:
 
         if abs_old_path == '/':
             raise PermissionError("Cannot rename the root directory.")
+        self._check_busy(abs_old_path, "move")
 
         old_parent_path = os.path.dirname(abs_old_path)
         old_name = os.path.basename(abs_old_path)
@@ -360,6 +2229,7 @@ class FileSystemManager:
 
         new_node_target = self.get_node(abs_new_path)
         if new_node_target and new_node_target.get('type') == 'directory':
+            new_parent_path = abs_new_path
             new_parent_node = new_node_target
             new_name = old_name
         else:
@@ -370,17 +2240,35 @@ class FileSystemManager:
         if not new_parent_node or new_parent_node.get('type') != 'directory':
             raise FileNotFoundError(f"Target directory '{os.path.dirname(new_path)}' does not exist.")
 
+        if new_parent_path == abs_old_path or new_parent_path.startswith(abs_old_path + '/'):
+            # Attaching a directory below itself would cut it off from the tree as a cycle.
+            raise ValueError(f"Cannot move '{old_path}' to a subdirectory of itself, '{new_path}'.")
+
         if new_name in new_parent_node.get('children', {}):
             raise FileExistsError(f"Cannot rename to '{new_path}': Destination already exists.")
 
+        if isinstance(old_parent_node['children'], HostChildren) or isinstance(new_parent_node['children'], HostChildren):
+            return self._host_rename(old_parent_path, old_parent_node, old_name, new_parent_path, new_parent_node, new_name)
+
         now_iso = datetime.utcnow().isoformat() + "Z"
         node_to_move = old_parent_node['children'][old_name]
+        moved_size, moved_files = self._node_totals(node_to_move)
+        self._adjust_aggregates(self._directory_chain(old_parent_path), -moved_size, -moved_files)
+        self._undo_child(old_parent_node, old_name)
+        self._undo_child(new_parent_node, new_name)
+        for changed_node in (node_to_move, old_parent_node, new_parent_node):
+            self._undo_fields(changed_node)
         del old_parent_node['children'][old_name]
         node_to_move['mtime'] = now_iso
         new_parent_node['children'][new_name] = node_to_move
+        self._index_move(old_parent_path, old_name, new_parent_path, new_name, node_to_move)
+        self._adjust_aggregates(self._directory_chain(new_parent_path), moved_size, moved_files)
         old_parent_node['mtime'] = now_iso
+        self._bump_generation(old_parent_node)
         if old_parent_node is not new_parent_node:
             new_parent_node['mtime'] = now_iso
+            self._bump_generation(new_parent_node)
+        self._journal('rename', old=abs_old_path, new=os.path.join(new_parent_path, new_name), mtime=now_iso)
         self._save_state()
 
     def remove(self, path, recursive=False):
@@ -395,31 +2283,34 @@ class FileSystemManager:
         if not parent_node or node_name not in parent_node.get('children', {}):
             raise FileNotFoundError(f"Cannot remove '{path}': No such file or directory.")
 
+        self._check_busy(abs_path, "remove")
         child_node = parent_node['children'][node_name]
         if child_node.get('type') == 'directory' and child_node.get('children') and not recursive:
             raise IsADirectoryError(f"Cannot remove '{path}': Directory not empty.")
+        children = parent_node['children']
+        if isinstance(children, HostChildren):
+            children.mount.check_writable()
+            children.mount.backend.remove(join_rel(children.rel, node_name))
+            self._refile_host(parent_node, node_name, 'delete')
+            return True
 
+        removed_size, removed_files = self._node_totals(child_node)
+        if self.content_store_enabled:
+            for file_node in self._iter_files(child_node):
+                self._release_file(file_node)
+        self._adjust_aggregates(self._directory_chain(parent_path), -removed_size, -removed_files)
+        self._undo_child(parent_node, node_name)
+        self._undo_fields(parent_node)
         del parent_node['children'][node_name]
+        self._index_discard(parent_path, node_name, child_node)
         parent_node['mtime'] = datetime.utcnow().isoformat() + "Z"
+        self._bump_generation(parent_node)
+        self._forget_generations(child_node)
+        self._journal('remove', path=abs_path, mtime=parent_node['mtime'])
         self._save_state()
         return True
 
     def _check_permission(self, path, node, user_context, permission_type):
-        def is_warded(check_path):
-            agenda_path = "/etc/agenda.json"
-            agenda_node = self.get_node(agenda_path, resolve_symlink=False)
-            if not agenda_node:
-                return False
-            try:
-                schedule = json.loads(agenda_node.get('content', '[]'))
-                for job in schedule:
-                    command = job.get('command', '')
-                    if command.startswith('chmod') and check_path in command:
-                        return True
-            except (json.JSONDecodeError, AttributeError):
-                return False
-            return False
-
         if user_context.get('name') == 'root':
             return True
         if not node:
@@ -453,13 +2344,47 @@ class FileSystemManager:
         if can_perform_action:
             return True
 
-        if permission_type == 'write' and is_warded(path):
+        if permission_type == 'write' and self._is_warded(path):
             raise PermissionError(f"Cannot modify '{os.path.basename(path)}': it is protected by a magical ward.")
 
         raise PermissionError(f"Permission denied to {permission_type} '{path}'")
 
-    def has_permission(self, path, user_context, permission_type):
-        node = self.get_node(path)
+    def _ward_index(self):
+        """The paths warded by scheduled chmod jobs plus their ancestors, recompiled when the agenda changes."""
+        agenda_node = self.get_node(AGENDA_PATH, resolve_symlink=False)
+        content = agenda_node.get('content', '[]') if agenda_node else None
+        if content is self._ward_source:
+            return self._ward_paths
+        warded = set()
+        try:
+            schedule = json.loads(content) if content is not None else []
+            for job in schedule:
+                command = job.get('command', '')
+                if not command.startswith('chmod'):
+                    continue
+                try:
+                    words = shlex.split(command)
+                except ValueError:
+                    words = command.split()
+                operands = [word for word in words[1:] if not word.startswith('-')]
+                for target in operands[1:]: # The first operand is the mode.
+                    target = os.path.normpath(target)
+                    while target not in warded and target not in ('', '.', '/'):
+                        warded.add(target)
+                        target = os.path.dirname(target)
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            warded = set()
+        self._ward_source = content
+        self._ward_paths = frozenset(warded)
+        return self._ward_paths
+
+    def _is_warded(self, path):
+        return os.path.normpath(path) in self._ward_index()
+
+    def has_permission(self, path, user_context, permission_type, node=None):
+        """Whether the user may read/write/execute path (node, when given, skips the lookup)."""
+        if node is None:
+            node = self.get_node(path)
         try:
             return self._check_permission(path, node, user_context, permission_type)
         except PermissionError:
@@ -468,14 +2393,120 @@ class FileSystemManager:
     def calculate_node_size(self, path):
         node = self.get_node(path)
         if not node: return 0
-        if node.get('type') == 'file': return len(node.get('content', ''))
-        if node.get('type') == 'directory':
-            total_size = 0
-            for child_name in node.get('children', {}):
-                child_path = os.path.join(path, child_name)
-                total_size += self.calculate_node_size(child_path)
-            return total_size
-        return 0
+        return self.get_node_size(node)
+
+    def get_node_size(self, node):
+        """Bytes used by a node; O(1) for directories thanks to the maintained aggregates."""
+        self._ensure_aggregates()
+        return self._node_totals(node)[0]
+
+    def get_usage(self):
+        """Total bytes and files in the whole VFS, in O(1)."""
+        self._ensure_aggregates()
+        total_size, file_count = self._node_totals(self.fs_data.get('/', {}))
+        return {"total_size": total_size, "file_count": file_count}
+
+    def set_max_vfs_size(self, max_bytes):
+        """Caps the file content the whole VFS may hold (0 for no cap); writes past it fail with ENOSPC."""
+        self.max_vfs_bytes = max(0, int(max_bytes or 0))
+        return True
+
+    def _quota_table(self):
+        """({owner: limits}, VFS-wide limits) from the quota file, recompiled when its content changes."""
+        quota_node = self.get_node(QUOTA_PATH, resolve_symlink=False)
+        content = quota_node.get('content') if quota_node and quota_node.get('type') == 'file' else None
+        if content is not self._quota_source:
+            self._quota_limits = compile_limits(content)
+            self._quota_source = content
+        return self._quota_limits
+
+    def _quota_ledger_ready(self):
+        if self._quota_ledger is None:
+            ledger = QuotaLedger()
+            ledger.add_tree(self.fs_data['/'])
+            self._quota_ledger = ledger
+        return self._quota_ledger
+
+    def _vfs_byte_limit(self, vfs_limits):
+        """The tighter of max_vfs_bytes and the quota file's hard VFS limit, or 0 if neither is set."""
+        return min((limit for limit in (self.max_vfs_bytes, vfs_limits[1]) if limit), default=0)
+
+    def _enforce_quota(self, path, owner, byte_delta, inode_delta, user_context=None, owner_deltas=None):
+        """Raises OSError before a change that would take the VFS or an owner past a hard limit."""
+        if byte_delta <= 0 and inode_delta <= 0:
+            return
+        if self.get_absolute_path(path) == QUOTA_PATH:
+            return # The limits must stay editable even when usage is already past them.
+        limits, vfs_limits = self._quota_table()
+        max_bytes = self._vfs_byte_limit(vfs_limits)
+        if max_bytes and byte_delta > 0 and self.get_usage()['total_size'] + byte_delta > max_bytes:
+            raise OSError(errno.ENOSPC, f"Cannot write '{path}': No space left on device")
+        if vfs_limits[3] and inode_delta > 0 and self._quota_ledger_ready().total_inodes + inode_delta > vfs_limits[3]:
+            raise OSError(errno.ENOSPC, f"Cannot create '{path}': No inodes left on device")
+        if not limits or (user_context or {}).get('name') == 'root':
+            return
+        for owner, (owner_bytes, owner_inodes) in (owner_deltas or {owner: (byte_delta, inode_delta)}).items():
+            owner_limits = limits.get(owner)
+            if owner_limits is None or owner == 'root':
+                continue
+            used_bytes, used_inodes = self._quota_ledger_ready().usage(owner)
+            if (owner_limits[1] and owner_bytes > 0 and used_bytes + owner_bytes > owner_limits[1]) or \
+                    (owner_limits[3] and owner_inodes > 0 and used_inodes + owner_inodes > owner_limits[3]):
+                raise OSError(errno.EDQUOT, f"Cannot write '{path}': Disk quota exceeded for user '{owner}'")
+
+    def _enforce_subtree_quota(self, path, node, replaced_node=None):
+        """_enforce_quota for grafting a whole subtree over replaced_node, owner by owner."""
+        owner_deltas = tally(node)
+        if replaced_node:
+            for owner, (byte_count, inode_count) in tally(replaced_node).items():
+                entry = owner_deltas.setdefault(owner, [0, 0])
+                entry[0] -= byte_count
+                entry[1] -= inode_count
+        byte_delta = sum(entry[0] for entry in owner_deltas.values())
+        inode_delta = sum(entry[1] for entry in owner_deltas.values())
+        self._enforce_quota(path, None, byte_delta, inode_delta, owner_deltas=owner_deltas)
+
+    def get_quota_report(self, owner=None):
+        """Usage against limits for owner, or for every owner with the whole VFS last."""
+        limits, vfs_limits = self._quota_table()
+        ledger = self._quota_ledger_ready()
+        owners = [owner] if owner is not None else sorted(set(ledger.owners()) | set(limits), key=str)
+        report = []
+        for name in owners:
+            used_bytes, used_inodes = ledger.usage(name)
+            report.append(dict(zip(("bytes_soft", "bytes_hard", "inodes_soft", "inodes_hard"), limits.get(name, NO_LIMITS)),
+                               owner=name, bytes=used_bytes, inodes=used_inodes))
+        bytes_hard = self._vfs_byte_limit(vfs_limits)
+        report.append({
+            "owner": None, "bytes": self.get_usage()['total_size'], "inodes": ledger.total_inodes,
+            "bytes_soft": vfs_limits[0], "bytes_hard": bytes_hard, "inodes_soft": vfs_limits[2], "inodes_hard": vfs_limits[3]
+        })
+        return report
+
+    def set_quota(self, owner, bytes_soft=0, bytes_hard=0, inodes_soft=0, inodes_hard=0):
+        """Records limits for owner (None for the whole VFS) in the quota file; all zeros removes them."""
+        quota_node = self.get_node(QUOTA_PATH)
+        try:
+            table = json.loads(quota_node['content']) if quota_node and quota_node.get('type') == 'file' else {}
+        except json.JSONDecodeError:
+            table = {}
+        if not isinstance(table, dict):
+            table = {}
+        entry = {"bytes_soft": int(bytes_soft), "bytes_hard": int(bytes_hard),
+                 "inodes_soft": int(inodes_soft), "inodes_hard": int(inodes_hard)}
+        if owner is None:
+            if any(entry.values()):
+                table['vfs'] = entry
+            else:
+                table.pop('vfs', None)
+        else:
+            users = table.setdefault('users', {})
+            if any(entry.values()):
+                users[owner] = entry
+            else:
+                users.pop(owner, None)
+        self.write_file(QUOTA_PATH, json.dumps(table, indent=2, sort_keys=True), {"name": "root", "group": "root"})
+        return True
 
     def validate_path(self, path, user_context, options_json):
         options = json.loads(options_json)
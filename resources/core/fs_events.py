@@ -0,0 +1,125 @@
+# gem/core/fs_events.py
+
+import errno
+
+MAX_WATCHES = 128
+MAX_QUEUED_EVENTS = 1024 # per watch; past this the queue collapses into one overflow event
+
+# (queued kind, new kind) -> the kind the pair collapses into; None drops both.
+# Pairs not listed are queued separately.
+_MERGES = {
+    ('create', 'modify'): 'create', ('create', 'attrib'): 'create', ('create', 'delete'): None,
+    ('delete', 'create'): 'modify',
+    ('modify', 'modify'): 'modify', ('modify', 'attrib'): 'modify', ('modify', 'delete'): 'delete',
+    ('attrib', 'attrib'): 'attrib', ('attrib', 'modify'): 'modify', ('attrib', 'delete'): 'delete',
+}
+
+
+class Watch:
+    __slots__ = ('watch_id', 'path', 'recursive', 'queue', 'latest')
+
+    def __init__(self, watch_id, path, recursive):
+        self.watch_id = watch_id
+        self.path = path
+        self.recursive = recursive
+        self.queue = [] # events, or None where a pair cancelled out
+        self.latest = {} # path -> index in queue of its newest event since the last rename
+
+    def covers(self, path):
+        """Whether an event at path concerns this watch: the path itself, a child, or with recursive anything below."""
+        if path == self.path:
+            return True
+        if self.recursive:
+            return self.path == '/' or path.startswith(self.path + '/')
+        return (path[:path.rfind('/')] or '/') == self.path
+
+
+class EventBus:
+    """
+    Change notifications for watched paths, inotify-style. Every change is
+    reported as one event ({"watch", "kind", "path", "generation"}, plus
+    "old_path" for a rename) to each watch covering it, where generation is
+    a counter that grows with every event the bus sees. Events queue per
+    watch until drained and are coalesced on the way in, so a file written a
+    hundred times between two polls shows up once, and one created and
+    removed again doesn't show up at all. Renames are never merged and act
+    as a barrier to merging. A queue that grows past MAX_QUEUED_EVENTS, or a
+    tree replaced wholesale, leaves a single 'overflow' event: the watcher
+    should re-read whatever it shows.
+    """
+
+    def __init__(self):
+        self._watches = {}
+        self._next_id = 1
+        self.generation = 0
+
+    @property
+    def watching(self):
+        return bool(self._watches)
+
+    def add_watch(self, path, recursive=False):
+        if len(self._watches) >= MAX_WATCHES:
+            raise OSError(errno.ENOSPC, "Too many watches")
+        watch = Watch(self._next_id, path, bool(recursive))
+        self._watches[watch.watch_id] = watch
+        self._next_id += 1
+        return watch.watch_id
+
+    def remove_watch(self, watch_id):
+        return self._watches.pop(watch_id, None) is not None
+
+    def emit(self, kind, path, old_path=None):
+        self.generation += 1
+        for watch in self._watches.values():
+            if watch.covers(path) or (old_path is not None and watch.covers(old_path)):
+                self._queue(watch, kind, path, old_path)
+
+    def overflow(self):
+        """Tells every watch that changes were lost (or that the whole tree changed under it)."""
+        self.generation += 1
+        for watch in self._watches.values():
+            self._collapse(watch)
+
+    def _collapse(self, watch):
+        watch.queue = [{"watch": watch.watch_id, "kind": "overflow", "path": watch.path, "generation": self.generation}]
+        watch.latest = {}
+
+    def _queue(self, watch, kind, path, old_path):
+        if watch.queue and watch.queue[-1] is not None and watch.queue[-1]["kind"] == "overflow":
+            watch.queue[-1]["generation"] = self.generation
+            return
+        if kind == 'rename':
+            watch.queue.append({"watch": watch.watch_id, "kind": kind, "path": path,
+                                "old_path": old_path, "generation": self.generation})
+            watch.latest = {}
+        else:
+            index = watch.latest.get(path)
+            if index is not None:
+                queued = watch.queue[index]
+                pair = (queued["kind"], kind)
+                if pair in _MERGES:
+                    merged = _MERGES[pair]
+                    if merged is None:
+                        watch.queue[index] = None
+                        del watch.latest[path]
+                    else:
+                        queued["kind"] = merged
+                        queued["generation"] = self.generation
+                    return
+            watch.latest[path] = len(watch.queue)
+            watch.queue.append({"watch": watch.watch_id, "kind": kind, "path": path, "generation": self.generation})
+        if len(watch.queue) > MAX_QUEUED_EVENTS:
+            self._collapse(watch)
+
+    def drain(self, watch_id=None):
+        """
+        The queued events of one watch, or of every watch one after another,
+        each in the order its first change happened; the queues are emptied.
+        """
+        watches = [self._watches[watch_id]] if watch_id is not None else list(self._watches.values())
+        events = []
+        for watch in watches:
+            events.extend(event for event in watch.queue if event is not None)
+            watch.queue = []
+            watch.latest = {}
+        return events
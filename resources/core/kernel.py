@@ -2,6 +2,7 @@
 
 from executor import command_executor
 from filesystem import fs_manager
+from compact_nodes import json_default
 from session import env_manager, history_manager, alias_manager, session_manager
 from groups import group_manager
 from users import user_manager
@@ -34,8 +35,9 @@ MODULE_DISPATCHER = {
     "adventure": adventure_manager, "top": top_app, "log": log_app, "basic": basic_app, "audit": audit_manager
 }
 
-def initialize_kernel(save_function):
+def initialize_kernel(save_function, journal_function=None):
     fs_manager.set_save_function(save_function)
+    fs_manager.set_journal_function(journal_function)
 
 async def syscall_handler(request_json):
     """
@@ -69,7 +71,7 @@ async def syscall_handler(request_json):
                 json.loads(result)
                 return result
             except json.JSONDecodeError: pass
-        return json.dumps({"success": True, "data": result})
+        return json.dumps({"success": True, "data": result}, default=json_default)
 
     except Exception as e:
         return json.dumps({
@@ -80,12 +82,14 @@ async def syscall_handler(request_json):
 
 async def execute_command(command_string: str, js_context_json: str, stdin_data: str = None) -> str:
     try:
-        return await command_executor.execute(command_string, js_context_json, stdin_data)
+        result = await command_executor.execute_result(command_string, js_context_json, stdin_data)
     except Exception as e:
         return json.dumps({
             "success": False, "error": f"Kernel Error before execution: {repr(e)}",
             "traceback": traceback.format_exc()
         })
+    # The one place a command line's result becomes JSON.
+    return command_executor.result_json(result)
 
 def load_session_state(state_json):
     req = {"module": "session", "function": "load_session_state", "args": [state_json]}
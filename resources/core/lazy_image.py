@@ -0,0 +1,149 @@
+# gem/core/lazy_image.py
+
+import json
+from json.decoder import scanstring
+
+LAZY_STRING_THRESHOLD = 1024 # characters of JSON text; shorter strings are decoded straight away
+# Hopping between quotes costs about as much per quote as decoding a few hundred
+# characters does, so an image with fewer characters per quote than this (lots of
+# small files) is cheaper to parse eagerly.
+LAZY_MIN_CHARS_PER_QUOTE = 512
+
+
+class LazyContent:
+    """
+    A file's content still sitting, undecoded, in the JSON text of the image it
+    was loaded from. It remembers only where the string starts and ends;
+    value() decodes it. The filesystem swaps it for the real string the first
+    time the node is fetched, but in the meantime it behaves enough like a str
+    (len, ==, in, slicing, str methods) that code reaching it some other way
+    still works. Holding one keeps the whole image text alive.
+    """
+    __slots__ = ('_source', '_start', '_end', '_length')
+
+    def __init__(self, source, start, end):
+        self._source = source
+        self._start = start # first character after the opening quote
+        self._end = end # the closing quote
+        self._length = None
+
+    def value(self):
+        return scanstring(self._source, self._start, False)[0]
+
+    def __str__(self):
+        return self.value()
+
+    def __len__(self):
+        if self._length is None:
+            if self._source.find('\\', self._start, self._end) == -1:
+                self._length = self._end - self._start # No escapes: the raw span is the string.
+            else:
+                self._length = len(self.value())
+        return self._length
+
+    def __bool__(self):
+        return self._end > self._start
+
+    def __eq__(self, other):
+        if isinstance(other, LazyContent):
+            return self.value() == other.value()
+        if isinstance(other, str):
+            return self.value() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value())
+
+    def __contains__(self, item):
+        return item in self.value()
+
+    def __iter__(self):
+        return iter(self.value())
+
+    def __getitem__(self, index):
+        return self.value()[index]
+
+    def __add__(self, other):
+        return self.value() + other
+
+    def __radd__(self, other):
+        return other + self.value()
+
+    def __getattr__(self, name):
+        return getattr(self.value(), name)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"LazyContent({self._end - self._start} chars)"
+
+
+def _long_strings(text):
+    """
+    Yields the (opening quote, closing quote) positions of every string in a
+    JSON text longer than LAZY_STRING_THRESHOLD. Outside strings JSON has no
+    quotes at all, so hopping from quote to quote with str.find, stepping over
+    escaped ones, visits exactly the string boundaries.
+    """
+    find = text.find
+    start = find('"')
+    while start != -1:
+        end = find('"', start + 1)
+        while end != -1 and text[end - 1] == '\\':
+            backslashes = 1
+            while text[end - 1 - backslashes] == '\\':
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+            end = find('"', end + 1)
+        if end == -1:
+            return # Unterminated; the parser reports it.
+        if end - start > LAZY_STRING_THRESHOLD:
+            yield start, end
+        start = find('"', end + 1)
+
+
+_PLACEHOLDER = "NaN" # Saved images never hold a real NaN; json hands each one to parse_constant.
+
+
+def loads(json_string, object_hook=None):
+    """
+    json.loads for a saved filesystem image, leaving long string values (file
+    contents and blobs) as LazyContent. Those strings are cut out of the text
+    and replaced by placeholders before the C parser runs over what is left,
+    so neither their decoding nor a Python-level scan of the skeleton is paid.
+    Node fields other than content are always decoded, so paths, owners and
+    link targets are plain strings. Images made mostly of small files, and
+    anything unexpected in the text, get a plain json.loads instead.
+    """
+    if json_string.count('"') * LAZY_MIN_CHARS_PER_QUOTE > len(json_string):
+        return json.loads(json_string, object_hook=object_hook)
+    pieces, lazies, last = [], [], 0
+    for start, end in _long_strings(json_string):
+        pieces.append(json_string[last:start])
+        pieces.append(_PLACEHOLDER)
+        lazies.append(LazyContent(json_string, start + 1, end))
+        last = end + 1
+    if not lazies:
+        return json.loads(json_string, object_hook=object_hook)
+    pieces.append(json_string[last:])
+    pending = iter(lazies)
+
+    def hook(obj):
+        if isinstance(obj.get('type'), str):
+            for key, value in obj.items():
+                if key != 'content' and isinstance(value, LazyContent):
+                    obj[key] = value.value()
+        return object_hook(obj) if object_hook else obj
+
+    try:
+        data = json.loads("".join(pieces), object_hook=hook, parse_constant=lambda name: next(pending))
+        if next(pending, None) is None:
+            return data
+    except (json.JSONDecodeError, StopIteration, RuntimeError):
+        pass
+    return json.loads(json_string, object_hook=object_hook)
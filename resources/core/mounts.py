@@ -0,0 +1,306 @@
+# gem/core/mounts.py
+
+import errno
+import os
+import shutil
+import stat
+from datetime import datetime
+from lazy_image import LazyContent
+
+MOUNT_KEY = 'mount' # on the node at a mount point, holding the mount's path
+
+
+def host_mtime(seconds):
+    return datetime.utcfromtimestamp(seconds).isoformat() + "Z"
+
+
+def join_rel(rel, name):
+    return f"{rel}/{name}" if rel else name
+
+
+def host_location(node):
+    """(Mount, path relative to it) for a node listed from a mounted directory, or None for a VFS node or a mount point."""
+    content = node.get('content')
+    if isinstance(content, HostContent):
+        return content.mount, content.rel
+    children = node.get('children')
+    if isinstance(children, HostChildren) and MOUNT_KEY not in node:
+        return children.mount, children.rel
+    return None
+
+
+class MountBackend:
+    """
+    What a mount needs from the storage behind it. Paths are relative to the
+    mounted directory ('' is the directory itself, '/' separates components).
+    stat() and listdir() describe entries as (name, is_directory, size in
+    bytes, mtime in seconds since the epoch). write() takes text or, for a
+    binary file, bytes. Failures are OSErrors. A backend that can't write sets
+    read_only and need not implement the writing half.
+    """
+    read_only = False
+
+    def describe(self):
+        return type(self).__name__
+
+    def stat(self, rel):
+        raise NotImplementedError
+
+    def listdir(self, rel):
+        raise NotImplementedError
+
+    def read(self, rel):
+        raise NotImplementedError
+
+    def write(self, rel, content):
+        raise NotImplementedError
+
+    def mkdir(self, rel):
+        raise NotImplementedError
+
+    def remove(self, rel):
+        """Removes a file, or a directory and everything in it."""
+        raise NotImplementedError
+
+    def rename(self, old_rel, new_rel):
+        raise NotImplementedError
+
+    def set_mtime(self, rel, seconds):
+        raise NotImplementedError
+
+
+class LocalDirectoryBackend(MountBackend):
+    """
+    A directory the Python runtime itself can reach with plain file I/O: a
+    host directory when the kernel runs natively, or a directory mounted into
+    Pyodide's file system. Contents are read and written as UTF-8, with bytes
+    that aren't UTF-8 carried through as surrogate escapes.
+    """
+
+    def __init__(self, root, read_only=False):
+        self.root = os.path.realpath(root)
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(errno.ENOENT, "No such directory", root)
+        self.read_only = bool(read_only)
+
+    def describe(self):
+        return self.root
+
+    def _host(self, rel, follow=True):
+        path = os.path.normpath(os.path.join(self.root, rel)) if rel else self.root
+        # Checked on the resolved path, so host symlinks can't lead out either. An
+        # entry removed or renamed in its own right is resolved only up to its parent.
+        if follow or path == self.root:
+            path = os.path.realpath(path)
+        else:
+            path = os.path.join(os.path.realpath(os.path.dirname(path)), os.path.basename(path))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise PermissionError(errno.EACCES, "Path leads out of the mounted directory", rel)
+        return path
+
+    def stat(self, rel):
+        st = os.stat(self._host(rel))
+        return rel.rsplit('/', 1)[-1], stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime
+
+    def listdir(self, rel):
+        entries = []
+        with os.scandir(self._host(rel)) as scan:
+            for entry in scan:
+                try:
+                    if entry.is_symlink():
+                        self._host(f"{rel}/{entry.name}" if rel else entry.name) # Not one leading out.
+                    st = entry.stat()
+                except OSError:
+                    continue # A dangling host symlink, say.
+                entries.append((entry.name, stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime))
+        return entries
+
+    def read(self, rel):
+        with open(self._host(rel), encoding='utf-8', errors='surrogateescape', newline='') as f:
+            return f.read()
+
+    def write(self, rel, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            with open(self._host(rel), 'wb') as f:
+                f.write(content)
+            return
+        with open(self._host(rel), 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            f.write(str(content))
+
+    def mkdir(self, rel):
+        os.mkdir(self._host(rel))
+
+    def remove(self, rel):
+        path = self._host(rel, follow=False)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    def rename(self, old_rel, new_rel):
+        os.rename(self._host(old_rel, follow=False), self._host(new_rel, follow=False))
+
+    def set_mtime(self, rel, seconds):
+        os.utime(self._host(rel), (seconds, seconds))
+
+
+class HostContent(LazyContent):
+    """
+    A mounted file's content, read from the backend each time it is used and
+    never kept, so big files cost nothing until something reads them. The
+    filesystem leaves it in the node instead of decoding it in place as it
+    does LazyContent. Its length is the file's size on the host in bytes,
+    which is its length in characters for ASCII text.
+    """
+    __slots__ = ('mount', 'rel')
+
+    def __init__(self, mount, rel, size):
+        self.mount = mount
+        self.rel = rel
+        self._length = size
+
+    def value(self):
+        return self.mount.backend.read(self.rel)
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __repr__(self):
+        return f"HostContent({self.rel!r}, {self._length} bytes)"
+
+
+class HostChildren(dict):
+    """
+    The children of a mounted directory, listed from the backend the first
+    time anything looks at them, as ordinary nodes (files holding
+    HostContent). Copies share the one listing. What is on the host is never
+    rolled back, so a batch's undo log leaves these alone and a rolled-back
+    batch keeps its host writes.
+    """
+    __slots__ = ('mount', 'rel', '_loaded')
+
+    def __init__(self, mount, rel):
+        super().__init__()
+        self.mount = mount
+        self.rel = rel
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            entries = self.mount.backend.listdir(self.rel)
+        except OSError:
+            entries = [] # Unreadable on the host: shown empty rather than failing every lookup.
+        for name, is_directory, size, mtime in entries:
+            dict.__setitem__(self, name, self.mount.node(join_rel(self.rel, name), is_directory, size, mtime))
+
+    def __getitem__(self, name):
+        self._load()
+        return dict.__getitem__(self, name)
+
+    def get(self, name, default=None):
+        self._load()
+        return dict.get(self, name, default)
+
+    def __contains__(self, name):
+        self._load()
+        return dict.__contains__(self, name)
+
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def __setitem__(self, name, node):
+        self._load()
+        dict.__setitem__(self, name, node)
+
+    def __delitem__(self, name):
+        self._load()
+        dict.__delitem__(self, name)
+
+    def pop(self, name, *default):
+        self._load()
+        return dict.pop(self, name, *default)
+
+    def setdefault(self, name, node=None):
+        self._load()
+        return dict.setdefault(self, name, node)
+
+    def copy(self):
+        return self
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"HostChildren({self.rel!r})"
+
+
+class Mount:
+    """A backend attached at a VFS path, and the owner, group and modes its nodes show."""
+
+    def __init__(self, path, backend, owner='root', group='root', read_only=False):
+        self.path = path
+        self.backend = backend
+        self.owner = owner
+        self.group = group
+        self.read_only = bool(read_only or backend.read_only)
+
+    def rel(self, abs_path):
+        """abs_path (the mount point or anything under it) relative to the mount."""
+        return abs_path[len(self.path) + 1:]
+
+    def node(self, rel, is_directory, size, mtime):
+        if is_directory:
+            return {
+                "type": "directory", "children": HostChildren(self, rel), "owner": self.owner, "group": self.group,
+                "mode": 0o555 if self.read_only else 0o755, "mtime": host_mtime(mtime), "total_size": 0, "file_count": 0
+            }
+        return {
+            "type": "file", "content": HostContent(self, rel, size), "owner": self.owner, "group": self.group,
+            "mode": 0o444 if self.read_only else 0o644, "mtime": host_mtime(mtime)
+        }
+
+    def stat_node(self, rel):
+        """A fresh node for rel, as it is on the host now."""
+        _, is_directory, size, mtime = self.backend.stat(rel)
+        return self.node(rel, is_directory, size, mtime)
+
+    def root_node(self):
+        node = self.stat_node('')
+        if node['type'] != 'directory':
+            raise NotADirectoryError(errno.ENOTDIR, "Not a directory", self.backend.describe())
+        node[MOUNT_KEY] = self.path
+        return node
+
+    def check_writable(self):
+        if self.read_only:
+            raise OSError(errno.EROFS, f"Cannot modify '{self.path}': Read-only file system")
+
+    def describe(self):
+        return {"path": self.path, "source": self.backend.describe(), "owner": self.owner,
+                "group": self.group, "read_only": self.read_only}
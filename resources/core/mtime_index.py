@@ -0,0 +1,107 @@
+# gem/core/mtime_index.py
+
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from compact_nodes import iso_to_micros, micros_to_iso
+from name_index import iter_tree, join_path
+
+_entry_key = itemgetter(0)
+
+
+def mtime_key(mtime):
+    """
+    A node's ISO mtime as integer microseconds since the epoch, or 0 if it's
+    missing or won't parse. The strings themselves don't sort by time:
+    isoformat() drops a zero fraction, and '.' sorts before 'Z'.
+    """
+    value = iso_to_micros(mtime)
+    return value if isinstance(value, int) else 0
+
+
+class MtimeIndex:
+    """
+    Every node in the tree, by canonical path, kept sorted by modification
+    time, so "what changed after T" costs a binary search plus the answer.
+    Entries are (mtime_key, path) in one sorted list; new modifications land at
+    or near its end, which is where insort is cheapest. Removed nodes just
+    leave the index; their parent directory's mtime records the removal. The
+    paths of symlinks are kept so callers can tell when a traversal following
+    links would see a node whose mtime isn't the link's own.
+    """
+
+    def __init__(self):
+        self._entries = [] # sorted (mtime key, path)
+        self._keys = {} # path -> mtime key it is filed under
+        self._links = set() # paths of symlinks
+
+    def build(self, root_node):
+        """Fills an empty index from the whole tree in one sort."""
+        keys = {'/': mtime_key(root_node.get('mtime'))}
+        for name, child in root_node.get('children', {}).items():
+            for parent, entry_name, node in iter_tree('/', name, child):
+                path = join_path(parent, entry_name)
+                keys[path] = mtime_key(node.get('mtime'))
+                if node.get('type') == 'symlink':
+                    self._links.add(path)
+        self._keys = keys
+        self._entries = sorted((key, path) for path, key in keys.items())
+
+    def update(self, path, node):
+        """Files path under node's current mtime, adding it if it is new."""
+        key = mtime_key(node.get('mtime'))
+        old_key = self._keys.get(path)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._remove_entry(old_key, path)
+        self._keys[path] = key
+        insort(self._entries, (key, path))
+        if node.get('type') == 'symlink':
+            self._links.add(path)
+        else:
+            self._links.discard(path)
+
+    def discard(self, path):
+        key = self._keys.pop(path, None)
+        if key is not None:
+            self._remove_entry(key, path)
+        self._links.discard(path)
+
+    def _remove_entry(self, key, path):
+        entries = self._entries
+        i = bisect_left(entries, (key, path))
+        if i < len(entries) and entries[i] == (key, path):
+            del entries[i]
+
+    def add_tree(self, parent, name, node):
+        for directory, entry_name, entry in iter_tree(parent, name, node):
+            self.update(join_path(directory, entry_name), entry)
+
+    def discard_tree(self, parent, name, node):
+        for directory, entry_name, _ in iter_tree(parent, name, node):
+            self.discard(join_path(directory, entry_name))
+
+    def move_tree(self, old_parent, old_name, new_parent, new_name, node):
+        self.discard_tree(old_parent, old_name, node)
+        self.add_tree(new_parent, new_name, node)
+
+    def since(self, key, under='/'):
+        """(mtime key, path) for every node at or under the path `under` modified after key, oldest first."""
+        entries = self._entries
+        found = entries[bisect_right(entries, key, key=_entry_key):]
+        if under == '/':
+            return found
+        prefix = under + '/'
+        return [entry for entry in found if entry[1] == under or entry[1].startswith(prefix)]
+
+    def links_under(self, path):
+        prefix = path.rstrip('/') + '/'
+        return [link for link in self._links if link.startswith(prefix)]
+
+    def stats(self):
+        return {
+            "nodes": len(self._entries),
+            "links": len(self._links),
+            "oldest": micros_to_iso(self._entries[0][0]) if self._entries else None,
+            "newest": micros_to_iso(self._entries[-1][0]) if self._entries else None
+        }
@@ -0,0 +1,183 @@
+# gem/core/name_index.py
+
+import fnmatch
+import re
+from mounts import MOUNT_KEY
+
+GLOB_CHARS = '*?['
+TRIGRAM_LENGTH = 3
+
+
+def _extension(name):
+    """Everything from the last dot on, so every name matching '*.md' has the extension '.md'."""
+    dot = name.rfind('.')
+    return name[dot:] if dot != -1 else ''
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+
+def _literal_runs(pattern):
+    """The stretches of a shell pattern that must appear verbatim in any name it matches."""
+    runs, current, i, n = [], [], 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char in '*?':
+            runs.append(''.join(current))
+            current = []
+        elif char == '[':
+            # Same rules as fnmatch.translate: a leading '!' or ']' belongs to the set.
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j == -1:
+                current.append(char) # No closing bracket; fnmatch takes '[' literally.
+            else:
+                runs.append(''.join(current))
+                current = []
+                i = j + 1
+        else:
+            current.append(char)
+    runs.append(''.join(current))
+    return [run for run in runs if run]
+
+
+def join_path(parent, name):
+    return parent + name if parent == '/' else parent + '/' + name
+
+
+def iter_tree(parent, name, node):
+    """Yields (directory, name, node) for node, filed as name in directory, and everything under it."""
+    stack = [(parent, name, node)]
+    while stack:
+        parent, name, node = stack.pop()
+        yield parent, name, node
+        if node.get('type') == 'directory' and MOUNT_KEY not in node: # Mounted files are the host's to index.
+            path = join_path(parent, name)
+            stack.extend((path, child_name, child) for child_name, child in node.get('children', {}).items())
+
+
+class NameIndex:
+    """
+    Maps every basename in the tree to the directories holding an entry of that
+    name, so a name pattern can be answered without visiting nodes. Patterns of
+    the form '*.ext' go through an extension index; other patterns with a
+    literal run of three or more characters go through a trigram index, which is
+    only built the first time such a pattern is asked for. Directory paths are
+    canonical (no symlinks); the paths of symlinks are kept so callers can tell
+    when a link would lead a traversal somewhere the index doesn't cover.
+    """
+
+    def __init__(self):
+        self._parents = {} # basename -> set of directory paths holding it
+        self._extensions = {} # extension -> set of basenames
+        self._trigrams = None # trigram -> set of basenames, built on demand
+        self._links = set() # paths of symlinks
+
+    def add(self, parent, name, node):
+        parents = self._parents.get(name)
+        if parents is None:
+            parents = self._parents[name] = set()
+            self._extensions.setdefault(_extension(name), set()).add(name)
+            if self._trigrams is not None:
+                for trigram in _trigrams(name):
+                    self._trigrams.setdefault(trigram, set()).add(name)
+        parents.add(parent)
+        if node.get('type') == 'symlink':
+            self._links.add(join_path(parent, name))
+
+    def discard(self, parent, name, node):
+        parents = self._parents.get(name)
+        if parents is None:
+            return
+        parents.discard(parent)
+        if not parents:
+            del self._parents[name]
+            self._forget(self._extensions, _extension(name), name)
+            if self._trigrams is not None:
+                for trigram in _trigrams(name):
+                    self._forget(self._trigrams, trigram, name)
+        if node.get('type') == 'symlink':
+            self._links.discard(join_path(parent, name))
+
+    @staticmethod
+    def _forget(postings, key, name):
+        names = postings.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del postings[key]
+
+    def add_tree(self, parent, name, node):
+        """Indexes node and everything under it."""
+        for entry in iter_tree(parent, name, node):
+            self.add(*entry)
+
+    def discard_tree(self, parent, name, node):
+        for entry in iter_tree(parent, name, node):
+            self.discard(*entry)
+
+    def candidates(self, pattern):
+        """
+        A set of names that includes every name matching pattern, taken from the
+        extension or trigram index, or None when neither narrows it down.
+        """
+        if not any(char in pattern for char in GLOB_CHARS):
+            return {pattern} if pattern in self._parents else set()
+        suffix = pattern[1:]
+        if pattern[0] == '*' and suffix[:1] == '.' and '.' not in suffix[1:] and not any(char in suffix for char in GLOB_CHARS):
+            return self._extensions.get(suffix, set())
+        runs = [run for run in _literal_runs(pattern) if len(run) >= TRIGRAM_LENGTH]
+        if not runs:
+            return None
+        if self._trigrams is None:
+            self._trigrams = {}
+            for name in self._parents:
+                for trigram in _trigrams(name):
+                    self._trigrams.setdefault(trigram, set()).add(name)
+        postings = sorted((self._trigrams.get(trigram, set()) for run in runs for trigram in _trigrams(run)), key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def matching_names(self, pattern):
+        candidates = self.candidates(pattern)
+        match = re.compile(fnmatch.translate(pattern)).match
+        return [name for name in (self._parents if candidates is None else candidates) if match(name)]
+
+    def entries(self, pattern, under='/'):
+        """(directory, name) of every entry below the directory under whose name matches pattern."""
+        prefix = under if under == '/' else under + '/'
+        found = []
+        for name in self.matching_names(pattern):
+            for parent in self._parents[name]:
+                if parent == under or parent.startswith(prefix):
+                    found.append((parent, name))
+        return found
+
+    def names_in(self, parent, pattern, limit=None):
+        """
+        Names in one directory matching pattern, or None if the index can't
+        narrow the search to fewer than limit names.
+        """
+        candidates = self.candidates(pattern)
+        if candidates is None or (limit is not None and len(candidates) >= limit):
+            return None
+        match = re.compile(fnmatch.translate(pattern)).match
+        return [name for name in candidates if parent in self._parents[name] and match(name)]
+
+    def links_under(self, path):
+        prefix = path if path == '/' else path + '/'
+        return [link for link in self._links if link.startswith(prefix)]
+
+    def stats(self):
+        return {
+            "names": len(self._parents),
+            "entries": sum(len(parents) for parents in self._parents.values()),
+            "extensions": len(self._extensions),
+            "trigrams": len(self._trigrams) if self._trigrams is not None else None,
+            "links": len(self._links)
+        }
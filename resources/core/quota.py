@@ -0,0 +1,121 @@
+# gem/core/quota.py
+
+import json
+import re
+from mounts import MOUNT_KEY
+
+LIMIT_KEYS = ('bytes_soft', 'bytes_hard', 'inodes_soft', 'inodes_hard')
+NO_LIMITS = (0, 0, 0, 0)
+_SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)([KMGT]?)B?$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text):
+    """'4096', '512K', '1.5M' or '2G' as a number of bytes; raises ValueError for anything else."""
+    match = _SIZE_RE.match(str(text).strip())
+    if not match:
+        raise ValueError(f"invalid size '{text}'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def _limits_from(entry):
+    if not isinstance(entry, dict):
+        return NO_LIMITS
+    try:
+        return tuple(max(0, int(entry.get(key) or 0)) for key in LIMIT_KEYS)
+    except (TypeError, ValueError):
+        return NO_LIMITS
+
+
+def compile_limits(content):
+    """
+    The limits in a quota file as ({owner: (bytes_soft, bytes_hard,
+    inodes_soft, inodes_hard)}, limits for the whole file system), with 0
+    meaning no limit. A file that doesn't parse sets no limits.
+    """
+    try:
+        table = json.loads(content) if content else {}
+    except (json.JSONDecodeError, TypeError):
+        return {}, NO_LIMITS
+    if not isinstance(table, dict):
+        return {}, NO_LIMITS
+    users = table.get('users') if isinstance(table.get('users'), dict) else {}
+    limits = {owner: _limits_from(entry) for owner, entry in users.items()}
+    return {owner: entry for owner, entry in limits.items() if any(entry)}, _limits_from(table.get('vfs'))
+
+
+def _content_bytes(node):
+    return len(node.get('content', '')) if node.get('type') == 'file' else 0
+
+
+class QuotaLedger:
+    """
+    How many bytes of file content and how many nodes (inodes: files,
+    directories and links alike) each owner holds, plus the totals, kept
+    current by charging every change as it happens so a quota check never
+    has to measure anything.
+    """
+
+    def __init__(self):
+        self._usage = {} # owner -> [bytes, inodes]
+        self.total_inodes = 0
+        self._changes = None # (owner, bytes, inodes) charged since begin_changes, for a batch that may be rolled back
+
+    def charge(self, owner, byte_delta, inode_delta):
+        usage = self._usage.get(owner)
+        if usage is None:
+            usage = self._usage[owner] = [0, 0]
+        usage[0] += byte_delta
+        usage[1] += inode_delta
+        self.total_inodes += inode_delta
+        if not usage[1] and not usage[0]:
+            del self._usage[owner]
+        if self._changes is not None:
+            self._changes.append((owner, byte_delta, inode_delta))
+
+    def begin_changes(self):
+        self._changes = []
+
+    def end_changes(self):
+        self._changes = None
+
+    def revert_changes(self):
+        """Takes back every charge since begin_changes, newest first."""
+        changes, self._changes = self._changes or [], None
+        for owner, byte_delta, inode_delta in reversed(changes):
+            self.charge(owner, -byte_delta, -inode_delta)
+
+    def add_node(self, node, sign=1):
+        """Charges (or with sign -1, credits) one node, not what is under it."""
+        self.charge(node.get('owner'), sign * _content_bytes(node), sign)
+
+    def add_tree(self, node, sign=1):
+        for owner, (byte_count, inode_count) in tally(node).items():
+            self.charge(owner, sign * byte_count, sign * inode_count)
+
+    def discard_tree(self, node):
+        self.add_tree(node, -1)
+
+    def usage(self, owner):
+        """(bytes, inodes) held by owner."""
+        usage = self._usage.get(owner)
+        return (usage[0], usage[1]) if usage else (0, 0)
+
+    def owners(self):
+        return sorted(self._usage, key=str)
+
+
+def tally(node):
+    """{owner: [bytes, inodes]} for node and everything under it."""
+    totals = {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        entry = totals.get(node.get('owner'))
+        if entry is None:
+            entry = totals[node.get('owner')] = [0, 0]
+        entry[0] += _content_bytes(node)
+        entry[1] += 1
+        if node.get('type') == 'directory' and MOUNT_KEY not in node: # Mounted files take no VFS space.
+            stack.extend(node.get('children', {}).values())
+    return totals
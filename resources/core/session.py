@@ -78,9 +78,11 @@ class AliasManager:
     """Manages command aliases."""
     def __init__(self):
         self.aliases = {}
+        self.generation = 0 # bumped on every change, so parses cached under older aliases are stale
 
     def initialize_defaults(self):
         """Initializes default command aliases."""
+        self.generation += 1
         self.aliases = {
             'll': 'ls -la',
             'la': 'ls -a',
@@ -95,11 +97,13 @@ class AliasManager:
 
     def set_alias(self, name, value):
         self.aliases[name] = value
+        self.generation += 1
         return True
 
     def remove_alias(self, name):
         if name in self.aliases:
             del self.aliases[name]
+            self.generation += 1
             return True
         return False
 
@@ -112,6 +116,7 @@ class AliasManager:
     def load_aliases(self, alias_dict):
         native_dict = alias_dict.to_py() if hasattr(alias_dict, 'to_py') else alias_dict
         self.aliases = native_dict.copy()
+        self.generation += 1
 
 class SessionManager:
     """Manages the user session stack and orchestrates saving/loading session state."""
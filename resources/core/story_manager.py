@@ -38,25 +38,13 @@ class StoryManager:
             return {"success": False, "error": f"Failed to initialize story: {repr(e)}"}
 
     def _get_tracked_files(self, work_dir):
-        """Recursively finds all non-hidden files to be tracked."""
+        """Finds all non-hidden files to be tracked."""
         tracked = []
-
-        def recurse(current_path):
-            node = fs_manager.get_node(current_path)
-            if not node:
-                return
-
-            if node.get('type') == 'directory':
-                # Skip the .story directory itself
-                if os.path.basename(current_path) == '.story':
-                    return
-                for child_name, child_node in node.get('children', {}).items():
-                    if not child_name.startswith('.'):
-                        recurse(os.path.join(current_path, child_name))
-            elif node.get('type') == 'file':
-                tracked.append(current_path)
-
-        recurse(work_dir)
+        # Skip the .story directory itself and anything hidden below the work dir
+        skip = lambda path, name, node, depth: name == '.story' or (depth > 0 and name.startswith('.'))
+        for path, name, node, depth in fs_manager.walk(work_dir, follow_symlinks=True, prune=skip):
+            if node.get('type') == 'file' and not (depth > 0 and name.startswith('.')):
+                tracked.append(path)
         return tracked
 
     def create_snapshot(self, work_dir, user_context):
@@ -74,19 +62,20 @@ class StoryManager:
         snapshot_dir = os.path.join(story_path, 'snapshots', snapshot_id)
 
         try:
-            fs_manager.create_directory(snapshot_dir, user_context)
-            for file_path in tracked_files:
-                relative_path = os.path.relpath(file_path, work_dir)
-                dest_path = os.path.join(snapshot_dir, relative_path)
+            with fs_manager.batch():
+                fs_manager.create_directory(snapshot_dir, user_context)
+                for file_path in tracked_files:
+                    relative_path = os.path.relpath(file_path, work_dir)
+                    dest_path = os.path.join(snapshot_dir, relative_path)
 
-                # Ensure parent directory exists in snapshot
-                dest_parent = os.path.dirname(dest_path)
-                if not fs_manager.get_node(dest_parent):
-                    fs_manager.create_directory(dest_parent, user_context, parents=True)
+                    # Ensure parent directory exists in snapshot
+                    dest_parent = os.path.dirname(dest_path)
+                    if not fs_manager.get_node(dest_parent):
+                        fs_manager.create_directory(dest_parent, user_context, parents=True)
 
-                source_node = fs_manager.get_node(file_path)
-                if source_node:
-                    fs_manager.write_file(dest_path, source_node.get('content', ''), user_context)
+                    source_node = fs_manager.get_node(file_path)
+                    if source_node:
+                        fs_manager.write_file(dest_path, source_node.get('content', ''), user_context)
 
             return {"success": True, "snapshot_id": snapshot_id}
         except Exception as e:
@@ -139,25 +128,27 @@ class StoryManager:
             return {"success": False, "error": f"Snapshot '{snapshot_id}' not found."}
 
         try:
-            # This is a destructive operation. First, we clear the tracked files.
-            tracked_files = self._get_tracked_files(work_dir)
-            for file_path in tracked_files:
-                fs_manager.remove(file_path)
-
-            # Now, copy files from snapshot to work_dir
-            def recurse_copy(current_snapshot_path, current_work_path):
-                node = fs_manager.get_node(current_snapshot_path)
-                if not node: return
-
-                if node.get('type') == 'directory':
-                    if not fs_manager.get_node(current_work_path):
-                        fs_manager.create_directory(current_work_path, user_context)
-                    for child_name, child_node in node.get('children', {}).items():
-                        recurse_copy(os.path.join(current_snapshot_path, child_name), os.path.join(current_work_path, child_name))
-                elif node.get('type') == 'file':
-                    fs_manager.write_file(current_work_path, node.get('content', ''), user_context)
-
-            recurse_copy(snapshot_dir, work_dir)
+            # This is a destructive operation, so it runs as one batch that is
+            # rolled back if anything fails. First, we clear the tracked files.
+            with fs_manager.batch():
+                tracked_files = self._get_tracked_files(work_dir)
+                for file_path in tracked_files:
+                    fs_manager.remove(file_path)
+
+                # Now, copy files from snapshot to work_dir
+                def recurse_copy(current_snapshot_path, current_work_path):
+                    node = fs_manager.get_node(current_snapshot_path)
+                    if not node: return
+
+                    if node.get('type') == 'directory':
+                        if not fs_manager.get_node(current_work_path):
+                            fs_manager.create_directory(current_work_path, user_context)
+                        for child_name, child_node in node.get('children', {}).items():
+                            recurse_copy(os.path.join(current_snapshot_path, child_name), os.path.join(current_work_path, child_name))
+                    elif node.get('type') == 'file':
+                        fs_manager.write_file(current_work_path, node.get('content', ''), user_context)
+
+                recurse_copy(snapshot_dir, work_dir)
 
             return {"success": True}
         except Exception as e:
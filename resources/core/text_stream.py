@@ -0,0 +1,133 @@
+# gem/core/text_stream.py
+
+from collections.abc import Iterator
+from itertools import chain, islice
+
+BLOCK_SIZE = 64 * 1024
+JOIN_BATCH_LINES = 1024
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029' # everything str.splitlines splits on
+
+# What flows between the segments of a pipeline when the commands declare
+# run_stream: an iterator of blocks of text, each ending at a line break
+# (except maybe the stream's last), which spell out the same text a command's
+# run would have returned when joined. Blocks hold whole lines, so a command
+# can split each one with str.splitlines and see exactly the lines it would
+# have seen in the joined string, and stop pulling once it has what it needs,
+# which stops everything upstream of it too.
+
+
+class StreamError(Exception):
+    """
+    Raised from inside a stream when a command fails part way through, as
+    sed does on a bad regex once it meets a line to apply it to. Carries the
+    error result the command would have returned from run.
+    """
+
+    def __init__(self, result):
+        super().__init__(result.get("error"))
+        self.result = result
+
+
+def is_stream(value):
+    return isinstance(value, Iterator)
+
+
+def blocks_of(text, block_size=BLOCK_SIZE):
+    """A string as a stream of blocks of about block_size, cut after newlines. None stays None."""
+    if text is None:
+        return None
+    return _cut_blocks(str(text), block_size)
+
+
+def _cut_blocks(text, block_size):
+    if len(text) <= block_size:
+        if text:
+            yield text
+        return
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start + block_size - 1) + 1
+        if not end:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end
+
+
+def whole_lines(chunks):
+    """
+    Re-cuts chunks of text that may end mid-line (the output of a character
+    translation, or several files run together) so every block ends at a
+    line break again.
+    """
+    pending = ''
+    for chunk in chunks:
+        if pending:
+            chunk = pending + chunk
+            pending = ''
+        if not chunk:
+            continue
+        last = chunk[-1]
+        if last in LINE_BREAKS and last != '\r': # a '\r' may be half of a '\r\n'
+            yield chunk
+            continue
+        cut = chunk.rfind('\n') + 1
+        if cut:
+            yield chunk[:cut]
+        pending = chunk[cut:]
+    if pending:
+        yield pending
+
+
+def lines_in(stream):
+    """The lines of a stream without their line breaks, as str.splitlines gives them."""
+    for block in stream:
+        yield from block.splitlines()
+
+
+def join_lines(lines):
+    """
+    A stream spelling out "\\n".join(lines). Lines are batched into blocks
+    that double in size up to JOIN_BATCH_LINES, so the first few go out at
+    once and a long run costs a block per batch rather than per line.
+    """
+    lines = iter(lines)
+    batch_size = 1
+    pending = None # held back until it's known whether a line follows it
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            break
+        if pending is not None:
+            batch.insert(0, pending)
+        pending = batch.pop()
+        if batch:
+            yield "\n".join(batch) + "\n"
+        batch_size = min(batch_size * 2, JOIN_BATCH_LINES)
+    if pending:
+        yield pending
+
+
+def nonempty(stream):
+    """The stream if any text comes out of it, else None: what `if stdin_data:` tested."""
+    if stream is None:
+        return None
+    stream = iter(stream)
+    for block in stream:
+        if block:
+            return chain((block,), stream)
+    return None
+
+
+def text_of(result):
+    """
+    What run returns for a run_stream result: the joined text of a stream,
+    or the error result of a StreamError raised while joining it. Anything
+    else is passed through.
+    """
+    if not is_stream(result):
+        return result
+    try:
+        return ''.join(result)
+    except StreamError as e:
+        return e.result
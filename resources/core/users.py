@@ -185,10 +185,10 @@ class UserManager:
         """
         Performs the initial system setup in a transactional manner.
         """
-        # Backup state for rollback
+        # Backup state for rollback; the filesystem is covered by its own batch
         original_users = copy.deepcopy(self.users)
         original_groups = copy.deepcopy(group_manager.groups)
-        original_fs_data = copy.deepcopy(fs_manager.fs_data)
+        fs_manager.begin_batch()
 
         try:
             # 1. Initialize the default filesystem structure
@@ -229,8 +229,10 @@ class UserManager:
             if not self.change_password('root', root_password):
                 raise ValueError("Failed to set root password during setup.")
 
-            # 9. Persist changes to the filesystem
+            # 9. Persist changes to the filesystem (the UI reloads right after setup)
             fs_manager._save_state()
+            fs_manager.commit_batch()
+            fs_manager.flush()
 
             return {
                 "success": True,
@@ -243,7 +245,7 @@ class UserManager:
             # Rollback to original state on any failure
             self.users = original_users
             group_manager.groups = original_groups
-            fs_manager.fs_data = original_fs_data
+            fs_manager.rollback_batch()
 
             return {"success": False, "error": f"An error occurred during setup: {str(e)}"}
 
@@ -96,6 +96,7 @@ window.onload = async () => {
     if (typeof Neutralino !== 'undefined' && Neutralino.app) {
         Neutralino.events.on("windowClose", async () => {
             await storageHAL.saveLocalStorage(storageManager.exportLocalStorage());
+            await OopisOS_Kernel.syscall("filesystem", "flush");
             Neutralino.app.exit();
         });
     }
@@ -113,8 +114,10 @@ window.onload = async () => {
     try {
         const fsJsonFromStorage = await storageHAL.load();
         if (fsJsonFromStorage) {
-            await OopisOS_Kernel.syscall("filesystem", "load_state_from_json", [JSON.stringify(fsJsonFromStorage)]);
-            await fsManager.setFsData(fsJsonFromStorage);
+            // The kernel replays the journal on top of the base image. Going through
+            // setFsData here would reload the bare base and drop those changes.
+            const journal = await storageHAL.loadJournal();
+            await OopisOS_Kernel.syscall("filesystem", "load_state_from_json", [JSON.stringify(fsJsonFromStorage), journal]);
         } else {
             await outputManager.appendToOutput("No file system found. Initializing new one.", { typeClass: configManager.CSS_CLASSES.CONSOLE_LOG_MSG });
             await fsManager.initialize(configManager.USER.DEFAULT_NAME);
@@ -74,9 +74,6 @@ async function executePythonCommand(rawCommandText, options = {}) {
                     return { success: true, output: pyResult.output };
                 }
             }
-            const updatedFsData = await FileSystemManager.getFsData();
-            FileSystemManager.setFsData(updatedFsData);
-
         } else {
             // This is the new, improved error handling logic!
             const errorObject = ErrorHandler.createError(pyResult.error);
@@ -75,6 +75,23 @@ class ConfigManager {
                 PERMISSION_BIT_WRITE: 0b010,
                 PERMISSION_BIT_EXECUTE: 0b001,
                 MAX_VFS_SIZE: 640 * 1024 * 1024,
+                PERSISTENCE_MODE: "write_behind", // "immediate" or "write_behind"
+                FLUSH_INTERVAL_MS: 2000,
+                CONTENT_DEDUP: true, // store identical file contents once
+                JOURNAL_ENABLED: true, // append changes to a journal where the storage backend supports it
+                JOURNAL_COMPACT_RECORDS: 500,
+                JOURNAL_COMPACT_BYTES: 1024 * 1024,
+                SHARD_MOUNTS: ["/home/*", "/etc", "/var"], // saved separately; empty for one image
+                COMPACT_NODES: false, // slotted nodes with interned owners and integer mtimes; saves memory on big trees
+                LAZY_LOAD: true, // decode file contents on first access instead of at boot
+                NAME_INDEX: true, // index file names for find -name, locate and globbing
+                CONTENT_INDEX: true, // index words in file contents so grep -r can skip files
+                CONTENT_INDEX_MAX_BYTES: 16 * 1024 * 1024,
+                MTIME_INDEX: true, // keep nodes ordered by mtime for find -newer/-mmin and changed_since
+                EVENT_POLL_INTERVAL_MS: 250, // how often followers such as tail -f ask for change events
+                // Host directories shown inside the VFS, read lazily and written through, never saved with it:
+                // e.g. [{ path: "/mnt/data", host: "/data", owner: "Guest", readOnly: false }]
+                HOST_MOUNTS: [],
                 MAX_SCRIPT_STEPS: 10000,
                 MAX_SCRIPT_DEPTH: 100,
             },
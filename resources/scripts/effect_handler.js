@@ -247,6 +247,7 @@ async function handleEffect(result, options) {
         }
 
         case 'logout': {
+            await OopisOS_Kernel.syscall("filesystem", "flush");
             const poppedUser = await SessionManager.popUserFromStack();
             if (poppedUser) {
                 const newCurrentUser = await SessionManager.getCurrentUserFromStack();
@@ -319,6 +320,7 @@ async function handleEffect(result, options) {
             break;
 
         case 'reboot':
+            await OopisOS_Kernel.syscall("filesystem", "flush");
             await OutputManager.appendToOutput("Rebooting...");
             setTimeout(() => window.location.reload(), 1000);
             break;
@@ -355,6 +357,60 @@ async function handleEffect(result, options) {
             }
             break;
 
+        case 'follow_file': {
+            // tail -f: print the tail, then whatever is appended, polling the
+            // kernel's change events (one cheap syscall) rather than re-reading
+            // the file, until Ctrl+C/Escape or the job is killed.
+            if (result.content) await OutputManager.appendToOutput(result.content);
+            const stopController = new AbortController();
+            const stopOnInterrupt = (e) => {
+                if ((e.ctrlKey && e.key === 'c') || e.key === 'Escape') {
+                    e.preventDefault();
+                    e.stopImmediatePropagation();
+                    stopController.abort();
+                }
+            };
+            const isStopped = () => stopController.signal.aborted || (options.signal && options.signal.aborted);
+            const watchJson = await OopisOS_Kernel.syscall("filesystem", "add_watch", [result.path]);
+            const watch = JSON.parse(watchJson);
+            if (!watch.success) {
+                await OutputManager.appendToOutput(`tail: cannot follow '${result.path}'`, { typeClass: Config.CSS_CLASSES.ERROR_MSG });
+                break;
+            }
+            if (!options.signal) document.addEventListener('keydown', stopOnInterrupt, true);
+            let offset = result.offset;
+            let changed = true; // Catch up on anything written before the watch was set.
+            try {
+                while (!isStopped()) {
+                    if (!changed) {
+                        await Utils.safeDelay(Config.FILESYSTEM.EVENT_POLL_INTERVAL_MS);
+                        const eventsJson = await OopisOS_Kernel.syscall("filesystem", "poll_events", [watch.data]);
+                        const events = JSON.parse(eventsJson);
+                        if (!events.success) break;
+                        changed = events.data.events.length > 0;
+                        if (!changed) continue;
+                    }
+                    changed = false;
+                    const readJson = await OopisOS_Kernel.syscall("filesystem", "read_from", [result.path, offset]);
+                    const read = JSON.parse(readJson);
+                    if (!read.success || read.data === null) {
+                        await OutputManager.appendToOutput(`tail: '${result.path}' has been removed`, { typeClass: Config.CSS_CLASSES.WARNING_MSG });
+                        break;
+                    }
+                    if (read.data.truncated) {
+                        await OutputManager.appendToOutput(`tail: ${result.path}: file truncated`, { typeClass: Config.CSS_CLASSES.WARNING_MSG });
+                    }
+                    const appended = read.data.content.replace(/^\n/, '').replace(/\n$/, '');
+                    if (appended) await OutputManager.appendToOutput(appended);
+                    offset = read.data.offset;
+                }
+            } finally {
+                document.removeEventListener('keydown', stopOnInterrupt, true);
+                await OopisOS_Kernel.syscall("filesystem", "remove_watch", [watch.data]);
+            }
+            break;
+        }
+
         case 'trigger_upload_flow':
             return new Promise(async (resolve) => {
                 const input = Utils.createElement("input", { type: "file", multiple: true, style: { display: 'none' } });
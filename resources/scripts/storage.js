@@ -120,14 +120,36 @@ class IndexedDBManager {
         });
     }
 
+    _shardKey(name) {
+        return `${this.dependencies.Config.DATABASE.UNIFIED_FS_KEY}:shard:${name}`;
+    }
+
     async save(fsData) {
         const { Config } = this.dependencies;
         return new Promise((resolve) => {
             const transaction = this.dbInstance.transaction(Config.DATABASE.FS_STORE_NAME, "readwrite");
             const store = transaction.objectStore(Config.DATABASE.FS_STORE_NAME);
-            const request = store.put({ id: Config.DATABASE.UNIFIED_FS_KEY, data: fsData });
-            request.onsuccess = () => resolve(true);
-            request.onerror = () => resolve(false);
+            if (fsData && fsData.format === "sharded") {
+                // One transaction, so the manifest and its shards change together.
+                const { manifest, shards } = fsData;
+                for (const [name, image] of Object.entries(shards)) {
+                    store.put({ id: this._shardKey(name), data: image });
+                }
+                store.put({ id: Config.DATABASE.UNIFIED_FS_KEY, data: manifest });
+                const keysRequest = store.getAllKeys();
+                keysRequest.onsuccess = () => {
+                    const prefix = this._shardKey("");
+                    for (const key of keysRequest.result) {
+                        if (typeof key === "string" && key.startsWith(prefix) && !(key.slice(prefix.length) in manifest.shards)) {
+                            store.delete(key);
+                        }
+                    }
+                };
+            } else {
+                store.put({ id: Config.DATABASE.UNIFIED_FS_KEY, data: fsData });
+            }
+            transaction.oncomplete = () => resolve(true);
+            transaction.onerror = () => resolve(false);
         });
     }
 
@@ -137,7 +159,25 @@ class IndexedDBManager {
             const transaction = this.dbInstance.transaction(Config.DATABASE.FS_STORE_NAME, "readonly");
             const store = transaction.objectStore(Config.DATABASE.FS_STORE_NAME);
             const request = store.get(Config.DATABASE.UNIFIED_FS_KEY);
-            request.onsuccess = () => resolve(request.result ? request.result.data : null);
+            request.onsuccess = () => {
+                const data = request.result ? request.result.data : null;
+                if (!data || data.format !== "sharded") {
+                    resolve(data);
+                    return;
+                }
+                const shards = {};
+                const names = Object.keys(data.shards);
+                let remaining = names.length;
+                if (remaining === 0) resolve({ format: "sharded", manifest: data, shards });
+                for (const name of names) {
+                    const shardRequest = store.get(this._shardKey(name));
+                    shardRequest.onsuccess = () => {
+                        if (shardRequest.result) shards[name] = shardRequest.result.data;
+                        if (--remaining === 0) resolve({ format: "sharded", manifest: data, shards });
+                    };
+                    shardRequest.onerror = () => resolve(null);
+                }
+            };
             request.onerror = () => resolve(null);
         });
     }
@@ -162,7 +202,11 @@ class IndexedDBManager {
 class NeutralinoFSManager {
     constructor() {
         this.fsFilePath = null;
+        this.shardDir = null;
+        this.journalFilePath = null;
         this.localStorageFilePath = null;
+        // Saves and journal appends must land in the order the kernel issued them.
+        this.writeQueue = Promise.resolve();
     }
 
     setDependencies(dependencies) {
@@ -173,11 +217,15 @@ class NeutralinoFSManager {
         try {
             const dataDir = `${NL_PATH}/data`;
             this.fsFilePath = `${dataDir}/samwiseos_fs.json`;
+            this.journalFilePath = `${dataDir}/samwiseos_fs.journal`;
+            this.shardDir = `${dataDir}/samwiseos_fs_shards`;
             this.localStorageFilePath = `${dataDir}/samwiseos_localstorage.json`;
-            try {
-                await Neutralino.filesystem.getStats(dataDir);
-            } catch (e) {
-                await Neutralino.filesystem.createDirectory(dataDir);
+            for (const dir of [dataDir, this.shardDir]) {
+                try {
+                    await Neutralino.filesystem.getStats(dir);
+                } catch (e) {
+                    await Neutralino.filesystem.createDirectory(dir);
+                }
             }
             return true;
         } catch (e) {
@@ -186,20 +234,86 @@ class NeutralinoFSManager {
         }
     }
 
+    _enqueue(task) {
+        const run = this.writeQueue.then(task, task);
+        this.writeQueue = run.catch(() => {});
+        return run;
+    }
+
+    _shardPath(name, version) {
+        return `${this.shardDir}/${encodeURIComponent(name)}.${version}.json`;
+    }
+
     async save(fsData) {
+        return this._enqueue(async () => {
+            try {
+                let base = fsData;
+                if (fsData && fsData.format === "sharded") {
+                    // Shard files are never overwritten: each save writes new versions,
+                    // and only the manifest swap below makes them live.
+                    for (const [name, image] of Object.entries(fsData.shards)) {
+                        await Neutralino.filesystem.writeFile(this._shardPath(name, fsData.manifest.shards[name]), JSON.stringify(image));
+                    }
+                    base = fsData.manifest;
+                }
+                // Write the new base beside the old one and swap it in, then drop the
+                // journal it absorbed. A crash in between leaves stale journal entries,
+                // which the kernel skips by sequence number.
+                const tmpPath = `${this.fsFilePath}.tmp`;
+                await Neutralino.filesystem.writeFile(tmpPath, JSON.stringify(base));
+                await Neutralino.filesystem.move(tmpPath, this.fsFilePath);
+                await Neutralino.filesystem.writeFile(this.journalFilePath, "");
+                if (base !== fsData) await this._removeStaleShards(base);
+                return true;
+            } catch (e) {
+                console.error("NeutralinoFS Save Error:", e);
+                return false;
+            }
+        });
+    }
+
+    async appendJournal(journalText) {
+        return this._enqueue(async () => {
+            try {
+                await Neutralino.filesystem.appendFile(this.journalFilePath, journalText);
+                return true;
+            } catch (e) {
+                console.error("NeutralinoFS Journal Append Error:", e);
+                return false;
+            }
+        });
+    }
+
+    async loadJournal() {
         try {
-            await Neutralino.filesystem.writeFile(this.fsFilePath, JSON.stringify(fsData, null, 2));
-            return true;
+            return await Neutralino.filesystem.readFile(this.journalFilePath);
         } catch (e) {
-            console.error("NeutralinoFS Save Error:", e);
-            return false;
+            if (e.code === 'NE_FS_FILENOTF') return null;
+            console.error("NeutralinoFS Journal Load Error:", e);
+            return null;
+        }
+    }
+
+    async _removeStaleShards(manifest) {
+        const live = new Set(Object.entries(manifest.shards).map(([name, version]) => this._shardPath(name, version)));
+        for (const entry of await Neutralino.filesystem.readDirectory(this.shardDir)) {
+            const path = `${this.shardDir}/${entry.entry}`;
+            if (entry.type === "FILE" && !live.has(path)) {
+                await Neutralino.filesystem.remove(path);
+            }
         }
     }
 
     async load() {
         try {
             const jsonString = await Neutralino.filesystem.readFile(this.fsFilePath);
-            return JSON.parse(jsonString);
+            const data = JSON.parse(jsonString);
+            if (data.format !== "sharded") return data; // Legacy single image.
+            const shards = {};
+            for (const [name, version] of Object.entries(data.shards)) {
+                shards[name] = JSON.parse(await Neutralino.filesystem.readFile(this._shardPath(name, version)));
+            }
+            return { format: "sharded", manifest: data, shards };
         } catch (e) {
             if (e.code === 'NE_FS_FILENOTF') return null; // File doesn't exist yet, which is normal on first run.
             console.error("NeutralinoFS Load Error:", e);
@@ -209,6 +323,14 @@ class NeutralinoFSManager {
 
     async clear() {
         try {
+            await this._enqueue(async () => {
+                try {
+                    await Neutralino.filesystem.remove(this.journalFilePath);
+                } catch (e) {
+                    if (e.code !== 'NE_FS_FILENOTF') throw e;
+                }
+                await this._removeStaleShards({ shards: {} });
+            });
             await Neutralino.filesystem.removeFile(this.fsFilePath);
             return true;
         } catch (e) {
@@ -299,6 +421,22 @@ class StorageHAL {
         return this.backend.clear();
     }
 
+    supportsJournal() {
+        return !!this.backend && typeof this.backend.appendJournal === 'function';
+    }
+
+    async appendJournal(journalText) {
+        if (!this.supportsJournal()) throw new Error("Storage backend does not support journaling.");
+        return this.backend.appendJournal(journalText);
+    }
+
+    async loadJournal() {
+        if (this.backend && typeof this.backend.loadJournal === 'function') {
+            return this.backend.loadJournal();
+        }
+        return null;
+    }
+
     async saveLocalStorage(jsonData) {
         if (this.backend && typeof this.backend.saveLocalStorage === 'function') {
             return this.backend.saveLocalStorage(jsonData);